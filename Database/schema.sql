@@ -21,7 +21,10 @@ CREATE TABLE lawyers (
     phone VARCHAR(15),
     address TEXT,
     date_of_birth DATE,
-    specialization VARCHAR(255)
+    specialization VARCHAR(255),
+    -- Delta sync version, see the tombstones table
+    row_version BIGINT,
+    INDEX idx_lawyers_row_version (row_version)
 );
 
 -- Insert sample data into Lawyers
@@ -38,7 +41,9 @@ CREATE TABLE clients (
     phone VARCHAR(15),
     address TEXT,
     lawyer_id INT,
-    FOREIGN KEY (lawyer_id) REFERENCES lawyers(lawyer_id) ON DELETE CASCADE
+    row_version BIGINT,
+    FOREIGN KEY (lawyer_id) REFERENCES lawyers(lawyer_id) ON DELETE CASCADE,
+    INDEX idx_clients_row_version (row_version)
 );
 
 -- Insert sample data into Clients
@@ -55,8 +60,16 @@ CREATE TABLE cases (
     status ENUM('Open', 'In Progress', 'Closed', 'Under Review', 'Awaiting Judgment') NOT NULL,
     client_id INT,
     lawyer_id INT,
+    row_version BIGINT,
     FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-    FOREIGN KEY (lawyer_id) REFERENCES lawyers(lawyer_id) ON DELETE CASCADE
+    FOREIGN KEY (lawyer_id) REFERENCES lawyers(lawyer_id) ON DELETE CASCADE,
+    -- Backs the ?status= filter on GET /cases
+    INDEX idx_cases_status (status),
+    -- Backs the per-lawyer caseload of GET /analytics/lawyers
+    INDEX idx_cases_lawyer_status (lawyer_id, status),
+    -- Backs GET /cases/search
+    FULLTEXT INDEX ft_cases_title_description (title, description),
+    INDEX idx_cases_row_version (row_version)
 );
 
 -- Insert sample data into Cases
@@ -74,9 +87,15 @@ CREATE TABLE appointments (
     appointment_date DATE NOT NULL,
     appointment_time TIME NOT NULL,
     appointment_status ENUM('Scheduled', 'Completed', 'Cancelled') DEFAULT 'Scheduled',
+    row_version BIGINT,
     FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
     FOREIGN KEY (lawyer_id) REFERENCES lawyers(lawyer_id) ON DELETE CASCADE,
-    FOREIGN KEY (case_id) REFERENCES cases(case_id) ON DELETE CASCADE
+    FOREIGN KEY (case_id) REFERENCES cases(case_id) ON DELETE CASCADE,
+    -- One appointment per lawyer per slot; the API maps violations to 409
+    UNIQUE KEY uq_appointments_lawyer_slot (lawyer_id, appointment_date, appointment_time),
+    -- Backs the ?from=&to= date range filter on GET /appointments
+    INDEX idx_appointments_date (appointment_date),
+    INDEX idx_appointments_row_version (row_version)
 );
 
 -- Insert sample data into Appointments
@@ -86,6 +105,67 @@ VALUES
 (2, 2, 2, '2024-01-16', '14:00:00', 'Scheduled'),
 (1, 1, NULL, '2024-01-20', '11:30:00', 'Scheduled');
 
+-- Create Counters table
+-- Row counts and per-status case counts for the dashboard, the number of cases
+-- per lawyer ('lawyer_cases:<lawyer_id>') and per-table write versions used
+-- for HTTP ETags ('version:<table>'), kept up to date by
+-- the API in the same transaction as each write. Rebuild with
+-- `flask --app app reconcile-counters` after changes made outside the API.
+CREATE TABLE counters (
+    name VARCHAR(64) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO counters (name, value)
+SELECT 'lawyers', COUNT(*) FROM lawyers
+UNION ALL SELECT 'clients', COUNT(*) FROM clients
+UNION ALL SELECT 'cases', COUNT(*) FROM cases
+UNION ALL SELECT 'appointments', COUNT(*) FROM appointments
+UNION ALL SELECT 'cases:Open', COUNT(*) FROM cases WHERE status = 'Open'
+UNION ALL SELECT 'cases:In Progress', COUNT(*) FROM cases WHERE status = 'In Progress'
+UNION ALL SELECT 'cases:Closed', COUNT(*) FROM cases WHERE status = 'Closed'
+UNION ALL SELECT 'cases:Under Review', COUNT(*) FROM cases WHERE status = 'Under Review'
+UNION ALL SELECT 'cases:Awaiting Judgment', COUNT(*) FROM cases WHERE status = 'Awaiting Judgment'
+UNION ALL SELECT 'version:lawyers', 0
+UNION ALL SELECT 'version:clients', 0
+UNION ALL SELECT 'version:cases', 0
+UNION ALL SELECT 'version:appointments', 0
+UNION ALL
+SELECT CONCAT('lawyer_cases:', l.lawyer_id), COUNT(c.case_id)
+FROM lawyers l
+LEFT JOIN cases c ON c.lawyer_id = l.lawyer_id
+GROUP BY l.lawyer_id;
+
+-- Deleted rows, so GET /<table>?since= can report deletes. row_version is
+-- the table's 'version:<table>' counter at the delete; entries older than 30
+-- days are removed by the prune_tombstones job, which records the newest
+-- removed version as 'tombstones_pruned:<table>'.
+CREATE TABLE tombstones (
+    tombstone_id INT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    row_id INT NOT NULL,
+    row_version BIGINT NOT NULL,
+    deleted_at DATETIME NOT NULL,
+    INDEX idx_tombstones_table_version (table_name, row_version),
+    INDEX idx_tombstones_deleted_at (deleted_at)
+);
+
+-- Background maintenance jobs started through POST /jobs
+CREATE TABLE jobs (
+    job_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(64) NOT NULL,
+    params JSON,
+    status ENUM('queued', 'running', 'succeeded', 'failed') NOT NULL DEFAULT 'queued',
+    progress INT NOT NULL DEFAULT 0,
+    total INT,
+    result JSON,
+    error TEXT,
+    created_at DATETIME NOT NULL,
+    started_at DATETIME,
+    finished_at DATETIME,
+    INDEX idx_jobs_status (status)
+);
+
 -- Create View for appointment details
 CREATE VIEW appointment_details AS
 SELECT 
@@ -102,7 +182,8 @@ SELECT
     ca.case_id,
     ca.title AS case_title,
     ca.status AS case_status,
-    (SELECT COUNT(*) FROM cases WHERE lawyer_id = l.lawyer_id) AS number_of_cases
+    -- Maintained per-lawyer counter instead of a COUNT(*) per appointment row
+    COALESCE(lc.value, 0) AS number_of_cases
 FROM 
     appointments a
 JOIN 
@@ -110,7 +191,9 @@ JOIN
 JOIN 
     clients c ON a.client_id = c.client_id
 LEFT JOIN 
-    cases ca ON a.case_id = ca.case_id;
+    cases ca ON a.case_id = ca.case_id
+LEFT JOIN
+    counters lc ON lc.name = CONCAT('lawyer_cases:', l.lawyer_id);
 
 -- Triggers Section
 DELIMITER $$
@@ -122,7 +205,6 @@ FOR EACH ROW
 BEGIN
     -- Declare all variables first
     DECLARE case_status VARCHAR(20);
-    DECLARE existing_appointments INT;
     
     -- Check appointment time (9 AM to 6 PM)
     IF NEW.appointment_time NOT BETWEEN '09:00:00' AND '18:00:00' THEN
@@ -142,17 +224,7 @@ BEGIN
         END IF;
     END IF;
 
-    -- Check for overlapping appointments
-    SELECT COUNT(*) INTO existing_appointments
-    FROM appointments
-    WHERE lawyer_id = NEW.lawyer_id
-      AND appointment_date = NEW.appointment_date
-      AND appointment_time = NEW.appointment_time;
-
-    IF existing_appointments > 0 THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Lawyer already has an appointment at this date and time.';
-    END IF;
+    -- Overlapping appointments are rejected by uq_appointments_lawyer_slot
 
     -- Validate appointment date
     IF NEW.appointment_date < CURDATE() THEN
@@ -0,0 +1,182 @@
+import threading
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from models import db, Lawyer, Client, Case, CASE_STATUSES, ACTIVE_CASE_STATUSES
+from counters import read_versions
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; the same figures are computed in Python
+    numpy = None
+
+PERCENTILES = (25, 50, 75, 90)
+# Results are rebuilt after a write to any of these tables
+ANALYTICS_TABLES = ('lawyers', 'clients', 'cases')
+
+
+# Helpers with a vectorized numpy path and a plain Python fallback that
+# produce the same numbers
+
+def _ratios(numerators, denominators):
+    if numpy is not None:
+        numerators = numpy.asarray(numerators, dtype=float)
+        denominators = numpy.asarray(denominators, dtype=float)
+        ratios = numpy.divide(numerators, denominators, out=numpy.zeros_like(numerators), where=denominators > 0)
+        return [float(ratio) if denominator else None for ratio, denominator in zip(ratios, denominators)]
+    return [numerator / denominator if denominator else None
+            for numerator, denominator in zip(numerators, denominators)]
+
+
+# Sums of each weights column per group: groups[i] is the group of row i
+def _group_sums(groups, size, *columns):
+    if numpy is not None:
+        groups = numpy.asarray(groups, dtype=numpy.int64)
+        return [numpy.bincount(groups, weights=numpy.asarray(column, dtype=float), minlength=size).tolist()
+                for column in columns]
+    sums = [[0.0] * size for _ in columns]
+    for position, group in enumerate(groups):
+        for total, column in zip(sums, columns):
+            total[group] += column[position]
+    return sums
+
+
+# Linear interpolation between the closest ranks, as numpy.percentile does
+def _percentiles(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return {f'p{point}': None for point in PERCENTILES}
+    if numpy is not None:
+        results = numpy.percentile(numpy.asarray(values, dtype=float), PERCENTILES)
+        return {f'p{point}': round(float(result), 4) for point, result in zip(PERCENTILES, results)}
+    values = sorted(values)
+    results = {}
+    for point in PERCENTILES:
+        rank = (len(values) - 1) * point / 100
+        lower = int(rank)
+        upper = min(lower + 1, len(values) - 1)
+        results[f'p{point}'] = round(values[lower] + (values[upper] - values[lower]) * (rank - lower), 4)
+    return results
+
+
+def _rate(value):
+    return round(value, 4) if value is not None else None
+
+
+# Three aggregate reads instead of joining cases to lawyers row by row: the
+# lawyer columns, cases per (lawyer, status) and clients per lawyer. The
+# case aggregate is answered from the idx_cases_lawyer_status index.
+def _load():
+    lawyers = db.session.query(
+        Lawyer.lawyer_id, Lawyer.name, Lawyer.specialization,
+        Lawyer.experience_years, Lawyer.cases_won, Lawyer.cases_lost
+    ).order_by(Lawyer.lawyer_id).all()
+    caseload = (
+        db.session.query(Case.lawyer_id, Case.status, func.count())
+        .filter(Case.lawyer_id.isnot(None))
+        .group_by(Case.lawyer_id, Case.status)
+        .all()
+    )
+    clients = (
+        db.session.query(Client.lawyer_id, func.count())
+        .filter(Client.lawyer_id.isnot(None))
+        .group_by(Client.lawyer_id)
+        .all()
+    )
+    return lawyers, caseload, clients
+
+
+def compute_lawyer_analytics():
+    lawyers, caseload, clients = _load()
+    position = {row.lawyer_id: index for index, row in enumerate(lawyers)}
+    size = len(lawyers)
+
+    won = [row.cases_won for row in lawyers]
+    lost = [row.cases_lost for row in lawyers]
+    experience = [row.experience_years for row in lawyers]
+    win_rates = _ratios(won, [w + l for w, l in zip(won, lost)])
+
+    # Lawyers x statuses matrix of case counts
+    by_status = {status: [0] * size for status in CASE_STATUSES}
+    status_totals = defaultdict(int)
+    for lawyer_id, status, count in caseload:
+        status_totals[status] += count
+        if lawyer_id in position:
+            by_status[status][position[lawyer_id]] = count
+    active = [sum(by_status[status][index] for status in ACTIVE_CASE_STATUSES) for index in range(size)]
+    client_counts = [0] * size
+    for lawyer_id, count in clients:
+        if lawyer_id in position:
+            client_counts[position[lawyer_id]] = count
+
+    # The schema allows lawyers without a specialization
+    lawyer_specializations = [row.specialization or 'Unspecified' for row in lawyers]
+    specializations = sorted(set(lawyer_specializations))
+    spec_index = {name: index for index, name in enumerate(specializations)}
+    groups = [spec_index[name] for name in lawyer_specializations]
+    spec_lawyers, spec_won, spec_lost, spec_active, spec_experience = _group_sums(
+        groups, len(specializations), [1] * size, won, lost, active, experience
+    )
+    spec_win_rates = _ratios(spec_won, [w + l for w, l in zip(spec_won, spec_lost)])
+
+    total_won, total_lost = sum(won), sum(lost)
+    return {
+        'lawyers': size,
+        'totals': {
+            'cases_won': total_won,
+            'cases_lost': total_lost,
+            'win_rate': _rate(_ratios([total_won], [total_won + total_lost])[0]),
+            'active_cases': sum(active),
+            'caseload_by_status': {status: status_totals.get(status, 0) for status in CASE_STATUSES}
+        },
+        'percentiles': {
+            'win_rate': _percentiles(win_rates),
+            'active_cases': _percentiles(active),
+            'experience_years': _percentiles(experience)
+        },
+        'specializations': [{
+            'specialization': name,
+            'lawyers': int(spec_lawyers[index]),
+            'cases_won': int(spec_won[index]),
+            'cases_lost': int(spec_lost[index]),
+            'win_rate': _rate(spec_win_rates[index]),
+            'active_cases': int(spec_active[index]),
+            'average_experience_years': round(spec_experience[index] / spec_lawyers[index], 2)
+        } for index, name in enumerate(specializations)],
+        'per_lawyer': [{
+            'lawyer_id': row.lawyer_id,
+            'name': row.name,
+            'specialization': row.specialization,
+            'experience_years': row.experience_years,
+            'cases_won': row.cases_won,
+            'cases_lost': row.cases_lost,
+            'win_rate': _rate(win_rates[index]),
+            'active_cases': active[index],
+            'total_clients': client_counts[index],
+            'caseload_by_status': {status: by_status[status][index] for status in CASE_STATUSES}
+        } for index, row in enumerate(lawyers)]
+    }
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+# The last result is kept with the version counters it was built at and is
+# reused until a write bumps one of them. Concurrent misses wait for a
+# single rebuild.
+def lawyer_analytics():
+    global _cached
+    versions = read_versions(ANALYTICS_TABLES)
+    cached = _cached
+    if versions is not None and cached is not None and cached[0] == versions:
+        return cached[1]
+    with _lock:
+        cached = _cached
+        if versions is not None and cached is not None and cached[0] == versions:
+            return cached[1]
+        result = compute_lawyer_analytics()
+        if versions is not None:
+            _cached = (versions, result)
+        return result
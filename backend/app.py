@@ -1,44 +1,69 @@
 from flask import Flask, request, jsonify, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
-from models import db, Lawyer,Client,Case,Appointment,Admin,AppointmentDetails
+from models import db, Lawyer,Client,Case,Appointment,Admin,AppointmentDetails,Counter,Job,is_slot_conflict,CASE_STATUSES
 from config import Config
-import json
+from db_pool import engine_options, pool_stats
+from metrics import init_metrics, metrics_response
+from pagination import QueryArgumentError, apply_filters, apply_date_range, keyset_page, page_payload, parse_limit, encode_cursor, decode_cursor
+from streaming import wants_ndjson, ndjson_response
+from changes import init_change_tracking
+from counters import read_dashboard_counters, reconcile_counters, case_status_counter
+from http_cache import etag_cached, ALL_TABLES
+from search import search_case_ids, tokenize, highlight
+from availability import parse_availability_args, availability_cache_key, find_availability, MAX_LAWYERS
+from bulk import BulkInputError, read_bulk_rows, bulk_import, parse_client_row, parse_case_row, parse_appointment_row, check_appointment_chunk
+from serializers import compile_serializer, serialize_lawyer, serialize_lawyer_profile, serialize_client, serialize_case, serialize_case_with_names, serialize_appointment, serialize_appointment_details, serialize_job
+from json_provider import FastJSONProvider
+from jobs import JobError, submit_job
+from identity import identity_cache, init_identity_cache
+from routing import replica_binds, replica_keys, init_read_routing
+from export import export_response
+from events import parse_tables, event_stream_response
+from projection import LAWYER_PROJECTION, LAWYER_PROFILE_PROJECTION, CLIENT_PROJECTION, CASE_PROJECTION, APPOINTMENT_PROJECTION, APPOINTMENT_DETAILS_PROJECTION
+from assignment import NoLawyerAvailable, assignment_index, init_assignment
+from analytics import lawyer_analytics, ANALYTICS_TABLES
+from ical import parse_calendar_range, calendar_cache_key, calendar_response
+from recurrence import RecurrenceError, parse_recurring_request, find_conflicts
+from sync import SyncTokenExpired, SYNC_TOKEN_HEADER, current_sync_token, with_sync_token, is_delta_request, delta_payload
 from werkzeug.security import generate_password_hash
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required,get_jwt_identity, decode_token
-from sqlalchemy.exc import SQLAlchemyError
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required,get_jwt_identity, decode_token, current_user
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from flask_cors import CORS
-from datetime import datetime, time, timedelta
-
-app = Flask(__name__)
-
-# Custom JSON Encoder for time objects
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()  # Convert datetime to ISO format string
-        if isinstance(obj, time):
-            return obj.strftime('%H:%M:%S')  # Convert time to HH:MM:SS format
-        return super().default(obj)
+from datetime import datetime, timedelta
 
 app = Flask(__name__)
 app.config.from_object(Config)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+pymysql://root:@localhost/legal_case_management'
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(Config.SQLALCHEMY_DATABASE_URI, Config.SQLALCHEMY_ENGINE_OPTIONS)
+app.config['SQLALCHEMY_BINDS'] = replica_binds(Config.DATABASE_REPLICA_URLS)
 app.config['JWT_SECRET_KEY'] = 'your_secret_key_here'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)  # Token expires in 1 hour
 app.config['JWT_TOKEN_LOCATION'] = ['headers']
 app.config['JWT_HEADER_NAME'] = 'Authorization'
 app.config['JWT_HEADER_TYPE'] = 'Bearer'
 
-# Set the custom JSON encoder
-app.json_encoder = CustomJSONEncoder
+# Use the orjson backed JSON provider (handles time objects as HH:MM:SS)
+app.json = FastJSONProvider(app)
 
 # Initialize extensions
 db.init_app(app)
+init_change_tracking(db.session)
+init_metrics(app)
+init_read_routing(app)
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
+# Admins behind JWTs are resolved once and cached (current_user)
+init_identity_cache(app, jwt)
+init_assignment(app)
+
+@jwt.user_lookup_error_loader
+def admin_not_found(jwt_header, jwt_data):
+    return jsonify({'message': 'Admin not found'}), 401
 
-CORS(app)
+# Let browser clients read the delta sync token of list responses
+CORS(app, expose_headers=[SYNC_TOKEN_HEADER])
 
 def is_token_expired(token):
     try:
@@ -60,21 +85,36 @@ def test_route():
 @app.route('/test-db')
 def test_db():
     try:
-        # Try to query the database
-        lawyers = Lawyer.query.all()
-        return jsonify({'message': 'Database connection successful', 'lawyer_count': len(lawyers)})
+        # Read the maintained counter instead of loading every lawyer
+        counter = db.session.get(Counter, 'lawyers')
+        lawyer_count = counter.value if counter else db.session.query(func.count(Lawyer.lawyer_id)).scalar()
+        return jsonify({'message': 'Database connection successful', 'lawyer_count': int(lawyer_count)})
     except Exception as e:
         return jsonify({'message': 'Database error', 'error': str(e)}), 500
 
-# Rehash passwords for all lawyers in the database
-def rehash_passwords():
-    lawyers = Lawyer.query.all()
-    for lawyer in lawyers:
-        # Rehash the existing password
-        new_hashed_password = generate_password_hash(lawyer.password)
-        lawyer.password = new_hashed_password
-        db.session.commit()
-        print(f"Rehashed password for lawyer: {lawyer.name}")
+# Liveness/readiness probe: one round trip, no table access. Bound to the
+# primary explicitly, as a GET would otherwise probe a replica.
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    try:
+        db.session.execute(text('SELECT 1'), bind_arguments={'bind': db.engine})
+        return jsonify({'status': 'ok'}), 200
+    except Exception as e:
+        app.logger.warning('Health check failed: %s', e)
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+
+# Connection pool usage, for sizing workers against DB_POOL_SIZE/DB_MAX_OVERFLOW:
+# the primary's at the top level, each replica's under its bind key
+@app.route('/healthz/pool', methods=['GET'])
+def pool_status():
+    stats = pool_stats(db.engine)
+    stats['replicas'] = {key: pool_stats(db.engines[key]) for key in replica_keys(app)}
+    return jsonify(stats), 200
+
+# Request latency, SQL statement counts and SQL time in Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return metrics_response()
 
 # Register Route
 @app.route('/admin/register', methods=['POST'])
@@ -139,16 +179,9 @@ def login_admin():
 @app.route('/admin/protected', methods=['GET'])
 @jwt_required()
 def protected():
-    # Get the user identity (admin_id) from the JWT token
-    current_admin_id = get_jwt_identity()
-
-    # Fetch the admin data based on the current_admin_id
-    admin = Admin.query.filter_by(admin_id=current_admin_id).first()
-
-    if admin:
-        return jsonify(message="You have access to your data", admin_name=admin.name), 200
-    else:
-        return jsonify({'message': 'Admin not found'}), 404
+    # The admin behind the token, from the identity cache
+    admin = current_user
+    return jsonify(message="You have access to your data", admin_name=admin.name), 200
 
 
 @app.route('/admin/logout', methods=['POST'])
@@ -159,27 +192,53 @@ def logout_admin():
     return jsonify(message="You have been logged out successfully"), 200
 
 
+# Query string filters accepted by the list endpoints, pushed down into SQL
+LAWYER_FILTERS = {
+    'specialization': (Lawyer.specialization, str),
+}
+CLIENT_FILTERS = {
+    'lawyer_id': (Client.lawyer_id, int),
+}
+CASE_FILTERS = {
+    'status': (Case.status, str),
+    'lawyer_id': (Case.lawyer_id, int),
+    'client_id': (Case.client_id, int),
+}
+APPOINTMENT_FILTERS = {
+    'status': (Appointment.appointment_status, str),
+    'lawyer_id': (Appointment.lawyer_id, int),
+    'client_id': (Appointment.client_id, int),
+    'case_id': (Appointment.case_id, int),
+}
+
 # Get all lawyers
+# Supports ?limit=&after= keyset paging, ?specialization= filtering and
+# ?stream=1 (or Accept: application/x-ndjson) for a full NDJSON dump.
+# ?since=<token> returns only what changed after the X-Sync-Token of an
+# earlier response (see sync.py); the same goes for the other lists.
+# ?fields=name,email selects only those columns in SQL (see projection.py),
+# here and on the other lists.
 @app.route('/lawyers', methods=['GET'])
+@etag_cached('lawyers')
 def get_lawyers():
-    lawyers = Lawyer.query.all()
-    lawyer_list = []
-    
-    for lawyer in lawyers:
-        lawyer_list.append({
-            'lawyer_id': lawyer.lawyer_id,
-            'name': lawyer.name,
-            'email': lawyer.email,
-            'experience_years': lawyer.experience_years,
-            'cases_won': lawyer.cases_won,
-            'cases_lost': lawyer.cases_lost,
-            'phone': lawyer.phone,
-            'address': lawyer.address,
-            'date_of_birth': lawyer.date_of_birth,
-            'specialization': lawyer.specialization
-        })
-    
-    return jsonify(lawyer_list), 200
+    try:
+        query, serialize = LAWYER_PROJECTION.select(request.args, Lawyer.query, serialize_lawyer)
+        if is_delta_request(request.args):
+            return jsonify(delta_payload(Lawyer, query, serialize, request.args, LAWYER_FILTERS)), 200
+
+        sync_token = current_sync_token('lawyers')
+        query = apply_filters(query, request.args, LAWYER_FILTERS)
+        if wants_ndjson():
+            return with_sync_token(ndjson_response(query.order_by(Lawyer.lawyer_id), serialize), sync_token)
+
+        lawyers, next_cursor = keyset_page(query, Lawyer.lawyer_id, request.args)
+        lawyer_list = [serialize(lawyer) for lawyer in lawyers]
+
+        return with_sync_token(jsonify(page_payload(lawyer_list, next_cursor, request.args)), sync_token), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except SyncTokenExpired as e:
+        return jsonify({'message': str(e), 'reset': True}), 410
 
 
 @app.route('/lawyers', methods=['POST'])
@@ -297,49 +356,130 @@ def delete_lawyer(lawyer_id):
     return jsonify({'message': 'Lawyer deleted successfully'}), 200
 
 
+# Free slots inside office hours: ?from=&to= (YYYY-MM-DD, defaults to the next
+# seven days) and ?duration= in minutes (default 60)
+@app.route('/lawyers/<int:lawyer_id>/availability', methods=['GET'])
+@etag_cached('lawyers', 'appointments', vary=availability_cache_key)
+def get_lawyer_availability(lawyer_id):
+    try:
+        from_date, to_date, duration = parse_availability_args(request.args)
+        if not db.session.get(Lawyer, lawyer_id):
+            return jsonify({'message': 'Lawyer not found'}), 404
+
+        availability = find_availability([lawyer_id], from_date, to_date, duration)[0]
+        return jsonify(availability), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error fetching availability')
+        return jsonify({'message': 'Error fetching availability', 'error': str(e)}), 500
+
+# iCalendar feed of a lawyer's appointments for calendar clients to subscribe
+# to. ?from=&to= (YYYY-MM-DD) default to the last 30 days and the next year.
+@app.route('/lawyers/<int:lawyer_id>/calendar.ics', methods=['GET'])
+@etag_cached(*ALL_TABLES, vary=calendar_cache_key)
+def get_lawyer_calendar(lawyer_id):
+    try:
+        from_date, to_date = parse_calendar_range(request.args)
+        lawyer = db.session.get(Lawyer, lawyer_id)
+        if not lawyer:
+            return jsonify({'message': 'Lawyer not found'}), 404
+
+        return calendar_response(lawyer, from_date, to_date)
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error building calendar')
+        return jsonify({'message': 'Error building calendar', 'error': str(e)}), 500
+
+# The lawyer with the fewest open cases (then clients), optionally within
+# ?specialization=. Answered from the in-memory index in assignment.py.
+@app.route('/lawyers/recommend', methods=['GET'])
+def recommend_lawyer():
+    try:
+        lawyer_id, open_cases, clients = assignment_index.least_loaded(request.args.get('specialization'))
+        lawyer = db.session.get(Lawyer, lawyer_id)
+        return jsonify({
+            'lawyer_id': lawyer_id,
+            'name': lawyer.name if lawyer else None,
+            'specialization': lawyer.specialization if lawyer else None,
+            'open_cases': open_cases,
+            'clients': clients
+        }), 200
+    except NoLawyerAvailable as e:
+        return jsonify({'message': str(e)}), 404
+    except Exception as e:
+        app.logger.exception('Error recommending lawyer')
+        return jsonify({'message': 'Error recommending lawyer', 'error': str(e)}), 500
+
+# Same as above for several lawyers at once, chosen by ?lawyer_ids=1,2,3
+# and/or ?specialization=
+@app.route('/lawyers/availability', methods=['GET'])
+@etag_cached('lawyers', 'appointments', vary=availability_cache_key)
+def get_lawyers_availability():
+    try:
+        from_date, to_date, duration = parse_availability_args(request.args)
+
+        query = db.session.query(Lawyer.lawyer_id)
+        if request.args.get('lawyer_ids'):
+            try:
+                lawyer_ids = [int(value) for value in request.args['lawyer_ids'].split(',') if value.strip()]
+            except ValueError:
+                return jsonify({'message': 'lawyer_ids must be a comma separated list of ids'}), 400
+            query = query.filter(Lawyer.lawyer_id.in_(lawyer_ids))
+        if request.args.get('specialization'):
+            query = query.filter(Lawyer.specialization == request.args['specialization'])
+        lawyer_ids = [lawyer_id for (lawyer_id,) in query.order_by(Lawyer.lawyer_id).limit(MAX_LAWYERS + 1)]
+        if len(lawyer_ids) > MAX_LAWYERS:
+            return jsonify({'message': f'Too many lawyers, narrow the selection to at most {MAX_LAWYERS}'}), 400
+
+        return jsonify(find_availability(lawyer_ids, from_date, to_date, duration)), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error fetching availability')
+        return jsonify({'message': 'Error fetching availability', 'error': str(e)}), 500
+
 @app.route('/profile', methods=['GET'])
+@etag_cached('lawyers')
 def get_all_lawyers():
-    # Get all lawyers from the database
-    lawyers = Lawyer.query.all()
+    try:
+        # Get all lawyers from the database, only the ?fields= columns if given
+        query, serialize = LAWYER_PROFILE_PROJECTION.select(request.args, Lawyer.query, serialize_lawyer_profile)
+        lawyers = query.all()
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
 
     # If no lawyers are found
     if not lawyers:
         return jsonify({'message': 'No lawyers found'}), 404
 
     # Prepare a list of lawyer details
-    lawyer_list = []
-    for lawyer in lawyers:
-        lawyer_list.append({
-            'lawyer_id': lawyer.lawyer_id,
-            'name': lawyer.name,
-            'email': lawyer.email,
-            'experience_years': lawyer.experience_years,
-            'cases_won': lawyer.cases_won,
-            'cases_lost': lawyer.cases_lost,
-            'phone': lawyer.phone,
-            'address': lawyer.address,
-            'date_of_birth': lawyer.date_of_birth
-        })
+    lawyer_list = [serialize(lawyer) for lawyer in lawyers]
 
     return jsonify(lawyer_list), 200
 
 @app.route('/clients', methods=['GET'])
+@etag_cached('clients')
 def get_clients():
     try:
-        clients = Client.query.all()
-        client_list = []
-        
-        for client in clients:
-            client_list.append({
-                'client_id': client.client_id,
-                'name': client.name,
-                'email': client.email,
-                'phone': client.phone,
-                'address': client.address,
-                'lawyer_id': client.lawyer_id
-            })
-        
-        return jsonify(client_list), 200
+        query, serialize = CLIENT_PROJECTION.select(request.args, Client.query, serialize_client)
+        if is_delta_request(request.args):
+            return jsonify(delta_payload(Client, query, serialize, request.args, CLIENT_FILTERS)), 200
+
+        sync_token = current_sync_token('clients')
+        query = apply_filters(query, request.args, CLIENT_FILTERS)
+        if wants_ndjson():
+            return with_sync_token(ndjson_response(query.order_by(Client.client_id), serialize), sync_token)
+
+        clients, next_cursor = keyset_page(query, Client.client_id, request.args)
+        client_list = [serialize(client) for client in clients]
+
+        return with_sync_token(jsonify(page_payload(client_list, next_cursor, request.args)), sync_token), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except SyncTokenExpired as e:
+        return jsonify({'message': str(e), 'reset': True}), 410
     except Exception as e:
         print('Error fetching clients:', str(e))
         return jsonify({'message': 'Error fetching clients', 'error': str(e)}), 500
@@ -353,13 +493,20 @@ def add_client():
         if not data:
             return jsonify({'message': 'No input data provided'}), 400
 
+        # ?auto_assign=1 without a lawyer_id picks the least loaded lawyer,
+        # optionally of data['specialization']
+        if request.args.get('auto_assign') == '1' and data.get('lawyer_id') in (None, ''):
+            lawyer_id = assignment_index.least_loaded(data.get('specialization'))[0]
+        else:
+            lawyer_id = data['lawyer_id']
+
         # Create new client instance
         new_client = Client(
             name=data['name'],
             email=data['email'],
             phone=data['phone'],
             address=data['address'],
-            lawyer_id=data['lawyer_id']
+            lawyer_id=lawyer_id
         )
 
         print('Creating client:', new_client)
@@ -371,23 +518,37 @@ def add_client():
         # Return the created client data
         return jsonify({
             'message': 'Client added successfully',
-            'data': {
-                'client_id': new_client.client_id,
-                'name': new_client.name,
-                'email': new_client.email,
-                'phone': new_client.phone,
-                'address': new_client.address,
-                'lawyer_id': new_client.lawyer_id
-            }
+            'data': serialize_client(new_client)
         }), 201
 
     except KeyError as e:
         return jsonify({'message': f'Missing required field: {str(e)}'}), 400
+    except NoLawyerAvailable as e:
+        return jsonify({'message': str(e)}), 409
     except Exception as e:
         print('Error adding client:', str(e))
         db.session.rollback()
         return jsonify({'message': 'Error adding client', 'error': str(e)}), 500
 
+# Bulk import: accepts a JSON array, a text/csv body or a multipart CSV upload
+# and reports per-row errors instead of failing the whole import
+def run_bulk_import(table, parse_row, check_chunk=None):
+    try:
+        rows = read_bulk_rows(request)
+        result = bulk_import(table, rows, parse_row, check_chunk)
+        status_code = 201 if not result.failed else 200
+        return jsonify({'message': 'Bulk import finished', **result.to_dict()}), status_code
+    except BulkInputError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error in bulk import')
+        db.session.rollback()
+        return jsonify({'message': 'Error importing records', 'error': str(e)}), 500
+
+@app.route('/clients/bulk', methods=['POST'])
+def bulk_add_clients():
+    return run_bulk_import(Client.__table__, parse_client_row)
+
 @app.route('/clients/<int:client_id>', methods=['PUT'])
 def update_client(client_id):
     try:
@@ -408,14 +569,7 @@ def update_client(client_id):
 
         return jsonify({
             'message': 'Client updated successfully',
-            'data': {
-                'client_id': client.client_id,
-                'name': client.name,
-                'email': client.email,
-                'phone': client.phone,
-                'address': client.address,
-                'lawyer_id': client.lawyer_id
-            }
+            'data': serialize_client(client)
         }), 200
 
     except Exception as e:
@@ -442,27 +596,67 @@ def delete_client(client_id):
 
 
 @app.route('/cases', methods=['GET'])
+@etag_cached('cases')
 def get_cases():
     try:
-        cases = Case.query.all()
-        cases_list = []
-        
-        for case in cases:
-            cases_list.append({
-                'case_id': case.case_id,
-                'title': case.title,
-                'description': case.description,
-                'status': case.status,
-                'client_id': case.client_id,
-                'lawyer_id': case.lawyer_id
-            })
-        
-        print('Returning cases:', cases_list)  # Debug log
-        return jsonify(cases_list), 200
+        query, serialize = CASE_PROJECTION.select(request.args, Case.query, serialize_case)
+        if is_delta_request(request.args):
+            return jsonify(delta_payload(Case, query, serialize, request.args, CASE_FILTERS)), 200
+
+        sync_token = current_sync_token('cases')
+        query = apply_filters(query, request.args, CASE_FILTERS)
+        if wants_ndjson():
+            return with_sync_token(ndjson_response(query.order_by(Case.case_id), serialize), sync_token)
+
+        cases, next_cursor = keyset_page(query, Case.case_id, request.args)
+        cases_list = [serialize(case) for case in cases]
+
+        return with_sync_token(jsonify(page_payload(cases_list, next_cursor, request.args)), sync_token), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except SyncTokenExpired as e:
+        return jsonify({'message': str(e), 'reset': True}), 410
     except Exception as e:
         print('Error fetching cases:', str(e))
         return jsonify({'message': 'Error fetching cases', 'error': str(e)}), 500
 
+# Ranked full-text search over case titles and descriptions:
+# ?q=&limit=&after=, returns { data, next_cursor } with highlighted snippets
+@app.route('/cases/search', methods=['GET'])
+@etag_cached('cases')
+def search_cases():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'message': 'Missing search query'}), 400
+
+        limit = parse_limit(request.args)
+        offset = decode_cursor(request.args['after']) if request.args.get('after') else 0
+
+        hits = search_case_ids(query, limit + 1, offset)
+        next_cursor = encode_cursor(offset + limit) if len(hits) > limit else None
+        hits = hits[:limit]
+
+        cases = {case.case_id: case for case in Case.query.filter(Case.case_id.in_([case_id for case_id, _ in hits]))}
+        terms = tokenize(query)
+        results = []
+        for case_id, score in hits:
+            case = cases.get(case_id)
+            if case is None:
+                continue
+            result = serialize_case(case)
+            result['score'] = round(score, 4)
+            result['highlighted_title'] = highlight(case.title, terms)
+            result['snippet'] = highlight(case.description, terms)
+            results.append(result)
+
+        return jsonify({'data': results, 'next_cursor': next_cursor}), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error searching cases')
+        return jsonify({'message': 'Error searching cases', 'error': str(e)}), 500
+
 @app.route('/cases', methods=['POST'])
 def add_case():
     try:
@@ -472,13 +666,20 @@ def add_case():
         if not data:
             return jsonify({'message': 'No input data provided'}), 400
 
+        # ?auto_assign=1 without a lawyer_id picks the lawyer with the fewest
+        # open cases, optionally of data['specialization']
+        if request.args.get('auto_assign') == '1' and data.get('lawyer_id') in (None, ''):
+            lawyer_id = assignment_index.least_loaded(data.get('specialization'))[0]
+        else:
+            lawyer_id = int(data['lawyer_id'])
+
         # Create new case instance
         new_case = Case(
             title=data['title'],
             description=data['description'],
             status=data['status'],
             client_id=int(data['client_id']),
-            lawyer_id=int(data['lawyer_id'])
+            lawyer_id=lawyer_id
         )
 
         print('Creating case:', new_case)
@@ -490,23 +691,22 @@ def add_case():
         # Return the created case data
         return jsonify({
             'message': 'Case added successfully',
-            'data': {
-                'case_id': new_case.case_id,
-                'title': new_case.title,
-                'description': new_case.description,
-                'status': new_case.status,
-                'client_id': new_case.client_id,
-                'lawyer_id': new_case.lawyer_id
-            }
+            'data': serialize_case(new_case)
         }), 201
 
     except KeyError as e:
         return jsonify({'message': f'Missing required field: {str(e)}'}), 400
+    except NoLawyerAvailable as e:
+        return jsonify({'message': str(e)}), 409
     except Exception as e:
         print('Error adding case:', str(e))
         db.session.rollback()
         return jsonify({'message': 'Error adding case', 'error': str(e)}), 500
 
+@app.route('/cases/bulk', methods=['POST'])
+def bulk_add_cases():
+    return run_bulk_import(Case.__table__, parse_case_row)
+
 @app.route('/cases/<int:case_id>', methods=['PUT'])
 def update_case(case_id):
     try:
@@ -530,14 +730,7 @@ def update_case(case_id):
         # Return updated case data
         return jsonify({
             'message': 'Case updated successfully',
-            'data': {
-                'case_id': case.case_id,
-                'title': case.title,
-                'description': case.description,
-                'status': case.status,
-                'client_id': case.client_id,
-                'lawyer_id': case.lawyer_id
-            }
+            'data': serialize_case(case)
         }), 200
 
     except Exception as e:
@@ -559,31 +752,38 @@ def delete_case(case_id):
     return jsonify({'message': 'Case deleted successfully'}), 200
 
 
+# Supports ?stream=1 (or Accept: application/x-ndjson) for a full NDJSON dump,
+# ?limit=&after= keyset paging, ?status=&lawyer_id=&client_id=&case_id=
+# filters, an inclusive ?from=&to= appointment date range and ?since= deltas
 @app.route('/appointments', methods=['GET'])
+@etag_cached(*ALL_TABLES)
 def get_appointments():
     try:
-        appointments = Appointment.query.all()
-        appointments_list = []
-        
-        for appointment in appointments:
-            case_title = None
-            if appointment.case:
-                case_title = appointment.case.title
-
-            appointments_list.append({
-                'appointment_id': appointment.appointment_id,
-                'client_id': appointment.client_id,
-                'lawyer_id': appointment.lawyer_id,
-                'case_id': appointment.case_id,
-                'case_title': case_title,
-                'appointment_date': appointment.appointment_date.isoformat(),
-                'appointment_time': appointment.appointment_time.strftime('%H:%M:%S'),
-                'appointment_status': appointment.appointment_status,
-                'client_name': appointment.client.name if appointment.client else None,
-                'lawyer_name': appointment.lawyer.name if appointment.lawyer else None
-            })
-        
-        return jsonify(appointments_list), 200
+        # Load the related case title, client name and lawyer name in the same
+        # SELECT instead of one lazy query per appointment and relationship
+        query = Appointment.query.options(
+            joinedload(Appointment.case).load_only(Case.title),
+            joinedload(Appointment.client).load_only(Client.name),
+            joinedload(Appointment.lawyer).load_only(Lawyer.name)
+        )
+        query, serialize = APPOINTMENT_PROJECTION.select(request.args, query, serialize_appointment)
+        if is_delta_request(request.args):
+            return jsonify(delta_payload(Appointment, query, serialize, request.args, APPOINTMENT_FILTERS)), 200
+
+        sync_token = current_sync_token('appointments')
+        query = apply_filters(query, request.args, APPOINTMENT_FILTERS)
+        query = apply_date_range(query, request.args, Appointment.appointment_date)
+        if wants_ndjson():
+            return with_sync_token(ndjson_response(query.order_by(Appointment.appointment_id), serialize), sync_token)
+
+        appointments, next_cursor = keyset_page(query, Appointment.appointment_id, request.args)
+        appointments_list = [serialize(appointment) for appointment in appointments]
+
+        return with_sync_token(jsonify(page_payload(appointments_list, next_cursor, request.args)), sync_token), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except SyncTokenExpired as e:
+        return jsonify({'message': str(e), 'reset': True}), 410
     except Exception as e:
         print('Error fetching appointments:', str(e))
         return jsonify({'message': 'Error fetching appointments', 'error': str(e)}), 500
@@ -617,16 +817,6 @@ def add_appointment():
             if case.status.lower() == 'closed':
                 return jsonify({'message': 'Appointments cannot be booked for closed cases'}), 400
 
-            # Check if lawyer is already booked at the requested time
-            existing_appointment = Appointment.query.filter_by(
-                lawyer_id=int(data['lawyer_id']),
-                appointment_date=appointment_date,
-                appointment_time=appointment_time
-            ).first()
-
-            if existing_appointment:
-                return jsonify({'message': f'Lawyer is already booked at {appointment_time} on {appointment_date}'}), 400
-
             # Create new appointment instance
             new_appointment = Appointment(
                 client_id=int(data['client_id']),
@@ -639,25 +829,20 @@ def add_appointment():
 
             print('Creating appointment:', new_appointment)
 
-            # Add to database
+            # Add to database; a double booking is rejected by the unique slot index
             db.session.add(new_appointment)
-            db.session.commit()
+            try:
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                if is_slot_conflict(e):
+                    return jsonify({'message': f'Lawyer is already booked at {appointment_time} on {appointment_date}'}), 409
+                raise
 
             # Return the created appointment data with additional info
             response_data = {
                 'message': 'Appointment added successfully',
-                'data': {
-                    'appointment_id': new_appointment.appointment_id,
-                    'client_id': new_appointment.client_id,
-                    'lawyer_id': new_appointment.lawyer_id,
-                    'case_id': new_appointment.case_id,
-                    'appointment_date': new_appointment.appointment_date.isoformat(),
-                    'appointment_time': new_appointment.appointment_time.strftime('%H:%M:%S'),
-                    'appointment_status': new_appointment.appointment_status,
-                    'client_name': new_appointment.client.name if new_appointment.client else None,
-                    'lawyer_name': new_appointment.lawyer.name if new_appointment.lawyer else None,
-                    'case_title': new_appointment.case.title if new_appointment.case else None
-                }
+                'data': serialize_appointment(new_appointment)
             }
             print('Response data:', response_data)
             return jsonify(response_data), 201
@@ -671,7 +856,77 @@ def add_appointment():
         db.session.rollback()
         return jsonify({'message': 'Error adding appointment', 'error': str(e)}), 500
 
+# Books a series, e.g. weekly check-ins:
+# { client_id, lawyer_id, case_id, time, start_date, frequency: daily|weekly|monthly,
+#   interval?, count? and/or until?, weekdays?: ["MO", "TH"], appointment_status?,
+#   skip_conflicts?: true }
+# Occurrences clashing with existing bookings are reported in "conflicts" and
+# the rest are inserted in one transaction. With skip_conflicts false any
+# clash books nothing (409).
+@app.route('/appointments/recurring', methods=['POST'])
+def add_recurring_appointments():
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'message': 'No input data provided'}), 400
 
+        values, dates = parse_recurring_request(data)
+
+        case = db.session.get(Case, values['case_id'])
+        if not case:
+            return jsonify({'message': 'Case not found'}), 404
+        if case.status.lower() == 'closed':
+            return jsonify({'message': 'Appointments cannot be booked for closed cases'}), 400
+
+        # A booking made between the check and the insert trips the unique
+        # slot index; check again and retry
+        for attempt in range(3):
+            conflicts = find_conflicts(values['lawyer_id'], dates, values['appointment_time'])
+            if conflicts and (not data.get('skip_conflicts', True) or len(conflicts) == len(dates)):
+                return jsonify({
+                    'message': 'The series conflicts with existing appointments',
+                    'data': [],
+                    'conflicts': list(conflicts.values())
+                }), 409
+
+            appointments = [Appointment(appointment_date=day, **values) for day in dates if day not in conflicts]
+            db.session.add_all(appointments)
+            try:
+                db.session.flush()
+                appointment_ids = [appointment.appointment_id for appointment in appointments]
+                db.session.commit()
+                break
+            except IntegrityError as e:
+                db.session.rollback()
+                if not is_slot_conflict(e) or attempt == 2:
+                    raise
+
+        # Committed instances are expired; reload them with their names in one
+        # query instead of refreshing each one and its relationships
+        created = Appointment.query.options(
+            joinedload(Appointment.case).load_only(Case.title),
+            joinedload(Appointment.client).load_only(Client.name),
+            joinedload(Appointment.lawyer).load_only(Lawyer.name)
+        ).filter(Appointment.appointment_id.in_(appointment_ids)).order_by(Appointment.appointment_date).all()
+
+        return jsonify({
+            'message': f'{len(created)} of {len(dates)} appointments added',
+            'data': [serialize_appointment(appointment) for appointment in created],
+            'conflicts': list(conflicts.values())
+        }), 201
+
+    except RecurrenceError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error adding recurring appointments')
+        db.session.rollback()
+        return jsonify({'message': 'Error adding recurring appointments', 'error': str(e)}), 500
+
+
+@app.route('/appointments/bulk', methods=['POST'])
+def bulk_add_appointments():
+    return run_bulk_import(Appointment.__table__, parse_appointment_row, check_appointment_chunk)
 
 @app.route('/appointments/<int:appointment_id>', methods=['PUT'])
 def update_appointment(appointment_id):
@@ -688,19 +943,6 @@ def update_appointment(appointment_id):
         new_time = datetime.strptime(data['time'], '%H:%M:%S').time() if 'time' in data else appointment.appointment_time
         new_lawyer_id = int(data['lawyer_id']) if 'lawyer_id' in data else appointment.lawyer_id
 
-        # Check for conflicting appointments for the same lawyer
-        conflict = Appointment.query.filter(
-            Appointment.lawyer_id == new_lawyer_id,
-            Appointment.appointment_date == new_date,
-            Appointment.appointment_time == new_time,
-            Appointment.appointment_id != appointment_id  # Exclude the current appointment
-        ).first()
-
-        if conflict:
-            return jsonify({
-                'message': f'Lawyer appointment already booked at {new_time} on {new_date}. Please choose another time.'
-            }), 409
-
         # Update appointment details
         appointment.appointment_date = new_date
         appointment.appointment_time = new_time
@@ -713,21 +955,21 @@ def update_appointment(appointment_id):
         if 'case_id' in data:
             appointment.case_id = int(data['case_id']) if data['case_id'] else None
 
-        db.session.commit()
+        # Conflicts with other appointments of the same lawyer are rejected by
+        # the unique slot index
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_slot_conflict(e):
+                return jsonify({
+                    'message': f'Lawyer appointment already booked at {new_time} on {new_date}. Please choose another time.'
+                }), 409
+            raise
 
         return jsonify({
             'message': 'Appointment updated successfully',
-            'data': {
-                'appointment_id': appointment.appointment_id,
-                'client_id': appointment.client_id,
-                'lawyer_id': appointment.lawyer_id,
-                'case_id': appointment.case_id,
-                'appointment_date': appointment.appointment_date.isoformat(),
-                'appointment_time': appointment.appointment_time.strftime('%H:%M:%S'),
-                'appointment_status': appointment.appointment_status,
-                'client_name': appointment.client.name if appointment.client else None,
-                'lawyer_name': appointment.lawyer.name if appointment.lawyer else None
-            }
+            'data': serialize_appointment(appointment)
         }), 200
 
     except ValueError:
@@ -739,23 +981,15 @@ def update_appointment(appointment_id):
 
 
 @app.route('/debug/cases', methods=['GET'])
+@etag_cached('cases', 'clients', 'lawyers')
 def debug_cases():
     try:
-        cases = Case.query.all()
-        cases_list = []
-        
-        for case in cases:
-            cases_list.append({
-                'case_id': case.case_id,
-                'title': case.title,
-                'description': case.description,
-                'status': case.status,
-                'client_id': case.client_id,
-                'lawyer_id': case.lawyer_id,
-                'client_name': case.client.name if case.client else None,
-                'lawyer_name': case.lawyer.name if case.lawyer else None
-            })
-        
+        cases = Case.query.options(
+            joinedload(Case.client).load_only(Client.name),
+            joinedload(Case.lawyer).load_only(Lawyer.name)
+        ).all()
+        cases_list = [serialize_case_with_names(case) for case in cases]
+
         return jsonify({
             'total_cases': len(cases_list),
             'cases': cases_list
@@ -767,24 +1001,62 @@ def debug_cases():
 @app.route('/dashboard', methods=['GET'])
 def get_dashboard_data():
     try:
-        # Get counts from database
-        total_lawyers = Lawyer.query.count()
-        total_clients = Client.query.count()
-        total_cases = Case.query.count()
-        total_appointments = Appointment.query.count()
+        # Counters are maintained by the write handlers; build them on first use
+        counters = read_dashboard_counters()
+        if counters is None:
+            counters = reconcile_counters()
 
         dashboard_data = {
-            'total_lawyers': total_lawyers,
-            'total_clients': total_clients,
-            'total_cases': total_cases,
-            'total_appointments': total_appointments
+            'total_lawyers': counters['lawyers'],
+            'total_clients': counters['clients'],
+            'total_cases': counters['cases'],
+            'total_appointments': counters['appointments'],
+            'cases_by_status': {
+                status: counters[case_status_counter(status)] for status in CASE_STATUSES
+            }
         }
 
         return jsonify(dashboard_data), 200
     except Exception as e:
         print('Error fetching dashboard data:', str(e))
+        db.session.rollback()
         return jsonify({'message': 'Error fetching dashboard data', 'error': str(e)}), 500
 
+# Start a background maintenance job: {"name": "rehash_passwords", "params": {}}
+@app.route('/jobs', methods=['POST'])
+@jwt_required()
+def create_job():
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('name'):
+            return jsonify({'message': 'Missing required field: name'}), 400
+        job = submit_job(app, data['name'], data.get('params'))
+        response = jsonify({'message': 'Job queued', 'job': serialize_job(job)})
+        response.headers['Location'] = f'/jobs/{job.job_id}'
+        return response, 202
+    except JobError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error queueing job')
+        db.session.rollback()
+        return jsonify({'message': 'Error queueing job', 'error': str(e)}), 500
+
+# Job status and progress
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(serialize_job(job)), 200
+
+# Rebuild the dashboard counters from scratch: flask --app app reconcile-counters
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    counts = reconcile_counters()
+    for name, value in counts.items():
+        print(f'{name}: {value}')
+
 @app.route('/profile/<int:admin_id>', methods=['GET'])
 @jwt_required()
 def get_admin_profile(admin_id):
@@ -797,15 +1069,8 @@ def get_admin_profile(admin_id):
         if int(current_user_id) != int(admin_id):
             return jsonify({'message': 'Unauthorized access'}), 403
 
-        admin = Admin.query.get(admin_id)
-        if not admin:
-            return jsonify({'message': 'Admin not found'}), 404
-
-        return jsonify({
-            'admin_id': admin.admin_id,
-            'name': admin.name,
-            'email': admin.email
-        }), 200
+        # Already loaded for the token; no query needed
+        return jsonify(current_user._asdict()), 200
     except Exception as e:
         print('Error fetching admin profile:', str(e))
         return jsonify({'message': 'Error fetching profile', 'error': str(e)}), 500
@@ -814,9 +1079,9 @@ def get_admin_profile(admin_id):
 @jwt_required()
 def update_admin_profile(admin_id):
     try:
-        # Verify that the logged-in user is updating their own profile
-        current_user_id = get_jwt_identity()
-        if current_user_id != admin_id:
+        # Verify that the logged-in user is updating their own profile; the
+        # JWT subject is a string, the resolved identity holds the int id
+        if current_user.admin_id != admin_id:
             return jsonify({'message': 'Unauthorized access'}), 403
 
         admin = Admin.query.get(admin_id)
@@ -833,6 +1098,7 @@ def update_admin_profile(admin_id):
             admin.password = generate_password_hash(data['password'])
 
         db.session.commit()
+        identity_cache.invalidate(admin.admin_id)
 
         return jsonify({
             'message': 'Profile updated successfully',
@@ -847,10 +1113,51 @@ def update_admin_profile(admin_id):
         db.session.rollback()
         return jsonify({'message': 'Error updating profile', 'error': str(e)}), 500
 
-from sqlalchemy.sql import text  # Import the text function
+def date_or_na(value):
+    return value.isoformat() if value is not None else 'N/A'
+
+def time_or_na(value):
+    return value.strftime('%H:%M:%S') if value is not None else 'N/A'
+
+# One compiled serializer per /view/<table> query shape
+VIEW_SERIALIZERS = {
+    'cases': compile_serializer(
+        ['case_id', 'title', 'description', 'status', 'client_name', 'lawyer_name'],
+        name='serialize_cases_view'
+    ),
+    'appointments': compile_serializer(
+        ['appointment_id', 'client_name', 'lawyer_name', 'case_title',
+         ('appointment_date', 'appointment_date', date_or_na),
+         ('appointment_time', 'appointment_time', time_or_na),
+         'appointment_status'],
+        name='serialize_appointments_view'
+    ),
+    'clients': compile_serializer(
+        ['client_id', 'name', 'email', 'phone', 'address', 'assigned_lawyer', 'total_cases'],
+        name='serialize_clients_view'
+    ),
+    'lawyers': compile_serializer(
+        ['lawyer_id', 'name', 'email', 'phone', 'specialization', 'experience_years', 'active_cases', 'total_clients'],
+        name='serialize_lawyers_view'
+    ),
+}
+
+# Win rates, caseload by status, specialization breakdowns and percentiles
+# over all lawyers. Rebuilt only after a write to lawyers, clients or cases
+# (see analytics.py).
+@app.route('/analytics/lawyers', methods=['GET'])
+@jwt_required()
+@etag_cached(*ANALYTICS_TABLES)
+def get_lawyer_analytics():
+    try:
+        return jsonify(lawyer_analytics()), 200
+    except Exception as e:
+        app.logger.exception('Error computing lawyer analytics')
+        return jsonify({'message': 'Error computing lawyer analytics', 'error': str(e)}), 500
 
 @app.route('/view/<table>', methods=['GET'])
 @jwt_required()
+@etag_cached(*ALL_TABLES)
 def get_view_details(table):
     try:
         # Get the JWT identity
@@ -881,15 +1188,15 @@ def get_view_details(table):
                     cl.name as client_name,
                     l.name as lawyer_name,
                     c.title as case_title,
-                    IFNULL(DATE_FORMAT(a.appointment_date, '%Y-%m-%d'), 'N/A') AS appointment_date,
-                    IFNULL(TIME_FORMAT(a.appointment_time, '%H:%i:%s'), 'N/A') AS appointment_time,
+                    a.appointment_date,
+                    a.appointment_time,
                     a.appointment_status
                 FROM appointments a
                 LEFT JOIN clients cl ON a.client_id = cl.client_id
                 LEFT JOIN lawyers l ON a.lawyer_id = l.lawyer_id
                 LEFT JOIN cases c ON a.case_id = c.case_id
                 ORDER BY a.appointment_id ASC
-            """)
+            """).columns(appointment_date=db.Date, appointment_time=db.Time)
         elif table == 'clients':
             query = text("""
                 SELECT 
@@ -916,7 +1223,7 @@ def get_view_details(table):
                     l.specialization,
                     l.experience_years,
                     COUNT(DISTINCT CASE 
-                    WHEN c.status IN ('Open', 'In Progress', 'Under Review', 'Awaiting Judgement') 
+                    WHEN c.status IN ('Open', 'In Progress', 'Under Review', 'Awaiting Judgment') 
                     THEN c.case_id 
                     END) AS active_cases,
                 COUNT(DISTINCT cl.client_id) AS total_clients
@@ -932,14 +1239,10 @@ def get_view_details(table):
 
         # Execute the query
         result = db.session.execute(query)
-        # Fetch data and convert rows into dictionaries
-        data = [dict(row._mapping) for row in result]
-
-        # Convert datetime objects to strings
-        for row in data:
-            for key, value in row.items():
-                if isinstance(value, (datetime, time)):
-                    row[key] = value.isoformat()
+        # Convert rows into dictionaries; dates and times are formatted by
+        # the compiled serializer
+        serialize = VIEW_SERIALIZERS[table]
+        data = [serialize(row) for row in result]
 
         return jsonify(data), 200
 
@@ -965,31 +1268,58 @@ def verify_token():
         print('Token verification error:', str(e))
         return jsonify({'message': 'Token verification failed', 'error': str(e)}), 401
 
+# Server-Sent Events feed of committed changes: /events?tables=cases,appointments
+# Each event is {"table", "id", "op", "fields"}; a "reset" event means the
+# client should reload that table (or everything for "*").
+@app.route('/events', methods=['GET'])
+def change_events():
+    try:
+        tables = parse_tables(request.args.get('tables'))
+        last_event_id = request.headers.get('Last-Event-ID')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return event_stream_response(tables, last_event_id)
+
+# Full table export for compliance: /export/cases?format=csv|parquet with the
+# same filters as the list endpoints (appointments also take ?from=&to=).
+# Rows are streamed from a server-side cursor, so memory use stays flat.
+@app.route('/export/<table>', methods=['GET'])
+@jwt_required()
+def export_table(table):
+    try:
+        return export_response(table, request.args)
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('Error exporting table')
+        return jsonify({'message': 'Error exporting data', 'error': str(e)}), 500
+
+APPOINTMENT_DETAILS_FILTERS = {
+    'lawyer_id': (AppointmentDetails.lawyer_id, int),
+    'client_id': (AppointmentDetails.client_id, int),
+    'case_id': (AppointmentDetails.case_id, int),
+}
+
+# Supports ?limit=&after= keyset paging, ?lawyer_id=&client_id=&case_id=
+# filters, an inclusive ?from=&to= date range and ?stream=1 NDJSON dumps
 @app.route('/all-appointments', methods=['GET'])  # Adjust route if needed
+@etag_cached(*ALL_TABLES)
 def fetch_appointments():  # Renamed function to avoid conflict
     try:
         # Query the view
-        appointments = AppointmentDetails.query.all()
+        query, serialize = APPOINTMENT_DETAILS_PROJECTION.select(request.args, AppointmentDetails.query, serialize_appointment_details)
+        query = apply_filters(query, request.args, APPOINTMENT_DETAILS_FILTERS)
+        query = apply_date_range(query, request.args, AppointmentDetails.appointment_date)
+        if wants_ndjson():
+            return ndjson_response(query.order_by(AppointmentDetails.appointment_id), serialize)
+
+        appointments, next_cursor = keyset_page(query, AppointmentDetails.appointment_id, request.args)
         # Serialize the data
-        results = [
-            {
-                'appointment_id': a.appointment_id,
-                'appointment_date': a.appointment_date,
-                'appointment_time': str(a.appointment_time),
-                'lawyer_id': a.lawyer_id,
-                'lawyer_name': a.lawyer_name,
-                'lawyer_email': a.lawyer_email,
-                'lawyer_phone': a.lawyer_phone,
-                'client_id': a.client_id,
-                'client_name': a.client_name,
-                'client_email': a.client_email,
-                'case_id': a.case_id,
-                'case_title': a.case_title,
-                'case_status': a.case_status,
-                'number_of_cases': a.number_of_cases
-            } for a in appointments
-        ]
-        return jsonify(results), 200
+        results = [serialize(a) for a in appointments]
+        return jsonify(page_payload(results, next_cursor, request.args)), 200
+    except QueryArgumentError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -997,5 +1327,7 @@ def fetch_appointments():  # Renamed function to avoid conflict
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        # Warm the lawyer assignment index before serving
+        assignment_index.rebuild()
     app.run(debug=True)
 
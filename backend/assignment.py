@@ -0,0 +1,240 @@
+import heapq
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from models import db, Lawyer, Client, Case, ACTIVE_CASE_STATUSES
+from changes import on_commit
+
+# Heap key of the heap over all lawyers; lawyers may have no specialization
+_ALL = object()
+
+# Reads a rebuild gets before giving up to a steady stream of commits
+REBUILD_ATTEMPTS = 3
+
+
+class NoLawyerAvailable(LookupError):
+    pass
+
+
+def _is_active(status):
+    return status in ACTIVE_CASE_STATUSES
+
+
+# Open cases and clients per lawyer, with one min-heap of (open cases,
+# clients, lawyer_id) per specialization and one over all lawyers. The
+# least loaded lawyer is found in O(log n): a load change pushes a new heap
+# entry and outdated entries are dropped when they reach the top.
+#
+# Committed writes of this process update it through the change tracking
+# hooks; writes made by other processes are picked up by the rebuild that
+# reconcile() runs every max_age seconds in the background.
+class AssignmentIndex:
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Bumped by every apply() and invalidate(), see rebuild()
+        self._generation = 0
+        self._built_at = None
+        self._lawyers = {}
+        self._heaps = {}
+
+    def _push(self, lawyer_id):
+        open_cases, clients, specialization = self._lawyers[lawyer_id]
+        entry = (open_cases, clients, lawyer_id)
+        for key in (specialization, _ALL):
+            heap = self._heaps.setdefault(key, [])
+            heapq.heappush(heap, entry)
+            # Mostly outdated entries: start the heap over
+            if len(heap) > 4 * len(self._lawyers) + 64:
+                self._heaps[key] = heap = [
+                    (state[0], state[1], other_id) for other_id, state in self._lawyers.items()
+                    if key is _ALL or state[2] == key
+                ]
+                heapq.heapify(heap)
+
+    def _is_current(self, entry, key):
+        open_cases, clients, lawyer_id = entry
+        state = self._lawyers.get(lawyer_id)
+        return (state is not None and state[0] == open_cases and state[1] == clients
+                and (key is _ALL or state[2] == key))
+
+    # Three grouped reads on a connection of their own, so a rebuild never
+    # reads or ends the caller's transaction; the case one is answered from
+    # the idx_cases_lawyer_status index
+    def _load(self):
+        with db.engine.connect() as connection:
+            lawyers = {
+                lawyer_id: [0, 0, specialization]
+                for lawyer_id, specialization in connection.execute(select(Lawyer.lawyer_id, Lawyer.specialization))
+            }
+            open_cases = connection.execute(
+                select(Case.lawyer_id, func.count())
+                .where(Case.lawyer_id.isnot(None), Case.status.in_(ACTIVE_CASE_STATUSES))
+                .group_by(Case.lawyer_id)
+            )
+            for lawyer_id, count in open_cases:
+                if lawyer_id in lawyers:
+                    lawyers[lawyer_id][0] = count
+            clients = connection.execute(
+                select(Client.lawyer_id, func.count()).where(Client.lawyer_id.isnot(None)).group_by(Client.lawyer_id)
+            )
+            for lawyer_id, count in clients:
+                if lawyer_id in lawyers:
+                    lawyers[lawyer_id][1] = count
+
+        heaps = {_ALL: []}
+        for lawyer_id, (case_count, client_count, specialization) in lawyers.items():
+            entry = (case_count, client_count, lawyer_id)
+            heaps[_ALL].append(entry)
+            heaps.setdefault(specialization, []).append(entry)
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        return {lawyer_id: tuple(state) for lawyer_id, state in lawyers.items()}, heaps
+
+    # Full rebuild. The reads run without the lock so lookups are not held up;
+    # commits applied meanwhile may or may not be in what was read, so the
+    # result is only swapped in if none arrived, otherwise it is read again.
+    # Returns whether the index was replaced.
+    def rebuild(self, attempts=REBUILD_ATTEMPTS):
+        for _ in range(attempts):
+            with self._lock:
+                generation = self._generation
+            lawyers, heaps = self._load()
+            with self._lock:
+                if self._generation == generation:
+                    self._lawyers = lawyers
+                    self._heaps = heaps
+                    self._built_at = time.monotonic()
+                    return True
+        return False
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._built_at = None
+
+    # (lawyer_id, open cases, clients) of the least loaded lawyer, optionally
+    # within a specialization
+    def least_loaded(self, specialization=None):
+        # Only an index that was never built or could not follow a change is
+        # rebuilt here; refreshing a built one is left to reconcile()
+        if self._built_at is None:
+            self.rebuild()
+        key = specialization if specialization else _ALL
+        with self._lock:
+            heap = self._heaps.get(key, [])
+            while heap and not self._is_current(heap[0], key):
+                heapq.heappop(heap)
+            if not heap:
+                raise NoLawyerAvailable(
+                    f'No lawyer with specialization {specialization}' if specialization else 'No lawyers available'
+                )
+            open_cases, clients, lawyer_id = heap[0]
+            return lawyer_id, open_cases, clients
+
+    def adjust(self, lawyer_id, open_cases=0, clients=0):
+        state = self._lawyers.get(lawyer_id)
+        if state is None:
+            return
+        self._lawyers[lawyer_id] = (max(state[0] + open_cases, 0), max(state[1] + clients, 0), state[2])
+        self._push(lawyer_id)
+
+    def apply(self, changes):
+        with self._lock:
+            self._generation += 1
+            if self._built_at is None:
+                return
+            for change in changes:
+                if not self._apply_change(change):
+                    # Not enough information to update in place
+                    self._built_at = None
+                    return
+
+    def _apply_change(self, change):
+        if change.table == 'lawyers':
+            if change.row_id is None:
+                return False
+            if change.operation == 'insert':
+                self._lawyers[change.row_id] = (0, 0, change.fields.get('specialization'))
+                self._push(change.row_id)
+            elif change.operation == 'delete':
+                self._lawyers.pop(change.row_id, None)
+            elif 'specialization' in change.fields and change.row_id in self._lawyers:
+                open_cases, clients, _ = self._lawyers[change.row_id]
+                self._lawyers[change.row_id] = (open_cases, clients, change.fields['specialization'])
+                self._push(change.row_id)
+        elif change.table == 'cases':
+            if change.operation == 'update':
+                if {'lawyer_id', 'status'}.isdisjoint(change.fields):
+                    return True
+                if not {'lawyer_id', 'status'} <= set(change.previous):
+                    return False
+            old, new = self._case_states(change)
+            if old is not None and old[0] is not None and _is_active(old[1]):
+                self.adjust(old[0], open_cases=-1)
+            if new is not None and new[0] is not None and _is_active(new[1]):
+                self.adjust(new[0], open_cases=1)
+        elif change.table == 'clients':
+            if change.operation != 'update':
+                lawyer_id = change.fields.get('lawyer_id')
+                if lawyer_id is not None:
+                    self.adjust(lawyer_id, clients=1 if change.operation == 'insert' else -1)
+            elif 'lawyer_id' in change.fields:
+                if change.previous.get('lawyer_id') is not None:
+                    self.adjust(change.previous['lawyer_id'], clients=-1)
+                if change.fields['lawyer_id'] is not None:
+                    self.adjust(change.fields['lawyer_id'], clients=1)
+        return True
+
+    # (lawyer_id, status) of a case before and after the change; updates
+    # carry both columns in previous (see CONTEXT_COLUMNS in changes.py)
+    @staticmethod
+    def _case_states(change):
+        if change.operation == 'insert':
+            return None, (change.fields.get('lawyer_id'), change.fields.get('status'))
+        if change.operation == 'delete':
+            return (change.fields.get('lawyer_id'), change.fields.get('status')), None
+        old = (change.previous.get('lawyer_id'), change.previous.get('status'))
+        new = (change.fields.get('lawyer_id', old[0]), change.fields.get('status', old[1]))
+        return old, new
+
+
+assignment_index = AssignmentIndex()
+
+
+@on_commit
+def _update_assignment_index(changes):
+    assignment_index.apply(changes)
+
+
+# Rebuilds the index in an application context of its own, off the request
+# path. Used at startup, by the background reconciler and by the
+# rebuild_assignment_index job.
+def reconcile(app):
+    with app.app_context():
+        try:
+            return assignment_index.rebuild()
+        except Exception:
+            app.logger.exception('Error rebuilding the assignment index')
+            return False
+        finally:
+            db.session.remove()
+
+
+def _reconcile_periodically(app, stop):
+    while not stop.wait(assignment_index.max_age):
+        reconcile(app)
+
+
+# Builds the index at startup and starts the background reconciler; an
+# ASSIGNMENT_REBUILD_SECONDS of 0 turns the reconciler off. A failed startup
+# build (tables not created yet) leaves the first lookup to build it.
+def init_assignment(app):
+    assignment_index.max_age = app.config.get('ASSIGNMENT_REBUILD_SECONDS', 300)
+    reconcile(app)
+    if assignment_index.max_age > 0:
+        stop = threading.Event()
+        threading.Thread(target=_reconcile_periodically, args=(app, stop), name='assignment-reconciler', daemon=True).start()
+        return stop
@@ -0,0 +1,104 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from models import db, Appointment
+from pagination import QueryArgumentError, parse_date
+
+# Office hours enforced by the before_insert_appointments_validation trigger
+WORKDAY_START = time(9, 0)
+WORKDAY_END = time(18, 0)
+# Appointments only store a start time; each one is assumed to take this long
+APPOINTMENT_LENGTH = timedelta(minutes=60)
+
+DEFAULT_DURATION_MINUTES = 60
+MAX_RANGE_DAYS = 92
+MAX_LAWYERS = 100
+
+
+# Reads ?from=&to=&duration= into (from_date, to_date, duration). The range
+# defaults to the next seven days and never starts in the past.
+def parse_availability_args(args):
+    today = date.today()
+    from_date = parse_date(args['from'], 'from') if args.get('from') else today
+    from_date = max(from_date, today)
+    to_date = parse_date(args['to'], 'to') if args.get('to') else from_date + timedelta(days=6)
+    if to_date < from_date:
+        raise QueryArgumentError('to must not be before from')
+    if (to_date - from_date).days >= MAX_RANGE_DAYS:
+        raise QueryArgumentError(f'Date range cannot exceed {MAX_RANGE_DAYS} days')
+
+    try:
+        minutes = int(args.get('duration', DEFAULT_DURATION_MINUTES))
+    except ValueError:
+        raise QueryArgumentError('duration must be a number of minutes')
+    workday_minutes = _minutes(WORKDAY_END) - _minutes(WORKDAY_START)
+    if not 1 <= minutes <= workday_minutes:
+        raise QueryArgumentError(f'duration must be between 1 and {workday_minutes} minutes')
+    return from_date, to_date, timedelta(minutes=minutes)
+
+
+# What the free slots depend on besides the bookings, for the ETag: the
+# resolved date range and, during today's office hours, the current minute,
+# as slots earlier today drop out
+def availability_cache_key(args):
+    from_date, to_date, _ = parse_availability_args(args)
+    now = datetime.now()
+    key = f'{from_date}|{to_date}'
+    if from_date <= now.date() <= to_date and WORKDAY_START <= now.time() < WORKDAY_END:
+        key += now.strftime('|%H:%M')
+    return key
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _at(day, value):
+    return datetime.combine(day, value)
+
+
+# Sweep the day's bookings in start order and emit the gaps of at least
+# `duration` inside office hours
+def _free_slots(day, starts, duration, now):
+    cursor = max(_at(day, WORKDAY_START), now)
+    closing = _at(day, WORKDAY_END)
+    slots = []
+    for start in starts:
+        booked_from = _at(day, start)
+        if booked_from - cursor >= duration:
+            slots.append((cursor, booked_from))
+        cursor = max(cursor, booked_from + APPOINTMENT_LENGTH)
+    if closing - cursor >= duration:
+        slots.append((cursor, closing))
+    return [{
+        'date': day.isoformat(),
+        'start': slot_start.strftime('%H:%M:%S'),
+        'end': slot_end.strftime('%H:%M:%S')
+    } for slot_start, slot_end in slots]
+
+
+# Free slots for several lawyers with a single range query. The query only
+# reads (lawyer_id, appointment_date, appointment_time), which the
+# uq_appointments_lawyer_slot index covers. Cancelled appointments still hold
+# their slot in that index, so they count as booked.
+def find_availability(lawyer_ids, from_date, to_date, duration):
+    booked = defaultdict(lambda: defaultdict(list))
+    rows = db.session.query(
+        Appointment.lawyer_id, Appointment.appointment_date, Appointment.appointment_time
+    ).filter(
+        Appointment.lawyer_id.in_(lawyer_ids),
+        Appointment.appointment_date.between(from_date, to_date)
+    ).order_by(Appointment.lawyer_id, Appointment.appointment_date, Appointment.appointment_time)
+    for lawyer_id, appointment_date, appointment_time in rows:
+        booked[lawyer_id][appointment_date].append(appointment_time)
+
+    days = [from_date + timedelta(days=offset) for offset in range((to_date - from_date).days + 1)]
+    # Slots earlier today have already passed
+    now = datetime.now().replace(second=0, microsecond=0)
+    results = []
+    for lawyer_id in lawyer_ids:
+        slots = []
+        for day in days:
+            slots.extend(_free_slots(day, booked[lawyer_id][day], duration, now))
+        results.append({'lawyer_id': lawyer_id, 'free_slots': slots})
+    return results
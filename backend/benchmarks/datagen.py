@@ -0,0 +1,277 @@
+# Synthetic data for benchmarks. Fills lawyers, clients, cases and
+# appointments with Core executemany inserts, then rebuilds the counters.
+# Run from the backend directory:
+#
+#     python -m benchmarks.datagen --cases 100000
+#     python -m benchmarks.datagen --cases 1000000 --database-url mysql+pymysql://root:@localhost/legal_case_bench
+#
+# SQLite databases are created from the models (with the appointment_details
+# view). A MySQL database must be created from Database/schema.sql first.
+# The same --seed always produces the same rows, relative to today's date.
+import argparse
+import os
+import random
+import time as timer
+from datetime import date, time, timedelta
+from itertools import accumulate
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench.db')
+DEFAULT_DATABASE_URL = 'sqlite:///' + DEFAULT_DATABASE
+
+# Login used by the load harness for the JWT protected routes
+ADMIN_EMAIL = 'bench@example.com'
+ADMIN_PASSWORD = 'benchmark'
+
+SPECIALIZATIONS = (
+    ('Criminal Law', 20), ('Family Law', 18), ('Corporate Law', 15), ('Civil Litigation', 15),
+    ('Real Estate Law', 10), ('Intellectual Property', 8), ('Tax Law', 7), ('Immigration Law', 7)
+)
+CASE_STATUS_WEIGHTS = (
+    ('Open', 35), ('In Progress', 30), ('Under Review', 12), ('Awaiting Judgment', 5), ('Closed', 18)
+)
+APPOINTMENT_STATUS_WEIGHTS = (('Scheduled', 80), ('Completed', 12), ('Cancelled', 8))
+CASE_SUBJECTS = (
+    'contract dispute', 'custody hearing', 'property boundary', 'employment termination',
+    'insurance claim', 'patent infringement', 'tax assessment', 'visa appeal', 'personal injury',
+    'lease violation', 'divorce settlement', 'fraud allegation', 'merger review', 'debt recovery'
+)
+CASE_DETAILS = (
+    'Client disputes the terms agreed in the original agreement.',
+    'Opposing counsel requested additional discovery documents.',
+    'Hearing scheduled pending review of submitted evidence.',
+    'Settlement negotiations are ongoing between both parties.',
+    'Witness statements collected and filed with the court.',
+    'Awaiting expert testimony on damages and liability.'
+)
+FIRST_NAMES = ('James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'Priya', 'Arjun', 'Wei', 'Fatima', 'Carlos', 'Sofia', 'Kenji', 'Aisha')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Pai',
+              'Sharma', 'Chen', 'Khan', 'Lopez', 'Rossi', 'Tanaka', 'Okafor', 'Novak', 'Silva')
+
+OPENING_HOUR = 9
+CLOSING_HOUR = 18
+BOOKING_DAYS = 180
+CHUNK_SIZE = 10000
+
+
+def _weighted(choices):
+    values = [value for value, _ in choices]
+    weights = list(accumulate(weight for _, weight in choices))
+    return values, weights
+
+
+def _name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _phone(rng):
+    return f'{rng.randint(200, 999)}{rng.randint(1000000, 9999999)}'
+
+
+# Row counts derived from the number of cases: a lawyer carries about fifty
+# cases, a client about three, and each case has two appointments on average
+def scale(cases):
+    return {
+        'lawyers': max(10, cases // 50),
+        'clients': max(20, cases // 3),
+        'cases': cases,
+        'appointments': cases * 2
+    }
+
+
+def generate_lawyers(rng, count):
+    specializations, weights = _weighted(SPECIALIZATIONS)
+    today = date.today()
+    for lawyer_id in range(1, count + 1):
+        experience = min(45, int(rng.expovariate(1 / 10)))
+        age = 25 + experience + rng.randint(0, 10)
+        yield {
+            'lawyer_id': lawyer_id,
+            'name': _name(rng),
+            'email': f'lawyer{lawyer_id}@example.com',
+            'experience_years': experience,
+            'cases_won': int(experience * rng.uniform(2, 8)),
+            'cases_lost': int(experience * rng.uniform(0.5, 3)),
+            'phone': _phone(rng),
+            'address': f'{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} Street',
+            'date_of_birth': today - timedelta(days=age * 365 + rng.randint(0, 364)),
+            'specialization': rng.choices(specializations, cum_weights=weights)[0]
+        }
+
+
+# Case load is skewed: a few senior lawyers carry many cases (Pareto weights)
+def lawyer_picker(rng, lawyers):
+    weights = list(accumulate(rng.paretovariate(1.5) for _ in range(lawyers)))
+    lawyer_ids = range(1, lawyers + 1)
+    return lambda: rng.choices(lawyer_ids, cum_weights=weights)[0]
+
+
+def generate_clients(rng, count, pick_lawyer):
+    for client_id in range(1, count + 1):
+        yield {
+            'client_id': client_id,
+            'name': _name(rng),
+            'email': f'client{client_id}@example.com',
+            'phone': _phone(rng),
+            'address': f'{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} Avenue',
+            'lawyer_id': pick_lawyer()
+        }
+
+
+def generate_cases(rng, count, clients, pick_lawyer, case_index):
+    statuses, weights = _weighted(CASE_STATUS_WEIGHTS)
+    for case_id in range(1, count + 1):
+        subject = rng.choice(CASE_SUBJECTS)
+        status = rng.choices(statuses, cum_weights=weights)[0]
+        client_id = rng.randint(1, clients)
+        lawyer_id = pick_lawyer()
+        if status != 'Closed':
+            case_index.append((case_id, client_id, lawyer_id))
+        yield {
+            'case_id': case_id,
+            'title': f'{subject.title()} #{case_id}',
+            'description': f'{subject.capitalize()}: {rng.choice(CASE_DETAILS)} {rng.choice(CASE_DETAILS)}',
+            'status': status,
+            'client_id': client_id,
+            'lawyer_id': lawyer_id
+        }
+
+
+# Appointments for open cases, on the hour inside office hours over the next
+# BOOKING_DAYS days. Slots already taken by the lawyer are skipped, so the
+# unique slot index never rejects a row.
+def generate_appointments(rng, count, case_index):
+    statuses, weights = _weighted(APPOINTMENT_STATUS_WEIGHTS)
+    today = date.today()
+    taken = set()
+    appointment_id = 0
+    for _ in range(count):
+        case_id, client_id, lawyer_id = rng.choice(case_index)
+        for _ in range(5):
+            slot = (lawyer_id, rng.randint(1, BOOKING_DAYS), rng.randint(OPENING_HOUR, CLOSING_HOUR - 1))
+            if slot not in taken:
+                break
+        else:
+            continue
+        taken.add(slot)
+        appointment_id += 1
+        yield {
+            'appointment_id': appointment_id,
+            'client_id': client_id,
+            'lawyer_id': lawyer_id,
+            'case_id': case_id,
+            'appointment_date': today + timedelta(days=slot[1]),
+            'appointment_time': time(slot[2], 0),
+            'appointment_status': rng.choices(statuses, cum_weights=weights)[0]
+        }
+
+
+def _insert(connection, table, rows):
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            connection.execute(table.insert(), chunk)
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+        inserted += len(chunk)
+    return inserted
+
+
+SQLITE_APPOINTMENT_DETAILS_VIEW = """
+    CREATE VIEW appointment_details AS
+    SELECT a.appointment_id, a.appointment_date, a.appointment_time,
+           l.lawyer_id, l.name AS lawyer_name, l.email AS lawyer_email, l.phone AS lawyer_phone,
+           c.client_id, c.name AS client_name, c.email AS client_email,
+           ca.case_id, ca.title AS case_title, ca.status AS case_status,
+           COALESCE(lc.value, 0) AS number_of_cases
+    FROM appointments a
+    JOIN lawyers l ON a.lawyer_id = l.lawyer_id
+    JOIN clients c ON a.client_id = c.client_id
+    LEFT JOIN cases ca ON a.case_id = ca.case_id
+    LEFT JOIN counters lc ON lc.name = 'lawyer_cases:' || l.lawyer_id
+"""
+
+
+# Creates the tables on SQLite. appointment_details is a view in
+# Database/schema.sql but a table to the models, so it is swapped for the
+# SQLite version of the view.
+def prepare_sqlite(db):
+    from sqlalchemy import inspect, text
+
+    db.create_all()
+    if 'appointment_details' in inspect(db.engine).get_view_names():
+        return
+    db.session.execute(text('DROP TABLE appointment_details'))
+    db.session.execute(text(SQLITE_APPOINTMENT_DETAILS_VIEW))
+    db.session.commit()
+
+
+def load_app(database_url):
+    # config.py reads DATABASE_URL when it is first imported
+    os.environ['DATABASE_URL'] = database_url
+    from app import app
+    return app
+
+
+def generate(app, cases, seed=42):
+    from models import db, Lawyer, Client, Case, Appointment, Admin
+    from counters import reconcile_counters
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    counts = scale(cases)
+    timings = {}
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            prepare_sqlite(db)
+        if db.session.query(Lawyer.lawyer_id).first() is not None:
+            raise SystemExit('The benchmark database already has data; use a fresh database or --reset')
+
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'sqlite':
+                # Bulk load only: no fsync per commit
+                connection.exec_driver_sql('PRAGMA synchronous = OFF')
+            pick_lawyer = lawyer_picker(rng, counts['lawyers'])
+            case_index = []
+            steps = (
+                ('lawyers', Lawyer, lambda: generate_lawyers(rng, counts['lawyers'])),
+                ('clients', Client, lambda: generate_clients(rng, counts['clients'], pick_lawyer)),
+                ('cases', Case, lambda: generate_cases(rng, counts['cases'], counts['clients'], pick_lawyer, case_index)),
+                ('appointments', Appointment, lambda: generate_appointments(rng, counts['appointments'], case_index)),
+            )
+            for name, model, rows in steps:
+                started = timer.perf_counter()
+                counts[name] = _insert(connection, model.__table__, rows())
+                timings[name] = round(timer.perf_counter() - started, 3)
+                print(f'{name:<13} {counts[name]:>9} rows in {timings[name]:.1f}s')
+
+        if not Admin.query.filter_by(email=ADMIN_EMAIL).first():
+            db.session.add(Admin(name='Benchmark', email=ADMIN_EMAIL, password=generate_password_hash(ADMIN_PASSWORD)))
+            db.session.commit()
+
+        # Core inserts bypass the session events, so rebuild every counter once
+        started = timer.perf_counter()
+        reconcile_counters()
+        timings['counters'] = round(timer.perf_counter() - started, 3)
+    return {'counts': counts, 'seconds': timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill a benchmark database with synthetic data')
+    parser.add_argument('--cases', type=int, default=10000, help='number of cases (10^3 to 10^6)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL', DEFAULT_DATABASE_URL))
+    parser.add_argument('--reset', action='store_true', help='delete the default SQLite database first')
+    args = parser.parse_args()
+
+    if args.reset and args.database_url == DEFAULT_DATABASE_URL and os.path.exists(DEFAULT_DATABASE):
+        os.remove(DEFAULT_DATABASE)
+    generate(load_app(args.database_url), args.cases, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# Load harness: drives the API routes with concurrent clients and reports
+# p50/p95/p99 latency and throughput per route. Run from the backend
+# directory after filling a database with benchmarks.datagen:
+#
+#     python -m benchmarks.load --clients 8 --requests 200 --output results.json
+#
+# By default the app runs in process against the benchmark database through
+# Flask's test client, so nothing listens on a port and no network is used.
+# --url drives a running server instead. Compare two result files with
+#
+#     python -m benchmarks.load --compare before.json after.json
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time as timer
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.datagen import ADMIN_EMAIL, ADMIN_PASSWORD, DEFAULT_DATABASE_URL, load_app
+
+PAGE = 'limit=50'
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers or {})
+        # Reading the body also drains streamed responses
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self._base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def login(client):
+    status, body = client.request('POST', '/admin/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    if status != 200:
+        raise SystemExit(f'Could not log in as {ADMIN_EMAIL} ({status}); run benchmarks.datagen first')
+    return json.loads(body)['token']
+
+
+# Open cases to book appointments for, read through the API like a client would
+def booking_targets(client):
+    status, body = client.request('GET', '/cases?status=Open&limit=500')
+    if status != 200:
+        raise SystemExit(f'Could not list open cases ({status})')
+    cases = json.loads(body)['data']
+    return [(case['case_id'], case['client_id'], case['lawyer_id']) for case in cases if case['lawyer_id']]
+
+
+# Bookings go two years ahead, past the generated appointments. Collisions
+# between clients are possible and come back as 409.
+def booking_request(rng, targets):
+    case_id, client_id, lawyer_id = rng.choice(targets)
+    day = date.today() + timedelta(days=730 + rng.randint(0, 365))
+    return {
+        'case_id': case_id,
+        'client_id': client_id,
+        'lawyer_id': lawyer_id,
+        'date': day.isoformat(),
+        'time': f'{rng.randint(9, 17):02d}:00:00',
+        'appointment_status': 'Scheduled'
+    }
+
+
+# (name, method, path, needs_token, body_factory)
+def scenarios(targets):
+    routes = [
+        ('GET /lawyers', 'GET', f'/lawyers?{PAGE}', False, None),
+        ('GET /clients', 'GET', f'/clients?{PAGE}', False, None),
+        ('GET /cases', 'GET', f'/cases?{PAGE}', False, None),
+        ('GET /appointments', 'GET', f'/appointments?{PAGE}', False, None),
+        ('GET /all-appointments', 'GET', f'/all-appointments?{PAGE}', False, None),
+        ('GET /dashboard', 'GET', '/dashboard', False, None),
+        ('GET /cases/search', 'GET', '/cases/search?q=contract+dispute', False, None),
+    ]
+    for table in ('lawyers', 'clients', 'cases', 'appointments'):
+        routes.append((f'GET /view/{table}', 'GET', f'/view/{table}', True, None))
+    if targets:
+        routes.append(('POST /appointments', 'POST', '/appointments', False, lambda rng: booking_request(rng, targets)))
+    return routes
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Nearest rank
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(client, scenario, token, concurrency, total, seed):
+    name, method, path, needs_token, body_factory = scenario
+    headers = {'Authorization': f'Bearer {token}'} if needs_token else {}
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    issued = [0]
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        while True:
+            with lock:
+                if issued[0] >= total:
+                    return
+                issued[0] += 1
+            body = body_factory(rng) if body_factory else None
+            started = timer.perf_counter()
+            status, _ = client.request(method, path, body, headers)
+            elapsed = timer.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    started = timer.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    wall = timer.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    return {
+        'route': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3)
+        }
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f'{"route":<26} {"req":>6} {"err":>5} {"rps":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for result in results:
+        latency = result['latency_ms']
+        print(f'{result["route"]:<26} {result["requests"]:>6} {result["errors"]:>5} {result["throughput_rps"]:>9} '
+              f'{latency["p50"]:>9} {latency["p95"]:>9} {latency["p99"]:>9}')
+
+
+# p95 change per route between two result files
+def compare(before_path, after_path):
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before = {result['route']: result for result in json.load(before_file)['results']}
+        after = {result['route']: result for result in json.load(after_file)['results']}
+    print(f'{"route":<26} {"p95 before":>11} {"p95 after":>11} {"change":>8}')
+    for route in sorted(set(before) & set(after)):
+        old, new = before[route]['latency_ms']['p95'], after[route]['latency_ms']['p95']
+        change = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+        print(f'{route:<26} {old:>11} {new:>11} {change:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive the API with concurrent clients')
+    parser.add_argument('--url', help='base URL of a running server; default runs the app in process')
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL', DEFAULT_DATABASE_URL))
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--routes', help='comma separated substrings; only matching routes run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.url:
+        client = HttpClient(args.url)
+    else:
+        client = InProcessClient(load_app(args.database_url))
+
+    token = login(client)
+    _, body = client.request('GET', '/dashboard')
+    dataset = json.loads(body)
+
+    selected = scenarios(booking_targets(client))
+    if args.routes:
+        wanted = args.routes.split(',')
+        selected = [scenario for scenario in selected if any(part in scenario[0] for part in wanted)]
+
+    results = []
+    for scenario in selected:
+        # One untimed request so first-use work (index builds, caches) is not measured
+        name, method, path, needs_token, body_factory = scenario
+        if method == 'GET':
+            client.request(method, path, None, {'Authorization': f'Bearer {token}'} if needs_token else {})
+        results.append(run_scenario(client, scenario, token, args.clients, args.requests, args.seed))
+    print_results(results)
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': timer.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'target': args.url or args.database_url.split('://')[0],
+                'clients': args.clients,
+                'requests_per_route': args.requests,
+                'seed': args.seed,
+                'dataset': {name: dataset.get(name) for name in ('total_lawyers', 'total_clients', 'total_cases', 'total_appointments')}
+            },
+            'results': results
+        }
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
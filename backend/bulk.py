@@ -0,0 +1,205 @@
+import csv
+import io
+from datetime import datetime, time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Case, CASE_STATUSES, APPOINTMENT_STATUSES
+from changes import Change, record_changes
+from counters import transaction_versions
+
+# Rows validated and inserted per transaction
+BULK_CHUNK_SIZE = 1000
+# Per-row errors reported back; the failed count is always complete
+MAX_REPORTED_ERRORS = 1000
+
+OPENING_TIME = time(9, 0)
+CLOSING_TIME = time(18, 0)
+
+
+class BulkInputError(ValueError):
+    pass
+
+
+# Accepts a JSON array, a text/csv request body (read as a stream) or a
+# multipart upload with a "file" field. Returns an iterator of row dicts.
+def read_bulk_rows(request):
+    if request.mimetype == 'text/csv':
+        return csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if not upload:
+            raise BulkInputError('Missing CSV file upload')
+        return csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8', newline=''))
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise BulkInputError('Expected a JSON array of records or a CSV upload')
+    return iter(data)
+
+
+# CSV cells are always strings, so blank cells mean "not provided"
+def _optional(row, key):
+    value = row.get(key)
+    return None if value in (None, '') else value
+
+
+def _required(row, key):
+    value = row[key]
+    if value in (None, ''):
+        raise KeyError(key)
+    return value
+
+
+def parse_client_row(row):
+    lawyer_id = _optional(row, 'lawyer_id')
+    return {
+        'name': _required(row, 'name'),
+        'email': _optional(row, 'email'),
+        'phone': _optional(row, 'phone'),
+        'address': _optional(row, 'address'),
+        'lawyer_id': int(lawyer_id) if lawyer_id is not None else None
+    }
+
+
+def parse_case_row(row):
+    status = _required(row, 'status')
+    if status not in CASE_STATUSES:
+        raise ValueError(f'Invalid status: {status}')
+    return {
+        'title': _required(row, 'title'),
+        'description': _required(row, 'description'),
+        'status': status,
+        'client_id': int(_required(row, 'client_id')),
+        'lawyer_id': int(_required(row, 'lawyer_id'))
+    }
+
+
+def parse_appointment_row(row):
+    appointment_time = datetime.strptime(_required(row, 'time'), '%H:%M:%S').time()
+    if not OPENING_TIME <= appointment_time <= CLOSING_TIME:
+        raise ValueError('Appointment time must be between 9:00 AM and 6:00 PM')
+    status = _optional(row, 'appointment_status') or 'Scheduled'
+    if status not in APPOINTMENT_STATUSES:
+        raise ValueError(f'Invalid appointment status: {status}')
+    return {
+        'client_id': int(_required(row, 'client_id')),
+        'lawyer_id': int(_required(row, 'lawyer_id')),
+        'case_id': int(_required(row, 'case_id')),
+        'appointment_date': datetime.strptime(_required(row, 'date'), '%Y-%m-%d').date(),
+        'appointment_time': appointment_time,
+        'appointment_status': status
+    }
+
+
+# Batch level validation: one query fetches the status of every case the
+# chunk refers to instead of one lookup per appointment.
+def check_appointment_chunk(chunk):
+    case_ids = {values['case_id'] for _, values in chunk}
+    statuses = dict(
+        db.session.query(Case.case_id, Case.status).filter(Case.case_id.in_(case_ids))
+    )
+
+    valid, errors = [], []
+    for row_number, values in chunk:
+        status = statuses.get(values['case_id'])
+        if status is None:
+            errors.append((row_number, 'Case not found'))
+        elif status.lower() == 'closed':
+            errors.append((row_number, 'Appointments cannot be booked for closed cases'))
+        else:
+            valid.append((row_number, values))
+    return valid, errors
+
+
+class BulkResult:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['row'])
+        }
+
+
+# Core inserts bypass the ORM flush hooks, so report them to the change
+# tracking listeners (counters and friends) explicitly
+def _record_inserts(table, rows):
+    record_changes(db.session, [Change(table.name, None, 'insert', values, {}) for values in rows])
+
+
+# The rows' sync version goes into their own INSERT: core inserts return no
+# keys, so they cannot be stamped afterwards like ORM writes
+def _versioned(table, rows):
+    version = transaction_versions(db.session, [table.name])[table.name]
+    return [dict(values, row_version=version) for values in rows]
+
+
+def _insert_chunk(table, chunk, result):
+    # Fast path: one executemany INSERT and one commit for the whole chunk
+    try:
+        rows = [values for _, values in chunk]
+        db.session.execute(insert(table), _versioned(table, rows))
+        _record_inserts(table, rows)
+        db.session.commit()
+        result.inserted += len(chunk)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    # Something in the chunk violated a constraint; retry row by row inside
+    # savepoints to find out which rows, keeping the good ones.
+    inserted = []
+    for row_number, values in chunk:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), _versioned(table, [values]))
+            inserted.append(values)
+        except SQLAlchemyError as e:
+            result.add_error(row_number, str(getattr(e, 'orig', e)))
+    if inserted:
+        _record_inserts(table, inserted)
+    db.session.commit()
+    result.inserted += len(inserted)
+
+
+def bulk_import(table, rows, parse_row, check_chunk=None, chunk_size=BULK_CHUNK_SIZE):
+    result = BulkResult()
+
+    def flush(chunk):
+        if check_chunk:
+            chunk, errors = check_chunk(chunk)
+            for row_number, message in errors:
+                result.add_error(row_number, message)
+        if chunk:
+            _insert_chunk(table, chunk, result)
+
+    chunk = []
+    for row_number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            result.add_error(row_number, 'Expected an object')
+            continue
+        try:
+            chunk.append((row_number, parse_row(row)))
+        except KeyError as e:
+            result.add_error(row_number, f'Missing required field: {str(e)}')
+        except (ValueError, TypeError) as e:
+            result.add_error(row_number, str(e))
+
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    return result
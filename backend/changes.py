@@ -0,0 +1,166 @@
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+
+from models import Lawyer, Client, Case, Appointment
+
+# Tables whose writes are tracked
+TRACKED_MODELS = (Lawyer, Client, Case, Appointment)
+TRACKED_TABLES = tuple(model.__tablename__ for model in TRACKED_MODELS)
+
+# One row level write. row_id is None for Core bulk inserts, where the
+# generated keys are not known. fields holds the new column values (all of
+# them for inserts and deletes, only the changed ones for updates) and
+# previous the old values of changed columns, plus the CONTEXT_COLUMNS of
+# the table when they are loaded.
+Change = namedtuple('Change', ['table', 'row_id', 'operation', 'fields', 'previous'])
+
+# Columns whose value listeners need for every update, changed or not:
+# moving a case to another status has to know whose case it is
+CONTEXT_COLUMNS = {
+    'cases': ('lawyer_id', 'status'),
+}
+
+_before_flush_listeners = []
+_flush_listeners = []
+_before_commit_listeners = []
+_commit_listeners = []
+
+
+# Before flush listeners run before any row is written and may still set
+# column values on the pending objects: fn(session)
+def before_flush(fn):
+    _before_flush_listeners.append(fn)
+    return fn
+
+
+# Flush listeners run inside the writing transaction, so anything they write
+# commits or rolls back together with the change: fn(session, changes)
+def on_flush(fn):
+    _flush_listeners.append(fn)
+    return fn
+
+
+# Before commit listeners run once per transaction, inside it, after its
+# last flush and right before the COMMIT: fn(session, changes) with every
+# change the transaction made. Locks they take are held only until the
+# COMMIT that follows.
+def before_commit(fn):
+    _before_commit_listeners.append(fn)
+    return fn
+
+
+# Commit listeners run once the transaction has committed: fn(changes)
+def on_commit(fn):
+    _commit_listeners.append(fn)
+    return fn
+
+
+# Scratch space of the current transaction, dropped when it ends
+def transaction_info(session):
+    return session.info.setdefault('transaction', {})
+
+
+def _is_tracked(obj):
+    return isinstance(obj, TRACKED_MODELS)
+
+
+def _column_values(obj):
+    state = inspect(obj)
+    return {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
+
+
+def _row_id(obj):
+    return inspect(obj).mapper.primary_key_from_instance(obj)[0]
+
+
+def _before_flush(session, flush_context, instances):
+    # Deleted rows are snapshotted while they still exist, so listeners can
+    # see what was removed even if the instance was expired
+    snapshots = session.info.setdefault('deleted_snapshots', {})
+    for obj in session.deleted:
+        if _is_tracked(obj):
+            snapshots[id(obj)] = _column_values(obj)
+    for listener in _before_flush_listeners:
+        listener(session)
+
+
+def _after_flush(session, flush_context):
+    snapshots = session.info.pop('deleted_snapshots', {})
+    changes = []
+
+    for obj in session.new:
+        if _is_tracked(obj):
+            changes.append(Change(obj.__tablename__, _row_id(obj), 'insert', _column_values(obj), {}))
+
+    for obj in session.dirty:
+        if not _is_tracked(obj) or not session.is_modified(obj, include_collections=False):
+            continue
+        fields, previous = {}, {}
+        context = CONTEXT_COLUMNS.get(obj.__tablename__, ())
+        for attr in inspect(obj).mapper.column_attrs:
+            history = inspect(obj).attrs[attr.key].history
+            if history.added:
+                fields[attr.key] = history.added[0]
+                previous[attr.key] = history.deleted[0] if history.deleted else None
+            elif attr.key in context and history.unchanged:
+                previous[attr.key] = history.unchanged[0]
+        if fields:
+            changes.append(Change(obj.__tablename__, _row_id(obj), 'update', fields, previous))
+
+    for obj in session.deleted:
+        if _is_tracked(obj):
+            fields = snapshots.get(id(obj), {})
+            changes.append(Change(obj.__tablename__, _row_id(obj), 'delete', fields, {}))
+
+    if changes:
+        record_changes(session, changes)
+
+
+# Entry point for writes that bypass the unit of work (Core bulk inserts);
+# also used by the flush hook above.
+def record_changes(session, changes):
+    for listener in _flush_listeners:
+        listener(session, changes)
+    session.info.setdefault('committed_changes', []).extend(changes)
+
+
+def _before_commit(session):
+    # Releasing a savepoint also fires before_commit; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    changes = session.info.get('committed_changes')
+    if not changes:
+        return
+    for listener in _before_commit_listeners:
+        listener(session, changes)
+
+
+def _after_commit(session):
+    # Releasing a savepoint also fires after_commit; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    session.info.pop('transaction', None)
+    changes = session.info.pop('committed_changes', None)
+    if not changes:
+        return
+    for listener in _commit_listeners:
+        listener(changes)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    # Only the outermost rollback discards the pending changes; a failed
+    # savepoint leaves the changes recorded before it intact
+    if previous_transaction.parent is None:
+        session.info.pop('committed_changes', None)
+        session.info.pop('deleted_snapshots', None)
+        session.info.pop('transaction', None)
+
+
+def init_change_tracking(session):
+    event.listen(session, 'before_flush', _before_flush)
+    event.listen(session, 'after_flush', _after_flush)
+    event.listen(session, 'before_commit', _before_commit)
+    event.listen(session, 'after_commit', _after_commit)
+    event.listen(session, 'after_soft_rollback', _after_soft_rollback)
@@ -1,7 +1,42 @@
 import os
 
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://root:@localhost/legal_case_management'  # Replace with your database credentials
+    # Set DATABASE_URL to point at another database
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'mysql+pymysql://root:@localhost/legal_case_management')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool. pool_recycle stays below MySQL's wait_timeout so idle
+    # connections are replaced before the server drops them, and pre_ping
+    # checks each connection on checkout.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)
+    }
+    # Statements slower than this are written to the slow_queries log
+    SLOW_QUERY_THRESHOLD_MS = _env_int('SLOW_QUERY_THRESHOLD_MS', 500)
+    # Threads running background jobs (see jobs.py); CPU bound steps use a
+    # process pool sized by JOB_PROCESSES
+    JOB_WORKERS = _env_int('JOB_WORKERS', 2)
+    # Seconds an admin looked up for a JWT stays cached
+    IDENTITY_CACHE_TTL = _env_int('IDENTITY_CACHE_TTL', 60)
+    # Comma separated read replica URLs; GET requests read from them (see
+    # routing.py). After a write, the client reads from the primary for
+    # REPLICA_STICKY_SECONDS.
+    DATABASE_REPLICA_URLS = os.environ.get('DATABASE_REPLICA_URLS', '')
+    REPLICA_STICKY_SECONDS = _env_int('REPLICA_STICKY_SECONDS', 5)
+    # Seconds between rebuilds of the in-memory lawyer assignment index from
+    # the database (see assignment.py); catches writes of other processes
+    ASSIGNMENT_REBUILD_SECONDS = _env_int('ASSIGNMENT_REBUILD_SECONDS', 300)
     SECRET_KEY = os.urandom(24)  # Secret key for session management
-    JWT_VERIFY_SUB = False
\ No newline at end of file
+    JWT_VERIFY_SUB = False
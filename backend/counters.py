@@ -0,0 +1,233 @@
+from collections import defaultdict
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Counter, Lawyer, Client, Case, Appointment, CASE_STATUSES
+from changes import before_commit, transaction_info, TRACKED_TABLES
+
+TABLE_COUNTERS = {
+    'lawyers': Lawyer,
+    'clients': Client,
+    'cases': Case,
+    'appointments': Appointment
+}
+
+
+def case_status_counter(status):
+    return f'cases:{status}'
+
+
+# Number of cases per lawyer, joined by the appointment_details view
+def lawyer_cases_counter(lawyer_id):
+    return f'lawyer_cases:{lawyer_id}'
+
+
+LAWYER_CASES_PREFIX = lawyer_cases_counter('')
+
+# Bumped once by every transaction writing the table; used to
+# build HTTP ETags and as the row_version of the rows written (see sync.py)
+def version_counter(table):
+    return f'version:{table}'
+
+
+DASHBOARD_COUNTERS = tuple(TABLE_COUNTERS) + tuple(case_status_counter(status) for status in CASE_STATUSES)
+VERSION_COUNTERS = tuple(version_counter(table) for table in TRACKED_TABLES)
+
+
+def _counter_deltas(changes):
+    deltas = defaultdict(int)
+    for change in changes:
+        if change.table not in TABLE_COUNTERS:
+            continue
+        if change.operation in ('insert', 'delete'):
+            step = 1 if change.operation == 'insert' else -1
+            deltas[change.table] += step
+            if change.table == 'cases' and change.fields.get('status'):
+                deltas[case_status_counter(change.fields['status'])] += step
+            if change.table == 'cases' and change.fields.get('lawyer_id'):
+                deltas[lawyer_cases_counter(change.fields['lawyer_id'])] += step
+        elif change.table == 'cases':
+            for field, counter_name in (('status', case_status_counter), ('lawyer_id', lawyer_cases_counter)):
+                if field not in change.fields:
+                    continue
+                if change.previous.get(field):
+                    deltas[counter_name(change.previous[field])] -= 1
+                if change.fields[field]:
+                    deltas[counter_name(change.fields[field])] += 1
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+# INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT DO UPDATE elsewhere): rows
+# take their given value when new and have increment added when another
+# writer created them first, so two first writers cannot collide.
+def _upsert_counters(connection, rows, increment):
+    table = Counter.__table__
+    if connection.dialect.name == 'mysql':
+        statement = mysql.insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(value=table.c.value + increment)
+    else:
+        dialect_insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+        statement = dialect_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(index_elements=[table.c.name], set_={'value': table.c.value + increment})
+    connection.execute(statement)
+
+
+# Moves the version counters of the tables one step forward in a single
+# statement, creating the missing ones, and returns {table: new version}.
+# The counter rows stay locked until the transaction ends, so writers of a
+# table take turns.
+def bump_versions(connection, tables):
+    names = {version_counter(table): table for table in tables}
+    _upsert_counters(connection, [{'name': name, 'value': 1} for name in sorted(names)], literal(1))
+    rows = connection.execute(select(Counter.name, Counter.value).where(Counter.name.in_(names)))
+    return {names[name]: int(value) for name, value in rows}
+
+
+# The version each table written by the transaction is at, bumping those it
+# has not versioned yet. A transaction versions a table once, whatever the
+# number of flushes or statements writing it.
+def transaction_versions(session, tables):
+    versions = transaction_info(session).setdefault('versions', {})
+    missing = set(tables) - set(versions)
+    if missing:
+        versions.update(bump_versions(session.connection(), missing))
+    return versions
+
+
+# Counter rows are written once per transaction, right before it commits, so
+# they are locked from there to the COMMIT rather than from the first flush.
+# Every transaction locks them in the same order, version counters first and
+# then the others, each group sorted by name, so writers cannot deadlock on
+# them: a transaction only ever waits for one that is about to commit.
+@before_commit
+def update_counters(session, changes):
+    connection = session.connection()
+    transaction_versions(session, {change.table for change in changes})
+
+    # Every lawyer owns a case counter row, created and removed with the lawyer
+    added = [change.row_id for change in changes if change.table == 'lawyers' and change.operation == 'insert']
+    removed = [change.row_id for change in changes if change.table == 'lawyers' and change.operation == 'delete']
+    if added:
+        connection.execute(insert(Counter.__table__), [
+            {'name': lawyer_cases_counter(lawyer_id), 'value': 0} for lawyer_id in added
+        ])
+
+    deltas = _counter_deltas(changes)
+    if deltas:
+        names = sorted(deltas)
+        result = connection.execute(
+            update(Counter.__table__)
+            .where(Counter.name.in_(names))
+            .values(value=Counter.value + case(deltas, value=Counter.name))
+        )
+        if result.rowcount < len(names):
+            _insert_missing_counters(connection, deltas)
+
+    if removed:
+        connection.execute(delete(Counter.__table__).where(
+            Counter.name.in_([lawyer_cases_counter(lawyer_id) for lawyer_id in removed])
+        ))
+
+
+# Value a counter should start at when it is first created during a write.
+# Counts are read inside the writing transaction, so they already include
+# the rows it wrote.
+def _initial_value(connection, name):
+    if name in TABLE_COUNTERS:
+        return connection.execute(select(func.count()).select_from(TABLE_COUNTERS[name])).scalar()
+    for status in CASE_STATUSES:
+        if name == case_status_counter(status):
+            return connection.execute(select(func.count()).select_from(Case).where(Case.status == status)).scalar()
+    if name.startswith(LAWYER_CASES_PREFIX):
+        lawyer_id = int(name[len(LAWYER_CASES_PREFIX):])
+        return connection.execute(select(func.count()).select_from(Case).where(Case.lawyer_id == lawyer_id)).scalar()
+    raise ValueError(f'Unknown counter: {name}')
+
+
+# Counters are created by the first write that touches them (or by
+# reconcile_counters), so a fresh database counts from its first write on.
+# A counter another writer created since the lookup gets the delta instead.
+def _insert_missing_counters(connection, deltas):
+    present = set(connection.execute(select(Counter.name).where(Counter.name.in_(deltas))).scalars())
+    missing = sorted(name for name in deltas if name not in present)
+    if missing:
+        _upsert_counters(connection, [
+            {'name': name, 'value': _initial_value(connection, name)} for name in missing
+        ], case(deltas, value=Counter.name))
+
+
+# Dashboard counters via primary key lookups. Returns None when the counters
+# have never been built.
+def read_dashboard_counters():
+    rows = db.session.query(Counter.name, Counter.value).filter(Counter.name.in_(DASHBOARD_COUNTERS))
+    counters = {name: int(value) for name, value in rows}
+    if len(counters) != len(DASHBOARD_COUNTERS):
+        return None
+    return counters
+
+
+# Rebuild the dashboard and per-lawyer counters from the source tables. The
+# counter rows are locked first, so writers wait for the rebuild instead of
+# racing it. Returns the dashboard counters.
+def reconcile_counters():
+    existing = {
+        counter.name: counter
+        for counter in Counter.query.filter(
+            Counter.name.in_(DASHBOARD_COUNTERS) | Counter.name.startswith(LAWYER_CASES_PREFIX)
+        ).with_for_update()
+    }
+
+    counts = {name: db.session.query(func.count()).select_from(model).scalar()
+              for name, model in TABLE_COUNTERS.items()}
+    for status in CASE_STATUSES:
+        counts[case_status_counter(status)] = 0
+    for status, total in db.session.query(Case.status, func.count()).group_by(Case.status):
+        counts[case_status_counter(status)] = total
+    dashboard = dict(counts)
+
+    for (lawyer_id,) in db.session.query(Lawyer.lawyer_id):
+        counts[lawyer_cases_counter(lawyer_id)] = 0
+    lawyer_cases = db.session.query(Case.lawyer_id, func.count()).filter(Case.lawyer_id.isnot(None)).group_by(Case.lawyer_id)
+    for lawyer_id, total in lawyer_cases:
+        counts[lawyer_cases_counter(lawyer_id)] = total
+
+    for name, value in counts.items():
+        if name in existing:
+            existing[name].value = value
+        else:
+            db.session.add(Counter(name=name, value=value))
+    # Counter rows of lawyers that no longer exist
+    for name, counter in existing.items():
+        if name not in counts:
+            db.session.delete(counter)
+    _add_missing_versions()
+    db.session.commit()
+    return dashboard
+
+
+# Versions only ever move forward; create the missing ones but never reset
+def _add_missing_versions():
+    present = {name for (name,) in db.session.query(Counter.name).filter(Counter.name.in_(VERSION_COUNTERS))}
+    for name in VERSION_COUNTERS:
+        if name not in present:
+            db.session.add(Counter(name=name, value=0))
+
+
+def ensure_version_counters():
+    _add_missing_versions()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created them first
+        db.session.rollback()
+
+
+# Version counters of the given tables, or None if any is missing
+def read_versions(tables):
+    names = [version_counter(table) for table in tables]
+    versions = dict(db.session.query(Counter.name, Counter.value).filter(Counter.name.in_(names)))
+    if len(versions) != len(names):
+        return None
+    return [int(versions[name]) for name in names]
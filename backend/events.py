@@ -0,0 +1,200 @@
+import decimal
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+from datetime import date, time
+
+from flask import Response, current_app
+
+from models import db
+from changes import on_commit, TRACKED_TABLES
+from serializers import INTERNAL_COLUMNS
+from projection import APPOINTMENT_PROJECTION
+
+EVENT_STREAM_MIMETYPE = 'text/event-stream'
+# Events kept for clients that reconnect with Last-Event-ID
+HISTORY_SIZE = 1000
+# Events a slow subscriber may fall behind before it is told to reload
+SUBSCRIBER_QUEUE_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+# Fields the list endpoints return from joined rows, per table: (projection,
+# display fields, the foreign keys they follow). Sent with inserts and with
+# updates that change one of those keys, so subscribers merging the event
+# show the names without reloading.
+DISPLAY_FIELDS = {
+    'appointments': (APPOINTMENT_PROJECTION, ('case_title', 'client_name', 'lawyer_name'), {'case_id', 'client_id', 'lawyer_id'}),
+}
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime('%H:%M:%S')
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _format(event_id, event_type, data):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {data}\n\n'
+
+
+class Subscriber:
+    def __init__(self, tables):
+        self.tables = tables
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+# Fans committed changes out to the open /events streams of this process.
+# Each event is encoded once, however many subscribers there are. Writes made
+# by other worker processes are not seen here.
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._history = deque(maxlen=HISTORY_SIZE)
+        self._subscribers = set()
+
+    def publish(self, table, event_type, payload):
+        data = json.dumps(payload, default=_default, separators=(',', ':'))
+        with self._lock:
+            event_id = self._last_id = next(self._ids)
+            event = (event_id, table, _format(event_id, event_type, data))
+            self._history.append(event)
+            for subscriber in self._subscribers:
+                if table not in subscriber.tables or subscriber.overflowed:
+                    continue
+                try:
+                    subscriber.queue.put_nowait(event)
+                except queue.Full:
+                    subscriber.overflowed = True
+
+    # Registers a subscriber and returns it with the events it missed since
+    # last_event_id, or None when they are no longer in the history (or the
+    # id comes from before a restart)
+    def subscribe(self, tables, last_event_id=None):
+        subscriber = Subscriber(tables)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_event_id is None:
+                return subscriber, []
+            if last_event_id > self._last_id or (self._history and self._history[0][0] > last_event_id + 1):
+                return subscriber, None
+            return subscriber, [event for event in self._history if event[0] > last_event_id and event[1] in tables]
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def reset_event(self, table='*'):
+        with self._lock:
+            event_id = self._last_id = next(self._ids)
+        return _format(event_id, 'reset', json.dumps({'table': table}))
+
+
+broker = EventBroker()
+
+
+def _needs_display_fields(change, foreign_keys):
+    if change.row_id is None:
+        return False
+    return change.operation == 'insert' or (change.operation == 'update' and not foreign_keys.isdisjoint(change.fields))
+
+
+# {(table, row_id): display fields} for the changes that need them, one
+# query per table. The transaction is over, so this reads on a connection of
+# its own.
+def _display_fields(changes):
+    results = {}
+    for table, (projection, keys, foreign_keys) in DISPLAY_FIELDS.items():
+        row_ids = [change.row_id for change in changes
+                   if change.table == table and _needs_display_fields(change, foreign_keys)]
+        if not row_ids:
+            continue
+        statement = projection.query((projection.primary_key.key,) + keys).statement
+        with db.engine.connect() as connection:
+            for row in connection.execute(statement.where(projection.primary_key.in_(row_ids))):
+                results[(table, row[0])] = dict(zip(keys, row[1:]))
+    return results
+
+
+# Committed writes become compact change events: inserts carry every column,
+# updates only the changed ones and deletes just the key, plus the
+# DISPLAY_FIELDS of the table. Core bulk inserts have no keys, so they become
+# one reset event per table.
+@on_commit
+def _publish_changes(changes):
+    try:
+        display_fields = _display_fields(changes)
+    except Exception:
+        # Subscribers still get the change, and look the names up themselves
+        current_app.logger.exception('Error loading event display fields')
+        display_fields = {}
+
+    bulk_tables = set()
+    for change in changes:
+        if change.row_id is None:
+            bulk_tables.add(change.table)
+            continue
+        fields = {} if change.operation == 'delete' else {
+            key: value for key, value in change.fields.items() if key not in INTERNAL_COLUMNS
+        }
+        fields.update(display_fields.get((change.table, change.row_id), {}))
+        broker.publish(change.table, 'change', {
+            'table': change.table,
+            'id': change.row_id,
+            'op': change.operation,
+            'fields': fields
+        })
+    for table in bulk_tables:
+        broker.publish(table, 'reset', {'table': table})
+
+
+def parse_tables(value):
+    if not value:
+        return set(TRACKED_TABLES)
+    tables = {table.strip() for table in value.split(',') if table.strip()}
+    unknown = tables - set(TRACKED_TABLES)
+    if unknown:
+        raise ValueError(f'Unknown tables: {", ".join(sorted(unknown))}')
+    return tables
+
+
+# The stream does not keep the request context, so an open connection holds
+# no database session; it does occupy one server thread.
+def event_stream_response(tables, last_event_id=None):
+    subscriber, missed = broker.subscribe(tables, last_event_id)
+
+    def generate():
+        try:
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'
+            if missed is None:
+                # Too far behind to replay; the client reloads instead
+                yield broker.reset_event()
+            else:
+                for _, _, message in missed:
+                    yield message
+            while True:
+                if subscriber.overflowed and subscriber.queue.empty():
+                    # Events were dropped while this client lagged behind
+                    yield broker.reset_event()
+                    return
+                try:
+                    _, _, message = subscriber.queue.get(timeout=HEARTBEAT_SECONDS)
+                    yield message
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype=EVENT_STREAM_MIMETYPE, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,231 @@
+import csv
+import io
+from datetime import date
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from models import db, Lawyer, Client, Case, Appointment
+from pagination import QueryArgumentError, apply_filters, apply_date_range
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; only Parquet exports need it
+    pyarrow = None
+
+# Rows per server-side cursor batch, CSV chunk and Parquet row group
+EXPORT_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+_case_client = aliased(Client)
+_case_lawyer = aliased(Lawyer)
+_appointment_case = aliased(Case)
+_appointment_client = aliased(Client)
+_appointment_lawyer = aliased(Lawyer)
+
+
+# Each export: the columns with their Parquet types, the select they come
+# from, the ?filters= it accepts and the column ?from=&to= applies to (if any).
+# Names are joined in so the files can be read on their own.
+class ExportSpec:
+    def __init__(self, columns, statement, filters, date_column=None):
+        self.columns = columns
+        self.statement = statement
+        self.filters = filters
+        self.date_column = date_column
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.columns]
+
+
+def _spec(columns, build, filters, date_column=None):
+    statement = build(select(*[column.label(name) for name, column, _ in columns]))
+    return ExportSpec(columns, statement, filters, date_column)
+
+
+EXPORTS = {
+    'cases': _spec(
+        [
+            ('case_id', Case.case_id, 'int64'),
+            ('title', Case.title, 'string'),
+            ('description', Case.description, 'string'),
+            ('status', Case.status, 'string'),
+            ('client_id', Case.client_id, 'int64'),
+            ('client_name', _case_client.name, 'string'),
+            ('lawyer_id', Case.lawyer_id, 'int64'),
+            ('lawyer_name', _case_lawyer.name, 'string'),
+        ],
+        lambda statement: statement.select_from(Case)
+        .outerjoin(_case_client, Case.client_id == _case_client.client_id)
+        .outerjoin(_case_lawyer, Case.lawyer_id == _case_lawyer.lawyer_id)
+        .order_by(Case.case_id),
+        {
+            'status': (Case.status, str),
+            'lawyer_id': (Case.lawyer_id, int),
+            'client_id': (Case.client_id, int),
+        }
+    ),
+    'clients': _spec(
+        [
+            ('client_id', Client.client_id, 'int64'),
+            ('name', Client.name, 'string'),
+            ('email', Client.email, 'string'),
+            ('phone', Client.phone, 'string'),
+            ('address', Client.address, 'string'),
+            ('lawyer_id', Client.lawyer_id, 'int64'),
+        ],
+        lambda statement: statement.order_by(Client.client_id),
+        {
+            'lawyer_id': (Client.lawyer_id, int),
+        }
+    ),
+    'appointments': _spec(
+        [
+            ('appointment_id', Appointment.appointment_id, 'int64'),
+            ('appointment_date', Appointment.appointment_date, 'date'),
+            ('appointment_time', Appointment.appointment_time, 'time'),
+            ('appointment_status', Appointment.appointment_status, 'string'),
+            ('case_id', Appointment.case_id, 'int64'),
+            ('case_title', _appointment_case.title, 'string'),
+            ('client_id', Appointment.client_id, 'int64'),
+            ('client_name', _appointment_client.name, 'string'),
+            ('lawyer_id', Appointment.lawyer_id, 'int64'),
+            ('lawyer_name', _appointment_lawyer.name, 'string'),
+        ],
+        lambda statement: statement.select_from(Appointment)
+        .outerjoin(_appointment_case, Appointment.case_id == _appointment_case.case_id)
+        .outerjoin(_appointment_client, Appointment.client_id == _appointment_client.client_id)
+        .outerjoin(_appointment_lawyer, Appointment.lawyer_id == _appointment_lawyer.lawyer_id)
+        .order_by(Appointment.appointment_id),
+        {
+            'status': (Appointment.appointment_status, str),
+            'lawyer_id': (Appointment.lawyer_id, int),
+            'client_id': (Appointment.client_id, int),
+            'case_id': (Appointment.case_id, int),
+        },
+        date_column=Appointment.appointment_date
+    ),
+}
+
+
+FILTER_ARGS = ('status', 'lawyer_id', 'client_id', 'case_id', 'from', 'to')
+
+
+def build_export_query(spec, args):
+    supported = set(spec.filters) | ({'from', 'to'} if spec.date_column is not None else set())
+    unsupported = [name for name in FILTER_ARGS if args.get(name) and name not in supported]
+    if unsupported:
+        raise QueryArgumentError(f'Unsupported filter for this export: {", ".join(unsupported)}')
+    statement = apply_filters(spec.statement, args, spec.filters)
+    if spec.date_column is not None:
+        statement = apply_date_range(statement, args, spec.date_column)
+    return statement
+
+
+# Batches of rows from a server-side cursor: only one batch is in memory
+def _iter_batches(statement, batch_size):
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, 'strftime'):
+        return value.strftime('%H:%M:%S')
+    return value
+
+
+def _generate_csv(spec, statement, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.names)
+    for batch in _iter_batches(statement, batch_size):
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# File object handed to the Parquet writer; what it receives is handed on to
+# the response after every row group instead of being kept.
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(spec):
+    types = {
+        'int64': pyarrow.int64(),
+        'string': pyarrow.string(),
+        'date': pyarrow.date32(),
+        'time': pyarrow.time64('us'),
+    }
+    return pyarrow.schema([(name, types[kind]) for name, _, kind in spec.columns])
+
+
+def _generate_parquet(spec, statement, batch_size):
+    schema = _parquet_schema(spec)
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for batch in _iter_batches(statement, batch_size):
+            columns = list(zip(*batch))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_response(table, args):
+    spec = EXPORTS.get(table)
+    if spec is None:
+        raise QueryArgumentError(f'Unknown export: {table}. Available exports: {", ".join(EXPORTS)}')
+    export_format = args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise QueryArgumentError(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+    if export_format == 'parquet' and pyarrow is None:
+        raise QueryArgumentError('Parquet export is not available: install pyarrow')
+
+    statement = build_export_query(spec, args)
+    filename = f'{table}-{date.today().isoformat()}.{export_format}'
+    if export_format == 'csv':
+        body, mimetype = _generate_csv(spec, statement, EXPORT_BATCH_SIZE), 'text/csv'
+    else:
+        body, mimetype = _generate_parquet(spec, statement, EXPORT_BATCH_SIZE), 'application/vnd.apache.parquet'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
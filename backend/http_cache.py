@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+
+from counters import read_versions, ensure_version_counters
+from changes import TRACKED_TABLES
+from pagination import QueryArgumentError
+
+ALL_TABLES = TRACKED_TABLES
+
+
+# Conditional GET for read endpoints. The ETag is derived from the version
+# counters of the tables the response is built from, so a matching
+# If-None-Match is answered with 304 after a single primary key read and the
+# view never runs. Versions are bumped by every write (see counters.py).
+#
+# Responses that also depend on the clock (default date ranges, slots that
+# pass) pass vary(args), returning what else the body depends on; it is
+# added to the tag. Arguments it rejects are left to the view to report.
+def etag_cached(*tables, vary=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            # Read the versions before the data: a write landing in between
+            # yields new data under the old tag, which only costs a refetch
+            versions = read_versions(tables)
+            if versions is None:
+                ensure_version_counters()
+                return view(*args, **kwargs)
+
+            try:
+                extra = vary(request.args) if vary else ''
+            except QueryArgumentError:
+                return view(*args, **kwargs)
+
+            key = f"{versions}|{request.full_path}|{request.headers.get('Accept', '')}|{extra}"
+            etag = hashlib.sha1(key.encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            # JSON and NDJSON bodies share a URL and get different tags
+            response.vary.add('Accept')
+            # Let browsers keep the body but revalidate before every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+
+from models import db, Appointment, Case, Client
+from pagination import QueryArgumentError, parse_date
+from availability import APPOINTMENT_LENGTH
+
+ICALENDAR_MIMETYPE = 'text/calendar'
+PRODUCT_ID = '-//Legal Case Management//Appointments//EN'
+# Events per server-side cursor batch and per response chunk
+CALENDAR_BATCH_SIZE = 500
+
+# Without ?from=&to= a feed covers the last month and the coming year
+DEFAULT_DAYS_BEFORE = 30
+DEFAULT_DAYS_AFTER = 365
+MAX_RANGE_DAYS = 731
+
+EVENT_STATUSES = {
+    'Scheduled': 'CONFIRMED',
+    'Completed': 'CONFIRMED',
+    'Cancelled': 'CANCELLED'
+}
+
+
+def parse_calendar_range(args):
+    today = date.today()
+    from_date = parse_date(args['from'], 'from') if args.get('from') else today - timedelta(days=DEFAULT_DAYS_BEFORE)
+    to_date = parse_date(args['to'], 'to') if args.get('to') else today + timedelta(days=DEFAULT_DAYS_AFTER)
+    if to_date < from_date:
+        raise QueryArgumentError('to must not be before from')
+    if (to_date - from_date).days >= MAX_RANGE_DAYS:
+        raise QueryArgumentError(f'Date range cannot exceed {MAX_RANGE_DAYS} days')
+    return from_date, to_date
+
+
+# The default range moves with the date, so the resolved range goes into
+# the ETag (see etag_cached)
+def calendar_cache_key(args):
+    from_date, to_date = parse_calendar_range(args)
+    return f'{from_date}|{to_date}'
+
+
+def _escape(value):
+    return (value or '').replace('\r', '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+# RFC 5545 lines are at most 75 octets; longer ones continue on lines
+# starting with a space. Never splits a UTF-8 sequence.
+def _fold(line):
+    if len(line.encode()) <= 75:
+        return line + '\r\n'
+    parts, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = '', 0
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _timestamp(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def _event(row, stamp):
+    start = datetime.combine(row.appointment_date, row.appointment_time)
+    summary = f'Appointment with {row.client_name}' if row.client_name else 'Appointment'
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:appointment-{row.appointment_id}@legal-case-management',
+        f'DTSTAMP:{stamp}',
+        # Floating times: appointments are stored in the office's local time
+        f'DTSTART:{_timestamp(start)}',
+        f'DTEND:{_timestamp(start + APPOINTMENT_LENGTH)}',
+        f'SUMMARY:{_escape(summary)}',
+        f'STATUS:{EVENT_STATUSES.get(row.appointment_status, "CONFIRMED")}',
+    ]
+    if row.case_title:
+        lines.append(f'DESCRIPTION:{_escape("Case: " + row.case_title)}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+# The lawyer's appointments in the range, in start order. The lawyer and date
+# range filter is a prefix of the uq_appointments_lawyer_slot index, which
+# also returns the rows already sorted.
+def calendar_query(lawyer_id, from_date, to_date):
+    return (
+        select(
+            Appointment.appointment_id,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.appointment_status,
+            Case.title.label('case_title'),
+            Client.name.label('client_name')
+        )
+        .select_from(Appointment)
+        .outerjoin(Case, Appointment.case_id == Case.case_id)
+        .outerjoin(Client, Appointment.client_id == Client.client_id)
+        .where(Appointment.lawyer_id == lawyer_id, Appointment.appointment_date.between(from_date, to_date))
+        .order_by(Appointment.appointment_date, Appointment.appointment_time)
+    )
+
+
+def calendar_response(lawyer, from_date, to_date):
+    statement = calendar_query(lawyer.lawyer_id, from_date, to_date)
+    calendar_name = _escape(f'{lawyer.name} appointments')
+
+    def generate():
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        yield ''.join(_fold(line) for line in (
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            f'PRODID:{PRODUCT_ID}',
+            'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{calendar_name}',
+        ))
+        result = db.session.execute(statement.execution_options(yield_per=CALENDAR_BATCH_SIZE))
+        for batch in result.partitions():
+            yield ''.join(_event(row, stamp) for row in batch)
+        yield 'END:VCALENDAR\r\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=ICALENDAR_MIMETYPE,
+        headers={'Content-Disposition': f'inline; filename=lawyer-{lawyer.lawyer_id}.ics'}
+    )
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import namedtuple
+
+from models import db, Admin
+
+# What JWT protected routes need to know about the caller. A plain snapshot
+# rather than an ORM instance, so it can be shared between requests.
+AdminIdentity = namedtuple('AdminIdentity', ['admin_id', 'name', 'email'])
+
+MAX_ENTRIES = 10000
+
+
+# admin_id -> AdminIdentity with a time to live. Entries are dropped when
+# the admin changes in this process; other processes see the change when
+# their entry expires.
+class IdentityCache:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, admin_id):
+        with self._lock:
+            entry = self._entries.get(admin_id)
+            if entry is None:
+                return None
+            expires, identity = entry
+            if expires < time.monotonic():
+                del self._entries[admin_id]
+                return None
+            return identity
+
+    def put(self, identity):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= MAX_ENTRIES:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+                if len(self._entries) >= MAX_ENTRIES:
+                    self._entries.clear()
+            self._entries[identity.admin_id] = (now + self.ttl, identity)
+
+    def invalidate(self, admin_id):
+        with self._lock:
+            self._entries.pop(admin_id, None)
+
+
+identity_cache = IdentityCache()
+
+
+# Resolves the admin of a token; None when the admin no longer exists. Missing
+# admins are not cached, so a new admin with the same id is found at once.
+def load_identity(admin_id):
+    try:
+        admin_id = int(admin_id)
+    except (TypeError, ValueError):
+        return None
+    identity = identity_cache.get(admin_id)
+    if identity is not None:
+        return identity
+
+    row = db.session.query(Admin.admin_id, Admin.name, Admin.email).filter(Admin.admin_id == admin_id).first()
+    if row is None:
+        return None
+    identity = AdminIdentity(*row)
+    identity_cache.put(identity)
+    return identity
+
+
+def init_identity_cache(app, jwt):
+    identity_cache.ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+
+    @jwt.user_lookup_loader
+    def user_lookup(jwt_header, jwt_data):
+        return load_identity(jwt_data[app.config.get('JWT_IDENTITY_CLAIM', 'sub')])
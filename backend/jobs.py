@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from sqlalchemy import bindparam, update
+from werkzeug.security import generate_password_hash
+
+from models import db, Admin, Job
+from counters import reconcile_counters
+from sync import prune_tombstones, TOMBSTONE_RETENTION_DAYS
+from assignment import assignment_index
+
+CHUNK_SIZE = 500
+
+JOB_HANDLERS = {}
+
+
+class JobError(ValueError):
+    pass
+
+
+# Register a handler under a job name. Handlers are called as
+# handler(context, **params) inside an application context and return a
+# JSON serializable result.
+def job(name):
+    def register(handler):
+        JOB_HANDLERS[name] = handler
+        return handler
+    return register
+
+
+# Passed to handlers to report progress. checkpoint() commits whatever the
+# handler has changed so far together with the progress, so every chunk of
+# work is its own transaction and the progress never runs ahead of the data.
+class JobContext:
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def checkpoint(self, progress, total=None):
+        values = {'progress': progress}
+        if total is not None:
+            values['total'] = total
+        db.session.query(Job).filter(Job.job_id == self.job_id).update(values, synchronize_session=False)
+        db.session.commit()
+
+
+_lock = threading.Lock()
+_threads = None
+_processes = None
+
+
+# Jobs run on a small thread pool. CPU bound work inside a job goes to
+# process_pool(), which is started on first use. Spawned workers do not
+# inherit the threads, locks or database connections of this process.
+def _thread_pool(app):
+    global _threads
+    with _lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=app.config.get('JOB_WORKERS', 2), thread_name_prefix='job')
+        return _threads
+
+
+def process_pool():
+    global _processes
+    with _lock:
+        if _processes is None:
+            _processes = ProcessPoolExecutor(
+                max_workers=int(os.environ.get('JOB_PROCESSES', os.cpu_count() or 1)),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _processes
+
+
+# A worker died; the next process_pool() call starts a fresh pool
+def _discard_process_pool():
+    global _processes
+    with _lock:
+        if _processes is not None:
+            _processes.shutdown(wait=False, cancel_futures=True)
+            _processes = None
+
+
+def submit_job(app, name, params=None):
+    handler = JOB_HANDLERS.get(name)
+    if handler is None:
+        raise JobError(f'Unknown job: {name}. Available jobs: {", ".join(sorted(JOB_HANDLERS))}')
+    params = params or {}
+    if not isinstance(params, dict):
+        raise JobError('params must be an object')
+
+    new_job = Job(name=name, params=params, status='queued')
+    db.session.add(new_job)
+    db.session.commit()
+    _thread_pool(app).submit(_run_job, app, new_job.job_id, handler, params)
+    return new_job
+
+
+def _run_job(app, job_id, handler, params):
+    with app.app_context():
+        try:
+            db.session.query(Job).filter(Job.job_id == job_id).update(
+                {'status': 'running', 'started_at': datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+
+            result = handler(JobContext(job_id), **params)
+            db.session.commit()
+            _finish(job_id, status='succeeded', result=result)
+        except Exception as e:
+            app.logger.exception('Job %s failed', job_id)
+            if isinstance(e, BrokenProcessPool):
+                _discard_process_pool()
+            db.session.rollback()
+            _finish(job_id, status='failed', error=str(e))
+        finally:
+            db.session.remove()
+
+
+def _finish(job_id, **values):
+    db.session.query(Job).filter(Job.job_id == job_id).update(
+        dict(values, finished_at=datetime.utcnow()), synchronize_session=False
+    )
+    db.session.commit()
+
+
+# Werkzeug hashes look like 'scrypt:32768:8:1$salt$hash'
+def is_password_hash(value):
+    method = value.split('$', 1)[0] if value.count('$') >= 2 else ''
+    return method.split(':', 1)[0] in ('scrypt', 'pbkdf2')
+
+
+_admin = Admin.__table__
+_REHASH = update(_admin).where(
+    _admin.c.admin_id == bindparam('row_id'),
+    _admin.c.password == bindparam('old_password')
+).values(password=bindparam('new_password'))
+
+
+# Hash admin passwords that are still stored in plain text (such as the
+# sample admin in Database/schema.sql). Hashing runs in the process pool and
+# every chunk is committed on its own.
+@job('rehash_passwords')
+def rehash_passwords(context, chunk_size=CHUNK_SIZE):
+    admins = [(admin_id, password) for admin_id, password in db.session.query(Admin.admin_id, Admin.password)
+              if not is_password_hash(password)]
+    context.checkpoint(0, total=len(admins))
+
+    pool = process_pool()
+    for start in range(0, len(admins), chunk_size):
+        chunk = admins[start:start + chunk_size]
+        hashes = pool.map(generate_password_hash, [password for _, password in chunk])
+        # Only replace passwords that were not changed while hashing
+        db.session.execute(_REHASH, [
+            {'row_id': admin_id, 'old_password': password, 'new_password': hashed}
+            for (admin_id, password), hashed in zip(chunk, hashes)
+        ])
+        context.checkpoint(start + len(chunk))
+    return {'rehashed': len(admins)}
+
+
+@job('reconcile_counters')
+def reconcile_counters_job(context):
+    return {'dashboard': reconcile_counters()}
+
+
+@job('prune_tombstones')
+def prune_tombstones_job(context, days=TOMBSTONE_RETENTION_DAYS):
+    return {'removed': prune_tombstones(days)}
+
+
+@job('rebuild_assignment_index')
+def rebuild_assignment_index_job(context):
+    return {'rebuilt': assignment_index.rebuild()}
@@ -0,0 +1,188 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_log = logging.getLogger('slow_queries')
+
+# Upper bounds in seconds, Prometheus defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {self.total}')
+        lines.append(f'{name}_count{_labels(labels)} {self.count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+# Process wide registry. Every update takes one short lock, so recording a
+# request costs a few dictionary operations.
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._request_latency = {}
+        self._request_statements = {}
+        self._request_sql_seconds = {}
+        self._responses = {}
+        self._statement_latency = Histogram(LATENCY_BUCKETS)
+        self._slow_queries = 0
+
+    def record_request(self, endpoint, method, status, seconds, statements, sql_seconds):
+        key = (('endpoint', endpoint), ('method', method))
+        with self._lock:
+            if key not in self._request_latency:
+                self._request_latency[key] = Histogram(LATENCY_BUCKETS)
+                self._request_statements[key] = Histogram(STATEMENT_BUCKETS)
+                self._request_sql_seconds[key] = 0.0
+            self._request_latency[key].observe(seconds)
+            self._request_statements[key].observe(statements)
+            self._request_sql_seconds[key] += sql_seconds
+            response_key = key + (('status', status),)
+            self._responses[response_key] = self._responses.get(response_key, 0) + 1
+
+    def record_statement(self, seconds, slow):
+        with self._lock:
+            self._statement_latency.observe(seconds)
+            if slow:
+                self._slow_queries += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Responses by endpoint, method and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for labels, count in sorted(self._responses.items()):
+                lines.append(f'http_requests_total{_labels(labels)} {count}')
+
+            lines.append('# HELP http_request_duration_seconds Time spent in the request handler.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for labels, histogram in sorted(self._request_latency.items()):
+                lines.extend(histogram.render('http_request_duration_seconds', labels))
+
+            lines.append('# HELP http_request_sql_statements SQL statements issued per request.')
+            lines.append('# TYPE http_request_sql_statements histogram')
+            for labels, histogram in sorted(self._request_statements.items()):
+                lines.extend(histogram.render('http_request_sql_statements', labels))
+
+            lines.append('# HELP http_request_sql_seconds_total Time spent executing SQL per endpoint.')
+            lines.append('# TYPE http_request_sql_seconds_total counter')
+            for labels, seconds in sorted(self._request_sql_seconds.items()):
+                lines.append(f'http_request_sql_seconds_total{_labels(labels)} {seconds}')
+
+            lines.append('# HELP db_statement_duration_seconds Execution time of each SQL statement.')
+            lines.append('# TYPE db_statement_duration_seconds histogram')
+            lines.extend(self._statement_latency.render('db_statement_duration_seconds', ()))
+
+            lines.append('# HELP db_slow_queries_total Statements slower than the slow query threshold.')
+            lines.append('# TYPE db_slow_queries_total counter')
+            lines.append(f'db_slow_queries_total {self._slow_queries}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# SQL totals of the request being handled on this thread
+_request_state = threading.local()
+slow_query_seconds = 0.5
+
+
+# The start time is kept on the statement's execution context rather than
+# on the pooled connection: a statement that raises never reaches
+# after_cursor_execute, and its context is dropped with it.
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    slow = elapsed >= slow_query_seconds
+    registry.record_statement(elapsed, slow)
+
+    if getattr(_request_state, 'active', False):
+        _request_state.statements += 1
+        _request_state.sql_seconds += elapsed
+    if slow:
+        endpoint = request.path if getattr(_request_state, 'active', False) else '-'
+        # Parameters are left out so the log never carries personal data
+        slow_query_log.warning('slow query %.1fms (%s): %s', elapsed * 1000, endpoint, ' '.join(statement.split()))
+
+
+def _start_request():
+    _request_state.active = True
+    _request_state.started = time.perf_counter()
+    _request_state.statements = 0
+    _request_state.sql_seconds = 0.0
+    _request_state.status = 500
+
+
+def _set_status(response):
+    _request_state.status = response.status_code
+    return response
+
+
+# Runs after the response is built, also when the handler raised. Streamed
+# bodies are still being generated at this point and are only partly counted.
+def _finish_request(error):
+    if not getattr(_request_state, 'active', False):
+        return
+    _request_state.active = False
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    registry.record_request(
+        endpoint,
+        request.method,
+        _request_state.status,
+        time.perf_counter() - _request_state.started,
+        _request_state.statements,
+        _request_state.sql_seconds
+    )
+
+
+def metrics_response():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    global slow_query_seconds
+    slow_query_seconds = app.config.get('SLOW_QUERY_THRESHOLD_MS', 500) / 1000
+    app.before_request(_start_request)
+    app.after_request(_set_status)
+    app.teardown_request(_finish_request)
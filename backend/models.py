@@ -1,8 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from routing import RoutingSession
 
-db = SQLAlchemy()
+# Reads of GET requests may go to a replica; see routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+CASE_STATUSES = ('Open', 'In Progress', 'Closed', 'Under Review', 'Awaiting Judgment')
+# Cases still taking up a lawyer's time
+ACTIVE_CASE_STATUSES = ('Open', 'In Progress', 'Under Review', 'Awaiting Judgment')
+APPOINTMENT_STATUSES = ('Scheduled', 'Completed', 'Cancelled')
 
 class Admin(db.Model):
     __tablename__ = 'admin'
@@ -29,6 +36,7 @@ class Lawyer(db.Model):
     address = db.Column(db.String(255), nullable=True)
     date_of_birth = db.Column(db.Date, nullable=False)
     specialization = db.Column(db.String(100), nullable=False)
+    row_version = db.Column(db.BigInteger, index=True)
 
     def __repr__(self):
         return f"<Lawyer {self.name}>"
@@ -42,6 +50,7 @@ class Client(db.Model):
     phone = db.Column(db.String(15))
     address = db.Column(db.Text)
     lawyer_id = db.Column(db.Integer, db.ForeignKey('lawyers.lawyer_id'))
+    row_version = db.Column(db.BigInteger, index=True)
 
     lawyer = db.relationship('Lawyer', backref=db.backref('clients', lazy=True))
 
@@ -50,13 +59,20 @@ class Client(db.Model):
 
 class Case(db.Model):
     __tablename__ = 'cases'
+    __table_args__ = (
+        # Backs GET /cases/search on MySQL (see search.py)
+        db.Index('ft_cases_title_description', 'title', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Per-lawyer caseload by status (analytics.py) from the index alone
+        db.Index('idx_cases_lawyer_status', 'lawyer_id', 'status'),
+    )
 
     case_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    status = db.Column(db.Enum('Open', 'In Progress', 'Closed', 'Under Review', 'Awaiting Judgment', name='case_status'), nullable=False)
+    status = db.Column(db.Enum(*CASE_STATUSES, name='case_status'), nullable=False, index=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.client_id'))
     lawyer_id = db.Column(db.Integer, db.ForeignKey('lawyers.lawyer_id'))
+    row_version = db.Column(db.BigInteger, index=True)
 
     client = db.relationship('Client', backref=db.backref('cases', lazy=True))
     lawyer = db.relationship('Lawyer', backref=db.backref('cases', lazy=True))
@@ -64,16 +80,31 @@ class Case(db.Model):
     def __repr__(self):
         return f"<Case {self.case_id}: {self.title} (Client: {self.client_id})>"
 
+# A lawyer can only hold one appointment per date and time slot. Enforced by a
+# unique index so concurrent bookings cannot both succeed. The same
+# (lawyer_id, appointment_date, appointment_time) index serves a lawyer's
+# calendar range queries (?lawyer_id=&from=&to=, calendar.ics, availability).
+SLOT_CONSTRAINT = 'uq_appointments_lawyer_slot'
+
+def is_slot_conflict(error):
+    message = str(getattr(error, 'orig', error))
+    # MySQL names the key, SQLite lists the indexed columns
+    return SLOT_CONSTRAINT in message or 'appointments.lawyer_id, appointments.appointment_date' in message
+
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        db.UniqueConstraint('lawyer_id', 'appointment_date', 'appointment_time', name=SLOT_CONSTRAINT),
+    )
 
     appointment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.client_id', ondelete="CASCADE"), nullable=False)
     lawyer_id = db.Column(db.Integer, db.ForeignKey('lawyers.lawyer_id', ondelete="CASCADE"), nullable=False)
     case_id = db.Column(db.Integer, db.ForeignKey('cases.case_id', ondelete="CASCADE"), nullable=True)
-    appointment_date = db.Column(db.Date, nullable=False)
+    appointment_date = db.Column(db.Date, nullable=False, index=True)
     appointment_time = db.Column(db.Time, nullable=False)
-    appointment_status = db.Column(db.Enum('Scheduled', 'Completed', 'Cancelled', name='appointment_status'), default='Scheduled')
+    appointment_status = db.Column(db.Enum(*APPOINTMENT_STATUSES, name='appointment_status'), default='Scheduled')
+    row_version = db.Column(db.BigInteger, index=True)
 
     client = db.relationship('Client', backref='appointments', lazy=True)
     lawyer = db.relationship('Lawyer', backref='appointments', lazy=True)
@@ -82,6 +113,55 @@ class Appointment(db.Model):
     def __repr__(self):
         return f'<Appointment {self.appointment_id}>'
 
+# Named counters maintained in the same transaction as the writes they count
+# (see counters.py), so reads do not need COUNT(*) scans
+class Counter(db.Model):
+    __tablename__ = 'counters'
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Counter {self.name}={self.value}>'
+
+# Left behind by deleted lawyers, clients, cases and appointments, so delta
+# sync clients learn about deletes (see sync.py)
+class Tombstone(db.Model):
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('idx_tombstones_table_version', 'table_name', 'row_version'),
+    )
+
+    tombstone_id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    row_version = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<Tombstone {self.table_name}:{self.row_id}>'
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+# Background maintenance job; see jobs.py
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+    params = db.Column(db.JSON)
+    status = db.Column(db.Enum(*JOB_STATUSES, name='job_status'), nullable=False, default='queued', index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.job_id} {self.name} {self.status}>'
+
 # Define a model for the view
 class AppointmentDetails(db.Model):
     __tablename__ = 'appointment_details'
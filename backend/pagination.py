@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class QueryArgumentError(ValueError):
+    pass
+
+
+# Cursors are opaque to the client: a base64 wrapped JSON object holding the
+# last primary key of the previous page.
+def encode_cursor(last_id):
+    payload = json.dumps({'after': last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload['after'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise QueryArgumentError('Invalid cursor')
+
+
+def parse_limit(args):
+    raw = args.get('limit')
+    if raw in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise QueryArgumentError('limit must be an integer')
+    if limit < 1:
+        raise QueryArgumentError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise QueryArgumentError(f'Invalid {name} date. Use YYYY-MM-DD')
+
+
+# Paging is opt-in so existing callers that expect the full list keep working
+def is_paginated(args):
+    return 'limit' in args or 'after' in args
+
+
+# filters maps a query string argument to (column, converter); every filter
+# becomes a WHERE clause so the database does the work, not the handler.
+def apply_filters(query, args, filters):
+    for name, (column, convert) in filters.items():
+        value = args.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            value = convert(value)
+        except ValueError:
+            raise QueryArgumentError(f'Invalid value for {name}')
+        query = query.filter(column == value)
+    return query
+
+
+# Inclusive from/to range on a date column
+def apply_date_range(query, args, column):
+    if args.get('from'):
+        query = query.filter(column >= parse_date(args['from'], 'from'))
+    if args.get('to'):
+        query = query.filter(column <= parse_date(args['to'], 'to'))
+    return query
+
+
+# Keyset pagination on the primary key: WHERE pk > :after ORDER BY pk LIMIT n.
+# One extra row is fetched to know whether a next page exists.
+def keyset_page(query, pk_column, args):
+    query = query.order_by(pk_column)
+    if not is_paginated(args):
+        return query.all(), None
+
+    limit = parse_limit(args)
+    if args.get('after'):
+        query = query.filter(pk_column > decode_cursor(args['after']))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], pk_column.key))
+    return rows, next_cursor
+
+
+def page_payload(items, next_cursor, args):
+    if not is_paginated(args):
+        return items
+    return {'data': items, 'next_cursor': next_cursor}
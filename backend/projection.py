@@ -0,0 +1,97 @@
+from functools import lru_cache
+
+from models import db, Lawyer, Client, Case, Appointment, AppointmentDetails
+from pagination import QueryArgumentError
+from serializers import compile_serializer, iso_date, hms_time, INTERNAL_COLUMNS
+
+
+# Sparse fieldsets: ?fields=title,status selects just those columns in SQL
+# and serializes the resulting rows, instead of loading whole ORM objects and
+# dropping keys afterwards. The primary key is always included, for paging
+# and for clients merging rows.
+#
+# fields maps each key to (column, converter, join); join names an entry of
+# joins, (target, onclause), outer joined only when one of its fields is
+# requested.
+class Projection:
+    def __init__(self, model, fields, joins=None):
+        self.model = model
+        self.primary_key = model.__mapper__.primary_key[0]
+        self.fields = fields
+        self.joins = joins or {}
+
+    @classmethod
+    def for_model(cls, model, exclude=(), converters=None):
+        converters = converters or {}
+        return cls(model, {
+            column.key: (getattr(model, column.key), converters.get(column.key), None)
+            for column in model.__mapper__.column_attrs
+            if column.key not in exclude and column.key not in INTERNAL_COLUMNS
+        })
+
+    # The requested keys, primary key first, or None without ?fields=
+    def parse(self, args):
+        raw = args.get('fields')
+        if raw in (None, ''):
+            return None
+        keys = [key.strip() for key in raw.split(',') if key.strip()]
+        unknown = [key for key in keys if key not in self.fields]
+        if unknown:
+            raise QueryArgumentError(
+                f'Unknown fields: {", ".join(unknown)}. Available fields: {", ".join(self.fields)}'
+            )
+        return tuple(dict.fromkeys([self.primary_key.key] + keys))
+
+    def query(self, selected):
+        query = db.session.query(*[self.fields[key][0].label(key) for key in selected]).select_from(self.model)
+        for name in dict.fromkeys(self.fields[key][2] for key in selected if self.fields[key][2]):
+            target, onclause = self.joins[name]
+            query = query.outerjoin(target, onclause)
+        return query
+
+    def serializer(self, selected):
+        return _compile(self, selected)
+
+    # (query, serializer) for the request: the projection when ?fields= is
+    # given, otherwise the endpoint's own full query and serializer
+    def select(self, args, default_query, default_serializer):
+        selected = self.parse(args)
+        if selected is None:
+            return default_query, default_serializer
+        return self.query(selected), self.serializer(selected)
+
+
+@lru_cache(maxsize=256)
+def _compile(projection, selected):
+    return compile_serializer(
+        [(key, key, projection.fields[key][1]) for key in selected],
+        name=f'serialize_{projection.model.__tablename__}_fields'
+    )
+
+
+LAWYER_PROJECTION = Projection.for_model(Lawyer)
+LAWYER_PROFILE_PROJECTION = Projection.for_model(Lawyer, exclude=('specialization',))
+CLIENT_PROJECTION = Projection.for_model(Client)
+CASE_PROJECTION = Projection.for_model(Case)
+APPOINTMENT_DETAILS_PROJECTION = Projection.for_model(AppointmentDetails, converters={'appointment_time': str})
+
+APPOINTMENT_PROJECTION = Projection(
+    Appointment,
+    {
+        'appointment_id': (Appointment.appointment_id, None, None),
+        'client_id': (Appointment.client_id, None, None),
+        'lawyer_id': (Appointment.lawyer_id, None, None),
+        'case_id': (Appointment.case_id, None, None),
+        'case_title': (Case.title, None, 'case'),
+        'appointment_date': (Appointment.appointment_date, iso_date, None),
+        'appointment_time': (Appointment.appointment_time, hms_time, None),
+        'appointment_status': (Appointment.appointment_status, None, None),
+        'client_name': (Client.name, None, 'client'),
+        'lawyer_name': (Lawyer.name, None, 'lawyer'),
+    },
+    joins={
+        'case': (Case, Appointment.case_id == Case.case_id),
+        'client': (Client, Appointment.client_id == Client.client_id),
+        'lawyer': (Lawyer, Appointment.lawyer_id == Lawyer.lawyer_id),
+    }
+)
@@ -0,0 +1,162 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+from models import db, Appointment, APPOINTMENT_STATUSES
+from availability import WORKDAY_START, WORKDAY_END, APPOINTMENT_LENGTH
+
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+# Two years of weekly check-ins
+MAX_OCCURRENCES = 104
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+def _positive_int(data, key, default=None):
+    value = data.get(key, default)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RecurrenceError(f'{key} must be an integer')
+    if value < 1:
+        raise RecurrenceError(f'{key} must be positive')
+    return value
+
+
+def _parse_date(value, key):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise RecurrenceError(f'Invalid {key}. Use YYYY-MM-DD')
+
+
+def _months_later(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    if day.day > calendar.monthrange(year, month)[1]:
+        # Like RRULE, months without that day (the 31st, Feb 30th) are skipped
+        return None
+    return day.replace(year=year, month=month)
+
+
+# Occurrence dates from start_date on: every `interval` days, weeks (on the
+# given weekdays, default the weekday of start_date) or months (same day of
+# the month). Stops after `count` occurrences or at `until`, whichever comes
+# first.
+def expand_dates(start_date, frequency, interval=1, count=None, until=None, weekdays=None):
+    if count is None and until is None:
+        raise RecurrenceError('Either count or until is required')
+    limit = min(count or MAX_OCCURRENCES + 1, MAX_OCCURRENCES + 1)
+
+    dates = []
+    step = 0
+    while len(dates) < limit:
+        if frequency == 'daily':
+            candidates = [start_date + timedelta(days=step * interval)]
+        elif frequency == 'weekly':
+            week_start = start_date - timedelta(days=start_date.weekday()) + timedelta(weeks=step * interval)
+            candidates = [week_start + timedelta(days=weekday) for weekday in sorted(weekdays or [start_date.weekday()])]
+            candidates = [day for day in candidates if day >= start_date]
+        else:
+            day = _months_later(start_date, step * interval)
+            candidates = [day] if day is not None else []
+        step += 1
+
+        first = next(iter(candidates), None)
+        if until is not None and first is not None and first > until:
+            break
+        for day in candidates:
+            if (until is None or day <= until) and len(dates) < limit:
+                dates.append(day)
+
+    if len(dates) > MAX_OCCURRENCES:
+        raise RecurrenceError(f'A series can have at most {MAX_OCCURRENCES} occurrences')
+    return dates
+
+
+# Reads a POST /appointments/recurring body into the appointment fields shared
+# by every occurrence and the list of occurrence dates
+def parse_recurring_request(data):
+    try:
+        values = {
+            'client_id': int(data['client_id']),
+            'lawyer_id': int(data['lawyer_id']),
+            'case_id': int(data['case_id']),
+            'appointment_time': datetime.strptime(data['time'], '%H:%M:%S').time(),
+            'appointment_status': data.get('appointment_status', 'Scheduled')
+        }
+        start_date = _parse_date(data['start_date'], 'start_date')
+        frequency = data['frequency']
+    except KeyError as e:
+        raise RecurrenceError(f'Missing required field: {str(e)}')
+    except (TypeError, ValueError):
+        raise RecurrenceError('client_id, lawyer_id and case_id must be integers and time HH:MM:SS')
+
+    if values['appointment_status'] not in APPOINTMENT_STATUSES:
+        raise RecurrenceError(f"Invalid appointment status: {values['appointment_status']}")
+    # Same window as the before_insert_appointments_validation trigger; every
+    # occurrence shares the time, so one check covers the series
+    if not WORKDAY_START <= values['appointment_time'] <= WORKDAY_END:
+        raise RecurrenceError('Appointment time must be between 9:00 AM and 6:00 PM')
+    # The trigger also rejects past dates, which would fail the whole series
+    if start_date < date.today():
+        raise RecurrenceError('Appointment date cannot be in the past')
+    if frequency not in FREQUENCIES:
+        raise RecurrenceError(f'frequency must be one of: {", ".join(FREQUENCIES)}')
+
+    weekdays = data.get('weekdays')
+    if weekdays is not None:
+        if frequency != 'weekly':
+            raise RecurrenceError('weekdays only applies to weekly series')
+        if not isinstance(weekdays, list) or not weekdays or any(day not in WEEKDAYS for day in weekdays):
+            raise RecurrenceError(f'weekdays must be a list of: {", ".join(WEEKDAYS)}')
+        weekdays = {WEEKDAYS.index(day) for day in weekdays}
+
+    until = _parse_date(data['until'], 'until') if data.get('until') else None
+    if until is not None and until < start_date:
+        raise RecurrenceError('until must not be before start_date')
+
+    dates = expand_dates(
+        start_date,
+        frequency,
+        interval=_positive_int(data, 'interval', 1),
+        count=_positive_int(data, 'count'),
+        until=until,
+        weekdays=weekdays
+    )
+    return values, dates
+
+
+# Checks every occurrence against the lawyer's bookings with one range query
+# on the uq_appointments_lawyer_slot index. Appointments are assumed to take
+# APPOINTMENT_LENGTH, so overlapping starts conflict too, not just the exact
+# slot the unique index rejects. Returns {date: conflicting appointment}.
+def find_conflicts(lawyer_id, dates, appointment_time):
+    if not dates:
+        return {}
+    rows = db.session.query(
+        Appointment.appointment_id, Appointment.appointment_date, Appointment.appointment_time
+    ).filter(
+        Appointment.lawyer_id == lawyer_id,
+        Appointment.appointment_date.between(min(dates), max(dates))
+    )
+
+    wanted = set(dates)
+    conflicts = {}
+    for appointment_id, appointment_date, booked_time in rows:
+        if appointment_date not in wanted or appointment_date in conflicts:
+            continue
+        start = datetime.combine(appointment_date, appointment_time)
+        booked = datetime.combine(appointment_date, booked_time)
+        if abs(start - booked) < APPOINTMENT_LENGTH:
+            conflicts[appointment_date] = {
+                'date': appointment_date.isoformat(),
+                'time': appointment_time.strftime('%H:%M:%S'),
+                'conflicts_with': appointment_id,
+                'booked_time': booked_time.strftime('%H:%M:%S')
+            }
+    return conflicts
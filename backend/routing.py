@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.elements import TextClause
+
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_COOKIE = 'db_primary_until'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+MAX_TRACKED_WRITERS = 10000
+
+# Client key -> wall clock time until which its reads go to the primary
+_recent_writers = {}
+_writers_lock = threading.Lock()
+
+
+# SQLALCHEMY_BINDS entries for the comma separated DATABASE_REPLICA_URLS.
+# Replicas share the pool settings of SQLALCHEMY_ENGINE_OPTIONS.
+def replica_binds(urls):
+    binds = {}
+    for index, url in enumerate(value.strip() for value in (urls or '').split(',')):
+        if url:
+            binds[f'{REPLICA_BIND_PREFIX}{index}'] = url
+    return binds
+
+
+# Bind keys of the configured replicas
+def replica_keys(app):
+    return sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_BIND_PREFIX))
+
+
+def _is_read(clause):
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == 'SELECT'
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+# Session that sends the reads of a GET request to the replica picked for
+# that request. Everything else goes to the primary: writes, flushes, locking
+# reads, work outside requests (CLI, jobs), and every read after the session
+# has written, so a request always sees its own uncommitted changes.
+class RoutingSession(Session):
+    _pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._pinned_to_primary:
+            if self._flushing or (clause is not None and not _is_read(clause)):
+                self._pinned_to_primary = True
+            else:
+                replica = g.get('db_replica') if has_app_context() else None
+                if replica is not None and clause is not None:
+                    return self._db.engines[replica]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Clients are told apart by their Authorization header, or their address
+# for anonymous calls
+def _client_key():
+    return request.headers.get('Authorization') or request.remote_addr
+
+
+def _sticky(now):
+    with _writers_lock:
+        if now < _recent_writers.get(_client_key(), 0):
+            return True
+    try:
+        return now < float(request.cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+
+
+def _remember_writer(until):
+    with _writers_lock:
+        if len(_recent_writers) >= MAX_TRACKED_WRITERS:
+            now = time.time()
+            for key in [key for key, value in _recent_writers.items() if value <= now]:
+                del _recent_writers[key]
+        _recent_writers[_client_key()] = until
+
+
+# Read-your-writes: after a successful write request, that client's reads go
+# to the primary for REPLICA_STICKY_SECONDS. The window is kept in this
+# process and in a cookie, so cookie aware clients also get it from other
+# workers.
+def init_read_routing(app):
+    replicas = replica_keys(app)
+    if not replicas:
+        return
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.before_request
+    def choose_database():
+        if request.method in READ_METHODS and not _sticky(time.time()):
+            g.db_replica = random.choice(replicas)
+
+    @app.after_request
+    def remember_write(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            until = time.time() + sticky_seconds
+            _remember_writer(until)
+            response.set_cookie(STICKY_COOKIE, f'{until:.3f}', max_age=int(sticky_seconds) + 1, httponly=True, samesite='Lax')
+        return response
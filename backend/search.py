@@ -0,0 +1,190 @@
+import heapq
+import html
+import math
+import re
+import threading
+from collections import Counter as TermCounter
+
+from sqlalchemy import text
+
+from models import db, Case
+from changes import on_commit
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Matches in the title count more than matches in the description
+TITLE_WEIGHT = 2
+SNIPPET_RADIUS = 60
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(value):
+    return [token.lower() for token in TOKEN_RE.findall(value or '')]
+
+
+# Cut a window of the description around the first query term and wrap every
+# term occurrence in <mark>. The text is HTML escaped.
+def highlight(value, terms):
+    value = value or ''
+    if not terms:
+        return html.escape(value[:2 * SNIPPET_RADIUS])
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\b', re.IGNORECASE)
+
+    match = pattern.search(value)
+    start = max(0, match.start() - SNIPPET_RADIUS) if match else 0
+    end = min(len(value), start + 2 * SNIPPET_RADIUS + (match.end() - match.start() if match else 0))
+
+    pieces = []
+    position = start
+    for found in pattern.finditer(value, start, end):
+        pieces.append(html.escape(value[position:found.start()]))
+        pieces.append('<mark>' + html.escape(found.group(0)) + '</mark>')
+        position = found.end()
+    pieces.append(html.escape(value[position:end]))
+
+    snippet = ''.join(pieces)
+    if start > 0:
+        snippet = '...' + snippet
+    if end < len(value):
+        snippet = snippet + '...'
+    return snippet
+
+
+# MySQL path: ranked natural language search on the
+# ft_cases_title_description FULLTEXT index.
+def _mysql_search(query, limit, offset):
+    rows = db.session.execute(text("""
+        SELECT case_id, MATCH(title, description) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score
+        FROM cases
+        WHERE MATCH(title, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+        ORDER BY score DESC, case_id ASC
+        LIMIT :limit OFFSET :offset
+    """), {'q': query, 'limit': limit, 'offset': offset})
+    return [(row.case_id, float(row.score)) for row in rows]
+
+
+# In-process inverted index with BM25 ranking, used where the database has no
+# full-text support (SQLite for tests and local runs). It is built from the
+# cases table on first use and then kept current from committed changes of
+# this process; writes made by other processes are not seen until restart.
+class InvertedIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._max_id = 0
+        # Cases to reload from the database before the next search
+        self._stale_ids = set()
+        self._scan_tail = False
+
+    def _add(self, case_id, title, description):
+        self._remove(case_id)
+        self._max_id = max(self._max_id, case_id)
+        terms = TermCounter()
+        for token in tokenize(title):
+            terms[token] += TITLE_WEIGHT
+        terms.update(tokenize(description))
+
+        self._doc_terms[case_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[case_id] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[case_id] = frequency
+
+    def _remove(self, case_id):
+        terms = self._doc_terms.pop(case_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(case_id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(case_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _build(self):
+        rows = db.session.query(Case.case_id, Case.title, Case.description).yield_per(1000)
+        for case_id, title, description in rows:
+            self._add(case_id, title, description)
+        self._built = True
+
+    def _refresh(self):
+        if self._stale_ids:
+            found = set()
+            rows = db.session.query(Case.case_id, Case.title, Case.description).filter(Case.case_id.in_(self._stale_ids))
+            for case_id, title, description in rows:
+                self._add(case_id, title, description)
+                found.add(case_id)
+            for case_id in self._stale_ids - found:
+                self._remove(case_id)
+            self._stale_ids = set()
+        if self._scan_tail:
+            rows = db.session.query(Case.case_id, Case.title, Case.description).filter(Case.case_id > self._max_id)
+            for case_id, title, description in rows.yield_per(1000):
+                self._add(case_id, title, description)
+            self._scan_tail = False
+
+    def apply(self, changes):
+        with self._lock:
+            if not self._built:
+                return
+            for change in changes:
+                if change.table != 'cases':
+                    continue
+                if change.row_id is None:
+                    # Bulk inserts carry no keys, but they get new, higher ones
+                    self._scan_tail = True
+                elif change.operation == 'delete':
+                    self._remove(change.row_id)
+                elif change.operation == 'insert':
+                    self._add(change.row_id, change.fields.get('title'), change.fields.get('description'))
+                elif 'title' in change.fields or 'description' in change.fields:
+                    # Updates only carry the changed columns; reload the row
+                    self._stale_ids.add(change.row_id)
+
+    def search(self, query, limit, offset):
+        terms = set(tokenize(query))
+        with self._lock:
+            if not self._built:
+                self._build()
+            else:
+                self._refresh()
+            documents = len(self._doc_lengths)
+            if not documents or not terms:
+                return []
+            average_length = self._total_length / documents
+
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                for case_id, frequency in postings.items():
+                    norm = K1 * (1 - B + B * self._doc_lengths[case_id] / average_length)
+                    scores[case_id] = scores.get(case_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+
+        ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:]
+
+
+_inverted_index = InvertedIndex()
+
+
+@on_commit
+def _update_inverted_index(changes):
+    _inverted_index.apply(changes)
+
+
+# Returns [(case_id, score)] for one page of results, best match first
+def search_case_ids(query, limit, offset):
+    if db.session.get_bind().dialect.name == 'mysql':
+        return _mysql_search(query, limit, offset)
+    return _inverted_index.search(query, limit, offset)
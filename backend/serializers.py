@@ -0,0 +1,96 @@
+from models import Lawyer, Client, Case, AppointmentDetails, Job
+
+
+def iso_date(value):
+    return value.isoformat() if value is not None else None
+
+
+def hms_time(value):
+    return value.strftime('%H:%M:%S') if value is not None else None
+
+
+# Builds a row-to-dict function once per model or query shape. Each field is
+# a key, a (key, source) pair or a (key, source, converter) triple. source is
+# an attribute name or a dotted path through a relationship ('case.title'),
+# which yields None when the relationship is empty. Works for ORM instances
+# and for Row objects from Core queries.
+#
+# The function body is generated as straight-line Python, so serializing a
+# row costs one dict literal instead of a loop over fields and type checks.
+def compile_serializer(fields, name='serialize'):
+    namespace = {}
+    entries = []
+    for position, field in enumerate(fields):
+        if isinstance(field, str):
+            field = (field,)
+        key, source, converter = (tuple(field) + (None, None))[:3]
+        source = source or key
+
+        expression = _source_expression(source)
+        if converter is not None:
+            converter_name = f'_convert_{position}'
+            namespace[converter_name] = converter
+            expression = f'{converter_name}({expression})'
+        entries.append(f'        {key!r}: {expression},')
+
+    source_code = f'def {name}(obj):\n    return {{\n' + '\n'.join(entries) + '\n    }\n'
+    exec(compile(source_code, f'<serializer {name}>', 'exec'), namespace)
+    serializer = namespace[name]
+    serializer.fields = tuple(field if isinstance(field, str) else field[0] for field in fields)
+    return serializer
+
+
+def _source_expression(source):
+    parts = source.split('.')
+    for part in parts:
+        if not part.isidentifier():
+            raise ValueError(f'Invalid serializer source: {source}')
+    if len(parts) == 1:
+        return f'obj.{source}'
+    parent = 'obj.' + '.'.join(parts[:-1])
+    return f'({parent}.{parts[-1]} if {parent} is not None else None)'
+
+
+# Bookkeeping columns that are not part of the API representation
+INTERNAL_COLUMNS = ('row_version',)
+
+
+# Serializer for every column of a model; converters maps column keys to
+# converter functions
+def model_serializer(model, exclude=(), converters=None):
+    converters = converters or {}
+    fields = [
+        (column.key, column.key, converters.get(column.key))
+        for column in model.__mapper__.column_attrs
+        if column.key not in exclude and column.key not in INTERNAL_COLUMNS
+    ]
+    return compile_serializer(fields, name=f'serialize_{model.__tablename__}')
+
+
+serialize_lawyer = model_serializer(Lawyer)
+serialize_lawyer_profile = model_serializer(Lawyer, exclude=('specialization',))
+serialize_client = model_serializer(Client)
+serialize_case = model_serializer(Case)
+serialize_case_with_names = compile_serializer(
+    serialize_case.fields + (('client_name', 'client.name'), ('lawyer_name', 'lawyer.name')),
+    name='serialize_case_with_names'
+)
+
+serialize_appointment = compile_serializer([
+    'appointment_id',
+    'client_id',
+    'lawyer_id',
+    'case_id',
+    ('case_title', 'case.title'),
+    ('appointment_date', 'appointment_date', iso_date),
+    ('appointment_time', 'appointment_time', hms_time),
+    'appointment_status',
+    ('client_name', 'client.name'),
+    ('lawyer_name', 'lawyer.name'),
+], name='serialize_appointment')
+
+serialize_appointment_details = model_serializer(AppointmentDetails, converters={'appointment_time': str})
+
+serialize_job = model_serializer(Job, converters={
+    'created_at': iso_date, 'started_at': iso_date, 'finished_at': iso_date
+})
@@ -0,0 +1,36 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Rows fetched per round trip from the server-side cursor
+STREAM_BATCH_SIZE = 1000
+
+
+# Streaming is opt-in through ?stream=1 or an Accept header that prefers NDJSON
+def wants_ndjson():
+    if request.args.get('stream') == '1':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+# Yield query rows in batches from a server-side cursor (yield_per turns on
+# stream_results), so only one batch is held in memory at a time.
+def iter_rows(query, batch_size=STREAM_BATCH_SIZE):
+    return query.yield_per(batch_size)
+
+
+def ndjson_response(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    dumps = current_app.json.dumps
+
+    def generate():
+        lines = []
+        for row in iter_rows(query, batch_size):
+            lines.append(dumps(serialize(row)))
+            if len(lines) >= batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
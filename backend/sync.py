@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, update
+
+from models import db, Counter, Tombstone
+from changes import before_commit, TRACKED_MODELS
+from counters import read_versions, transaction_versions
+from pagination import QueryArgumentError
+
+# Header carrying the sync token of a full list response; keep the one from
+# the first page of a paged load
+SYNC_TOKEN_HEADER = 'X-Sync-Token'
+# A delta with more changes than this is not worth sending; the client
+# reloads the full list instead
+MAX_DELTA_ROWS = 5000
+TOMBSTONE_RETENTION_DAYS = 30
+
+# Arguments a delta request cannot be combined with: a filtered delta would
+# not tell the client about rows that moved out of the filter
+DELTA_EXCLUSIVE_ARGS = ('limit', 'after', 'stream', 'from', 'to')
+
+_MODELS = {model.__tablename__: model for model in TRACKED_MODELS}
+
+
+class SyncTokenExpired(Exception):
+    pass
+
+
+# Highest tombstone version pruned per table; tokens older than that cannot
+# be answered with a delta
+def tombstones_pruned_counter(table):
+    return f'tombstones_pruned:{table}'
+
+
+def encode_sync_token(table, version):
+    payload = json.dumps({'table': table, 'version': version}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_sync_token(token, table):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        version = int(payload['version'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise QueryArgumentError('Invalid since token')
+    if payload.get('table') != table:
+        raise QueryArgumentError(f'since token does not belong to {table}')
+    return version
+
+
+# Every row a transaction writes carries the version its table's counter
+# reached in that transaction (see update_counters in counters.py), stamped
+# right before the COMMIT with one UPDATE per table. Core bulk inserts have
+# no keys to stamp by and write the version with the rows instead (bulk.py). Writers of a table
+# serialize on the counter row from there until they commit, so versions
+# become visible in commit order and "row_version > token" never skips a row
+# committed late. Deletes leave a tombstone at the same version.
+@before_commit
+def stamp_row_versions(session, changes):
+    changes = [change for change in changes if change.table in _MODELS]
+    versions = transaction_versions(session, {change.table for change in changes})
+    connection = session.connection()
+
+    written = defaultdict(set)
+    for change in changes:
+        if change.operation != 'delete':
+            written[change.table].add(change.row_id)
+    for table in sorted(written):
+        row_ids = written[table] - {None}
+        if row_ids:
+            model = _MODELS[table]
+            condition = model.__mapper__.primary_key[0].in_(sorted(row_ids))
+            connection.execute(update(model.__table__).where(condition).values(row_version=versions[table]))
+
+    deleted_at = datetime.utcnow()
+    tombstones = [
+        {'table_name': change.table, 'row_id': change.row_id, 'row_version': versions[change.table], 'deleted_at': deleted_at}
+        for change in changes if change.operation == 'delete'
+    ]
+    if tombstones:
+        connection.execute(insert(Tombstone.__table__), tombstones)
+
+
+# Token for the current state of the table, or None before the version
+# counters exist. Read before the rows it describes: a write landing in
+# between is sent again with the next delta, never lost.
+def current_sync_token(table):
+    versions = read_versions([table])
+    if versions is None:
+        return None
+    return encode_sync_token(table, versions[0])
+
+
+def with_sync_token(response, token):
+    if token is not None:
+        response.headers[SYNC_TOKEN_HEADER] = token
+    return response
+
+
+def is_delta_request(args):
+    return 'since' in args
+
+
+# ?since=<token>: the rows of the table written after the token and the ids
+# deleted since, with the token to send next time.
+# { data: [...], deleted: [ids], since: token }
+def delta_payload(model, query, serialize, args, filters=()):
+    table = model.__tablename__
+    combined = [name for name in tuple(filters) + DELTA_EXCLUSIVE_ARGS if args.get(name)]
+    if combined:
+        raise QueryArgumentError(f'since cannot be combined with: {", ".join(combined)}')
+    since = decode_sync_token(args['since'], table)
+
+    versions = read_versions([table])
+    if versions is None:
+        raise SyncTokenExpired('Changes are not tracked yet; reload the full list')
+    pruned = db.session.query(Counter.value).filter(Counter.name == tombstones_pruned_counter(table)).scalar()
+    # Tokens from after the current version come from another database (or
+    # one restored from a backup)
+    if (pruned is not None and since < pruned) or since > versions[0]:
+        raise SyncTokenExpired('since token has expired; reload the full list')
+
+    primary_key = model.__mapper__.primary_key[0]
+    rows = query.filter(model.row_version > since).order_by(primary_key).limit(MAX_DELTA_ROWS + 1).all()
+    deleted = [
+        row_id for (row_id,) in db.session.query(Tombstone.row_id)
+        .filter(Tombstone.table_name == table, Tombstone.row_version > since)
+        .order_by(Tombstone.row_id)
+        .limit(MAX_DELTA_ROWS + 1)
+    ]
+    if len(rows) + len(deleted) > MAX_DELTA_ROWS:
+        raise SyncTokenExpired('Too many changes since this token; reload the full list')
+
+    return {'data': [serialize(row) for row in rows], 'deleted': deleted, 'since': encode_sync_token(table, versions[0])}
+
+
+# Drops tombstones older than the retention period and remembers the newest
+# version dropped per table, so clients holding older tokens reload instead
+# of missing deletes. Returns the number of tombstones removed per table.
+def prune_tombstones(days=TOMBSTONE_RETENTION_DAYS):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    expired = (
+        db.session.query(Tombstone.table_name, func.max(Tombstone.row_version))
+        .filter(Tombstone.deleted_at < cutoff)
+        .group_by(Tombstone.table_name)
+        .all()
+    )
+
+    removed = {}
+    for table, version in expired:
+        name = tombstones_pruned_counter(table)
+        counter = db.session.query(Counter).filter(Counter.name == name).with_for_update().first()
+        if counter is None:
+            db.session.add(Counter(name=name, value=version))
+        elif counter.value < version:
+            counter.value = version
+        removed[table] = db.session.query(Tombstone).filter(
+            Tombstone.table_name == table, Tombstone.row_version <= version
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
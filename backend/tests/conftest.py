@@ -0,0 +1,119 @@
+import os
+import sys
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SQLite stand-in for the MySQL appointment_details view (Database/schema.sql)
+APPOINTMENT_DETAILS_VIEW = """
+CREATE VIEW appointment_details AS
+SELECT a.appointment_id, a.appointment_date, a.appointment_time,
+       l.lawyer_id, l.name AS lawyer_name, l.email AS lawyer_email, l.phone AS lawyer_phone,
+       c.client_id, c.name AS client_name, c.email AS client_email,
+       ca.case_id, ca.title AS case_title, ca.status AS case_status,
+       COALESCE(lc.value, 0) AS number_of_cases
+FROM appointments a
+JOIN lawyers l ON a.lawyer_id = l.lawyer_id
+JOIN clients c ON a.client_id = c.client_id
+LEFT JOIN cases ca ON a.case_id = ca.case_id
+LEFT JOIN counters lc ON lc.name = 'lawyer_cases:' || l.lawyer_id
+"""
+
+SPECIALIZATIONS = ('Family Law', 'Criminal Law')
+CASE_STATUS_CYCLE = ('Open', 'In Progress', 'Closed', 'Under Review')
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + str(tmp_path_factory.mktemp('db') / 'test.db')
+    import app as backend
+    backend.app.config['TESTING'] = True
+    backend.app.config['JWT_SECRET_KEY'] = 'test-only-jwt-secret-of-32-bytes'
+    return backend.app
+
+
+# Empty schema per test, with the counter rows in place as at startup
+@pytest.fixture
+def db(app):
+    import analytics
+    import search
+    from models import db
+    from counters import reconcile_counters
+    from assignment import assignment_index
+
+    with app.app_context():
+        db.session.execute(text('DROP VIEW IF EXISTS appointment_details'))
+        db.session.commit()
+        db.drop_all()
+        db.create_all()
+        db.session.execute(text('DROP TABLE appointment_details'))
+        db.session.execute(text(APPOINTMENT_DETAILS_VIEW))
+        db.session.commit()
+        reconcile_counters()
+        # Process level caches would otherwise outlive the tables they describe
+        analytics._cached = None
+        assignment_index.invalidate()
+        search._inverted_index = search.InvertedIndex()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app, db):
+    from flask_jwt_extended import create_access_token
+    from models import Admin
+
+    admin = Admin(name='Admin', email='admin@example.com', password='x')
+    db.session.add(admin)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(admin.admin_id))}'}
+
+
+# Adds lawyers, each with one client, and spreads the cases and appointments
+# over them; appointments are booked on distinct future slots
+def _seed(db, lawyers=2, cases=4, appointments=4):
+    from models import Lawyer, Client, Case, Appointment
+
+    # Seeding more than once adds further lawyers with unique emails
+    offset = Lawyer.query.count()
+    lawyer_rows = [
+        Lawyer(name=f'Lawyer {i}', email=f'lawyer{i}@example.com', experience_years=5 + i,
+               cases_won=3 + i, cases_lost=1, phone='555-0100', address='1 Main St',
+               date_of_birth=date(1980, 1, 1), specialization=SPECIALIZATIONS[i % 2])
+        for i in range(offset, offset + lawyers)
+    ]
+    db.session.add_all(lawyer_rows)
+    db.session.flush()
+    client_rows = [Client(name=f'Client {i}', email=f'client{i}@example.com', phone='555-0200',
+                          lawyer_id=lawyer.lawyer_id) for i, lawyer in enumerate(lawyer_rows)]
+    db.session.add_all(client_rows)
+    db.session.flush()
+    case_rows = [
+        Case(title=f'Case {i}', description=f'Contract dispute {i}', status=CASE_STATUS_CYCLE[i % 4],
+             client_id=client_rows[i % lawyers].client_id, lawyer_id=lawyer_rows[i % lawyers].lawyer_id)
+        for i in range(cases)
+    ]
+    db.session.add_all(case_rows)
+    db.session.flush()
+    first_day = date.today() + timedelta(days=30)
+    db.session.add_all([
+        Appointment(client_id=client_rows[i % lawyers].client_id, lawyer_id=lawyer_rows[i % lawyers].lawyer_id,
+                    case_id=case_rows[i % cases].case_id if cases else None,
+                    appointment_date=first_day + timedelta(days=i // 9), appointment_time=time(9 + i % 9))
+        for i in range(appointments)
+    ])
+    db.session.commit()
+    return lawyer_rows, client_rows, case_rows
+
+
+@pytest.fixture
+def seed(db):
+    return lambda **counts: _seed(db, **counts)
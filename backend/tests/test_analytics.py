@@ -0,0 +1,65 @@
+import pytest
+
+import analytics
+from models import Case
+
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    monkeypatch.setattr(analytics, 'numpy', None)
+
+
+def test_percentiles_interpolate_like_numpy(without_numpy):
+    assert analytics._percentiles([4, 1, 3, 2]) == {'p25': 1.75, 'p50': 2.5, 'p75': 3.25, 'p90': 3.7}
+    assert analytics._percentiles([5]) == {'p25': 5, 'p50': 5, 'p75': 5, 'p90': 5}
+    assert analytics._percentiles([None]) == {'p25': None, 'p50': None, 'p75': None, 'p90': None}
+
+
+def test_ratios_and_group_sums(without_numpy):
+    assert analytics._ratios([1, 3, 0], [2, 4, 0]) == [0.5, 0.75, None]
+    assert analytics._group_sums([0, 1, 0], 2, [1, 1, 1], [2, 3, 4]) == [[2.0, 1.0], [6.0, 3.0]]
+
+
+def test_numpy_matches_the_fallback(client, db, seed, auth_headers, monkeypatch):
+    pytest.importorskip('numpy')
+    seed(lawyers=5, cases=20, appointments=0)
+    with_numpy = analytics.compute_lawyer_analytics()
+    monkeypatch.setattr(analytics, 'numpy', None)
+    assert analytics.compute_lawyer_analytics() == with_numpy
+
+
+def test_lawyer_analytics(client, seed, auth_headers, without_numpy):
+    seed(lawyers=2, cases=8, appointments=0)
+    assert client.get('/analytics/lawyers').status_code == 401
+
+    body = client.get('/analytics/lawyers', headers=auth_headers).get_json()
+    assert body['lawyers'] == 2
+    # Lawyers won 3 + 4 and lost 1 + 1 cases
+    assert body['totals']['win_rate'] == round(7 / 9, 4)
+    assert body['totals']['caseload_by_status'] == {
+        'Open': 2, 'In Progress': 2, 'Closed': 2, 'Under Review': 2, 'Awaiting Judgment': 0
+    }
+    assert body['totals']['active_cases'] == 6
+    assert [row['specialization'] for row in body['specializations']] == ['Criminal Law', 'Family Law']
+    first = body['per_lawyer'][0]
+    assert first['active_cases'] == 2
+    assert first['caseload_by_status']['Closed'] == 2
+    assert first['total_clients'] == 1
+    assert body['percentiles']['active_cases'] == {'p25': 2.5, 'p50': 3.0, 'p75': 3.5, 'p90': 3.8}
+
+
+def test_results_are_cached_until_a_write(client, db, seed, auth_headers, without_numpy, monkeypatch):
+    seed(lawyers=2, cases=4, appointments=0)
+    calls = []
+    compute = analytics.compute_lawyer_analytics
+    monkeypatch.setattr(analytics, 'compute_lawyer_analytics', lambda: calls.append(1) or compute())
+
+    client.get('/analytics/lawyers', headers=auth_headers)
+    client.get('/analytics/lawyers', headers=auth_headers)
+    assert len(calls) == 1
+
+    db.session.get(Case, 1).status = 'Closed'
+    db.session.commit()
+    body = client.get('/analytics/lawyers', headers=auth_headers).get_json()
+    assert len(calls) == 2
+    assert body['totals']['caseload_by_status']['Closed'] == 2
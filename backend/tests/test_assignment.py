@@ -0,0 +1,154 @@
+import time
+
+from sqlalchemy import event, update
+
+from models import Case, Client
+from assignment import AssignmentIndex, assignment_index, init_assignment, reconcile
+
+
+def rebuilt():
+    index = AssignmentIndex()
+    index.rebuild()
+    return index._lawyers
+
+
+# The index was kept up to date in place, not invalidated, and agrees with
+# one built from scratch
+def assert_matches_rebuild():
+    assert assignment_index._built_at is not None
+    assert assignment_index._lawyers == rebuilt()
+
+
+def new_case(client, **overrides):
+    body = {'title': 'Assigned', 'description': 'Auto', 'status': 'Open', 'client_id': 1}
+    body.update(overrides)
+    return client.post('/cases?auto_assign=1', json=body)
+
+
+def test_auto_assign_picks_the_least_loaded_lawyer(client, seed):
+    # Lawyer 1 has one open case (and a closed one), lawyer 2 two
+    seed(lawyers=2, cases=4, appointments=0)
+    assignment_index.rebuild()
+
+    response = new_case(client)
+    assert response.status_code == 201
+    assert response.get_json()['data']['lawyer_id'] == 1
+    # Now tied on open cases and clients; the lower id wins
+    recommended = client.get('/lawyers/recommend').get_json()
+    assert (recommended['lawyer_id'], recommended['open_cases'], recommended['clients']) == (1, 2, 1)
+    assert_matches_rebuild()
+
+
+def test_index_follows_writes(client, db, seed):
+    seed(lawyers=3, cases=6, appointments=0)
+    assignment_index.rebuild()
+
+    for _ in range(4):
+        assert new_case(client).status_code == 201
+    assert_matches_rebuild()
+
+    response = client.post('/clients?auto_assign=1', json={
+        'name': 'New client', 'email': 'new@example.com', 'phone': '555', 'address': 'Street'
+    })
+    assert response.status_code == 201
+    assert_matches_rebuild()
+
+    # Closing, reassigning and deleting cases, moving and deleting a client
+    case = db.session.get(Case, 1)
+    case.status = 'Closed'
+    db.session.get(Case, 2).lawyer_id = 3
+    db.session.commit()
+    assert_matches_rebuild()
+    assert client.delete('/cases/3').status_code == 200
+    db.session.get(Client, 1).lawyer_id = 2
+    db.session.commit()
+    db.session.delete(db.session.get(Client, 4))
+    db.session.commit()
+    assert_matches_rebuild()
+
+
+def test_specialization_without_lawyers(client, seed):
+    seed(lawyers=2, cases=0, appointments=0)
+    assert client.get('/lawyers/recommend?specialization=Tax Law').status_code == 404
+    assert new_case(client, specialization='Tax Law').status_code == 409
+    assert client.get('/lawyers/recommend?specialization=Criminal Law').get_json()['lawyer_id'] == 2
+
+
+def test_startup_builds_the_index(app, seed, monkeypatch):
+    seed(lawyers=2, cases=0, appointments=0)
+    monkeypatch.setitem(app.config, 'ASSIGNMENT_REBUILD_SECONDS', 0)
+    monkeypatch.setattr(assignment_index, 'max_age', assignment_index.max_age)
+    assert init_assignment(app) is None
+    assert_matches_rebuild()
+
+
+# Lookups serve a built index as it is; the writes other processes make
+# reach it through reconcile() in the background, not on the request path
+def test_writes_of_other_processes_arrive_with_reconcile(app, client, db, seed):
+    seed(lawyers=2, cases=2, appointments=0)
+    assignment_index.rebuild()
+    with db.engine.begin() as connection:
+        connection.execute(update(Case.__table__).values(status='Closed'))
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert client.get('/lawyers/recommend').get_json()['open_cases'] == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert not any('FROM cases' in statement for statement in statements)
+
+    assert reconcile(app) is True
+    assert client.get('/lawyers/recommend').get_json()['open_cases'] == 0
+
+
+# A commit applied while the rebuild reads may or may not be in what it read:
+# that read is thrown away and the next one swapped in
+def test_commits_during_a_rebuild_are_not_lost(db, seed, monkeypatch):
+    seed(lawyers=2, cases=0, appointments=0)
+    assignment_index.rebuild()
+    load = AssignmentIndex._load
+    reads = []
+
+    def load_during_commit(index):
+        result = load(index)
+        if not reads:
+            db.session.add(Case(title='Racing', description='x', status='Open', client_id=1, lawyer_id=2))
+            db.session.commit()
+        reads.append(result)
+        return result
+
+    monkeypatch.setattr(AssignmentIndex, '_load', load_during_commit)
+    assert assignment_index.rebuild() is True
+    assert len(reads) == 2
+    assert assignment_index._lawyers[2][0] == 1
+    monkeypatch.undo()
+    assert_matches_rebuild()
+
+
+def test_rebuild_gives_up_under_constant_commits(db, seed, monkeypatch):
+    seed(lawyers=1, cases=0, appointments=0)
+    load = AssignmentIndex._load
+
+    def load_during_commit(index):
+        index.apply([])
+        return load(index)
+
+    monkeypatch.setattr(AssignmentIndex, '_load', load_during_commit)
+    assert assignment_index.rebuild(attempts=2) is False
+    assert assignment_index._built_at is None
+
+
+def test_rebuild_job(client, auth_headers, seed):
+    seed(lawyers=2, cases=2, appointments=0)
+    job = client.post('/jobs', json={'name': 'rebuild_assignment_index'}, headers=auth_headers).get_json()['job']
+    deadline = time.monotonic() + 10
+    while (done := client.get(f'/jobs/{job["job_id"]}', headers=auth_headers).get_json())['status'] not in ('succeeded', 'failed'):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert done['result'] == {'rebuilt': True}
+    assert_matches_rebuild()
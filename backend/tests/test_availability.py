@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import availability
+
+TODAY = date.today() + timedelta(days=10)
+
+
+def freeze(monkeypatch, moment):
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return moment.date()
+
+    class FrozenDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment
+
+    monkeypatch.setattr(availability, 'date', FrozenDate)
+    monkeypatch.setattr(availability, 'datetime', FrozenDateTime)
+
+
+def revalidate(client, path, etag):
+    return client.get(path, headers={'If-None-Match': etag})
+
+
+@pytest.mark.parametrize('path', ['/lawyers/1/availability', '/lawyers/availability'])
+def test_etag_follows_the_clock(client, seed, monkeypatch, path):
+    seed(lawyers=1, cases=0, appointments=0)
+
+    freeze(monkeypatch, datetime.combine(TODAY, datetime.min.time()).replace(hour=10))
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert revalidate(client, path, etag).status_code == 304
+
+    # Within office hours the slot starting now moves with the minute
+    freeze(monkeypatch, datetime.combine(TODAY, datetime.min.time()).replace(hour=10, minute=30))
+    later = revalidate(client, path, etag)
+    assert later.status_code == 200
+    assert later.headers['ETag'] != etag
+
+    # The default range starts today, so it moves with the date
+    freeze(monkeypatch, datetime.combine(TODAY + timedelta(days=1), datetime.min.time()).replace(hour=20))
+    next_day = revalidate(client, path, later.headers['ETag'])
+    assert next_day.status_code == 200
+    body = next_day.get_json()
+    slots = body['free_slots'] if isinstance(body, dict) else body[0]['free_slots']
+    assert slots[0]['date'] == (TODAY + timedelta(days=2)).isoformat()
+
+
+def test_invalid_range_is_reported_by_the_view(client, seed):
+    seed(lawyers=1, cases=0, appointments=0)
+    response = client.get('/lawyers/1/availability?duration=abc')
+    assert response.status_code == 400
@@ -0,0 +1,128 @@
+import io
+from datetime import date, timedelta
+
+from bulk import bulk_import, parse_appointment_row
+from models import Appointment, Case, Client, Counter
+
+FIRST_DAY = (date.today() + timedelta(days=30)).isoformat()
+
+
+def counter(db, name):
+    return db.session.query(Counter.value).filter(Counter.name == name).scalar()
+
+
+def test_json_rows_are_inserted(client, db, seed):
+    lawyers, _, _ = seed(lawyers=1, cases=0, appointments=0)
+    rows = [{'name': f'Imported {i}', 'email': f'imported{i}@example.com', 'lawyer_id': lawyers[0].lawyer_id}
+            for i in range(3)]
+    response = client.post('/clients/bulk', json=rows)
+    assert response.status_code == 201
+    assert response.get_json() == {'message': 'Bulk import finished', 'inserted': 3, 'failed': 0, 'errors': []}
+    assert Client.query.count() == 4
+    assert counter(db, 'clients') == 4
+
+
+def test_csv_body_is_streamed(client, db, seed):
+    lawyers, clients, _ = seed(lawyers=1, cases=0, appointments=0)
+    lawyer_id, client_id = lawyers[0].lawyer_id, clients[0].client_id
+    body = 'title,description,status,client_id,lawyer_id\n' + ''.join(
+        f'Case {i},Imported,Open,{client_id},{lawyer_id}\n' for i in range(4)
+    )
+    response = client.post('/cases/bulk', data=body, content_type='text/csv')
+    assert response.status_code == 201
+    assert response.get_json()['inserted'] == 4
+    assert counter(db, 'cases:Open') == 4
+    assert counter(db, f'lawyer_cases:{lawyer_id}') == 4
+
+
+def test_multipart_upload(client, seed):
+    seed(lawyers=1, cases=0, appointments=0)
+    upload = io.BytesIO(b'name,email,phone,address,lawyer_id\nWalk-in,,555-0300,,\n')
+    response = client.post('/clients/bulk', data={'file': (upload, 'clients.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+    imported = Client.query.filter_by(name='Walk-in').one()
+    assert imported.email is None and imported.lawyer_id is None
+
+
+def test_multipart_without_file_is_rejected(client, db):
+    response = client.post('/clients/bulk', data={'other': 'x'}, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+def test_body_must_be_a_list(client, db):
+    assert client.post('/clients/bulk', json={'name': 'Single'}).status_code == 400
+
+
+def test_invalid_rows_are_reported_and_the_rest_inserted(client, seed):
+    lawyers, clients, _ = seed(lawyers=1, cases=0, appointments=0)
+    lawyer_id, client_id = lawyers[0].lawyer_id, clients[0].client_id
+    rows = [
+        {'title': 'Good', 'description': 'x', 'status': 'Open', 'client_id': client_id, 'lawyer_id': lawyer_id},
+        {'title': 'No description', 'status': 'Open', 'client_id': client_id, 'lawyer_id': lawyer_id},
+        {'title': 'Bad status', 'description': 'x', 'status': 'Lost', 'client_id': client_id, 'lawyer_id': lawyer_id},
+        'not an object',
+        {'title': 'Bad id', 'description': 'x', 'status': 'Open', 'client_id': 'abc', 'lawyer_id': lawyer_id},
+    ]
+    response = client.post('/cases/bulk', json=rows)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['inserted'] == 1 and body['failed'] == 4
+    assert [error['row'] for error in body['errors']] == [2, 3, 4, 5]
+    assert body['errors'][0]['error'] == "Missing required field: 'description'"
+    assert body['errors'][1]['error'] == 'Invalid status: Lost'
+    assert body['errors'][2]['error'] == 'Expected an object'
+    assert Case.query.count() == 1
+
+
+def test_appointments_for_closed_or_missing_cases_are_rejected(client, seed):
+    # Case 2 is Closed in the seed's status cycle
+    lawyers, clients, cases = seed(lawyers=1, cases=3, appointments=0)
+    base = {'client_id': clients[0].client_id, 'lawyer_id': lawyers[0].lawyer_id, 'date': FIRST_DAY}
+    rows = [
+        {**base, 'case_id': cases[0].case_id, 'time': '09:00:00'},
+        {**base, 'case_id': cases[2].case_id, 'time': '10:00:00'},
+        {**base, 'case_id': 999, 'time': '11:00:00'},
+        {**base, 'case_id': cases[1].case_id, 'time': '20:00:00'},
+    ]
+    body = client.post('/appointments/bulk', json=rows).get_json()
+    assert body['inserted'] == 1
+    assert {error['row']: error['error'] for error in body['errors']} == {
+        2: 'Appointments cannot be booked for closed cases',
+        3: 'Case not found',
+        4: 'Appointment time must be between 9:00 AM and 6:00 PM',
+    }
+
+
+# A constraint violation fails the one-statement insert; the chunk is then
+# retried row by row in savepoints so only the clashing rows are lost
+def test_constraint_violations_fall_back_to_savepoints(client, db, seed):
+    lawyers, clients, cases = seed(lawyers=1, cases=1, appointments=1)
+    base = {'client_id': clients[0].client_id, 'lawyer_id': lawyers[0].lawyer_id,
+            'case_id': cases[0].case_id, 'date': FIRST_DAY}
+    rows = [
+        {**base, 'time': '10:00:00'},
+        {**base, 'time': '09:00:00'},
+        {**base, 'time': '11:00:00'},
+        {**base, 'time': '10:00:00'},
+    ]
+    response = client.post('/appointments/bulk', json=rows)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['inserted'] == 2 and body['failed'] == 2
+    assert [error['row'] for error in body['errors']] == [2, 4]
+    assert all('UNIQUE' in error['error'] for error in body['errors'])
+    assert Appointment.query.count() == 3
+    assert counter(db, 'appointments') == 3
+
+
+def test_each_chunk_commits_on_its_own(app, db, seed):
+    lawyers, clients, cases = seed(lawyers=1, cases=1, appointments=0)
+    base = {'client_id': clients[0].client_id, 'lawyer_id': lawyers[0].lawyer_id,
+            'case_id': cases[0].case_id, 'date': FIRST_DAY}
+    # The clash is in the second chunk, so the first goes in on the fast path
+    rows = [{**base, 'time': f'{9 + i}:00:00'} for i in range(4)] + [{**base, 'time': '09:00:00'}]
+    result = bulk_import(Appointment.__table__, rows, parse_appointment_row, chunk_size=2)
+    assert result.inserted == 4 and result.failed == 1
+    assert result.errors[0]['row'] == 5
+    assert Appointment.query.count() == 4
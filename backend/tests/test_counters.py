@@ -0,0 +1,120 @@
+from models import Counter, Case
+
+
+def counter_values(db):
+    return dict(db.session.query(Counter.name, Counter.value))
+
+
+# A database built without the seeded counter rows (db.create_all()) must
+# still count its first writes
+def test_first_writes_create_their_counters(client, db, seed):
+    Counter.query.delete()
+    db.session.commit()
+
+    seed(lawyers=2, cases=5, appointments=3)
+    counters = counter_values(db)
+    assert counters['lawyers'] == 2
+    assert counters['cases'] == 5
+    assert counters['cases:Open'] == 2
+    assert counters['lawyer_cases:1'] == 3
+    assert counters['version:cases'] > 0
+
+    case = db.session.get(Case, 1)
+    case.status = 'Awaiting Judgment'
+    db.session.commit()
+    counters = counter_values(db)
+    assert counters['cases:Open'] == 1
+    assert counters['cases:Awaiting Judgment'] == 1
+
+    dashboard = client.get('/dashboard').get_json()
+    assert dashboard['total_cases'] == 5
+    assert dashboard['total_appointments'] == 3
+    assert dashboard['cases_by_status']['Awaiting Judgment'] == 1
+
+
+def test_counters_follow_deletes(client, db, seed):
+    seed(lawyers=2, cases=4, appointments=0)
+    db.session.delete(db.session.get(Case, 1))
+    db.session.commit()
+
+    dashboard = client.get('/dashboard').get_json()
+    assert dashboard['total_cases'] == 3
+    assert dashboard['cases_by_status']['Open'] == 0
+
+
+# Another writer creates the counter between our lookup and our insert: the
+# insert must add our delta to its row instead of failing on the unique name
+def test_counter_created_concurrently_is_incremented(client, db, seed):
+    from sqlalchemy import event
+    from models import Lawyer, Client
+
+    seed(lawyers=1, cases=0, appointments=0)
+    Counter.query.filter_by(name='cases:Open').delete()
+    db.session.commit()
+    lawyer, owner = Lawyer.query.one(), Client.query.one()
+
+    raced = []
+
+    def create_counter(conn, cursor, statement, parameters, context, executemany):
+        if not raced and statement.startswith('INSERT INTO counters') and 'cases:Open' in str(parameters):
+            raced.append(True)
+            conn.exec_driver_sql("INSERT INTO counters (name, value) VALUES ('cases:Open', 10)")
+
+    event.listen(db.engine, 'before_cursor_execute', create_counter)
+    try:
+        db.session.add(Case(title='Raced', description='x', status='Open',
+                            client_id=owner.client_id, lawyer_id=lawyer.lawyer_id))
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', create_counter)
+    assert raced
+    assert counter_values(db)['cases:Open'] == 11
+
+
+def test_missing_version_counters_are_created_then_bumped(db):
+    from counters import bump_versions
+
+    Counter.query.filter(Counter.name.in_(['version:cases', 'version:lawyers'])).delete()
+    db.session.commit()
+    connection = db.session.connection()
+    assert bump_versions(connection, ['cases', 'lawyers']) == {'cases': 1, 'lawyers': 1}
+    assert bump_versions(connection, ['cases']) == {'cases': 2}
+    db.session.rollback()
+
+
+# Counter rows are locked once per transaction, right before the COMMIT:
+# every counter write follows the last row write, the version counters come
+# first in one statement, and each statement takes its rows in name order
+def test_counters_are_written_once_at_commit_in_name_order(client, db, seed):
+    from sqlalchemy import event
+    from models import Lawyer
+
+    seed(lawyers=1, cases=2, appointments=0)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.split()[0] in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        # Two flushes, writing the tables in the opposite order of their names
+        db.session.get(Case, 1).status = 'Closed'
+        db.session.flush()
+        db.session.get(Lawyer, 1).phone = '555-0199'
+        db.session.flush()
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    counter_writes = [index for index, (statement, _) in enumerate(statements) if 'counters' in statement]
+    row_writes = [index for index, (statement, _) in enumerate(statements)
+                  if statement.startswith(('UPDATE cases SET status', 'UPDATE lawyers SET phone'))]
+    assert max(row_writes) < min(counter_writes)
+
+    versions, deltas = (statements[index] for index in counter_writes)
+    assert versions[0].startswith('INSERT INTO counters')
+    assert [value for value in versions[1] if str(value).startswith('version:')] == ['version:cases', 'version:lawyers']
+    assert deltas[0].startswith('UPDATE counters')
+    # CASE branches first, then the IN list the rows are located by
+    assert list(deltas[1][-2:]) == ['cases:Closed', 'cases:Open']
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from models import Appointment, SLOT_CONSTRAINT, is_slot_conflict
+
+FIRST_DAY = (date.today() + timedelta(days=30)).isoformat()
+
+
+def booking(lawyers, clients, cases, **overrides):
+    data = {
+        'client_id': clients[0].client_id, 'lawyer_id': lawyers[0].lawyer_id, 'case_id': cases[0].case_id,
+        'date': FIRST_DAY, 'time': '09:00:00', 'appointment_status': 'Scheduled',
+    }
+    data.update(overrides)
+    return data
+
+
+def test_add_rejects_a_booked_slot(client, seed):
+    # Appointment 0 holds lawyer 0 at 09:00 on the first day
+    lawyers, clients, cases = seed(lawyers=2, cases=2, appointments=2)
+    response = client.post('/appointments', json=booking(lawyers, clients, cases))
+    assert response.status_code == 409
+    assert 'already booked' in response.get_json()['message']
+    assert Appointment.query.count() == 2
+
+
+def test_add_allows_the_same_slot_for_another_lawyer_or_time(client, seed):
+    lawyers, clients, cases = seed(lawyers=3, cases=3, appointments=2)
+    other_lawyer = booking(lawyers, clients, cases, lawyer_id=lawyers[2].lawyer_id)
+    assert client.post('/appointments', json=other_lawyer).status_code == 201
+    other_time = booking(lawyers, clients, cases, time='15:00:00')
+    assert client.post('/appointments', json=other_time).status_code == 201
+    assert Appointment.query.count() == 4
+
+
+def test_only_the_first_of_two_identical_bookings_succeeds(client, seed):
+    lawyers, clients, cases = seed(lawyers=1, cases=1, appointments=0)
+    data = booking(lawyers, clients, cases, time='16:00:00')
+    assert client.post('/appointments', json=data).status_code == 201
+    assert client.post('/appointments', json=data).status_code == 409
+    assert Appointment.query.count() == 1
+
+
+def test_update_rejects_moving_onto_a_booked_slot(client, db, seed):
+    # Appointments 0 and 2 both belong to lawyer 0, at 09:00 and 11:00
+    seed(lawyers=2, cases=2, appointments=3)
+    first, _, third = Appointment.query.order_by(Appointment.appointment_id).all()
+    third_id, third_time = third.appointment_id, third.appointment_time
+    response = client.put(f'/appointments/{third_id}', json={'time': first.appointment_time.strftime('%H:%M:%S')})
+    assert response.status_code == 409
+    assert 'already booked' in response.get_json()['message']
+    assert db.session.get(Appointment, third_id).appointment_time == third_time
+
+
+def test_update_rejects_reassigning_to_a_booked_lawyer(client, seed):
+    # Appointment 1 belongs to lawyer 1 at 10:00; lawyer 0 is busy at 09:00
+    lawyers, _, _ = seed(lawyers=2, cases=2, appointments=2)
+    _, second = Appointment.query.order_by(Appointment.appointment_id).all()
+    response = client.put(f'/appointments/{second.appointment_id}',
+                          json={'lawyer_id': lawyers[0].lawyer_id, 'time': '09:00:00'})
+    assert response.status_code == 409
+
+
+def test_update_keeping_the_slot_is_not_a_conflict(client, seed):
+    seed(lawyers=2, cases=2, appointments=2)
+    first = Appointment.query.order_by(Appointment.appointment_id).first()
+    response = client.put(f'/appointments/{first.appointment_id}', json={
+        'date': first.appointment_date.isoformat(),
+        'time': first.appointment_time.strftime('%H:%M:%S'),
+        'appointment_status': 'Completed',
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data']['appointment_status'] == 'Completed'
+
+
+def test_conflicts_are_recognised_on_mysql_and_sqlite():
+    assert is_slot_conflict(Exception(f"(1062, \"Duplicate entry '1-2030-01-01-09:00:00' for key '{SLOT_CONSTRAINT}'\")"))
+    assert is_slot_conflict(Exception('UNIQUE constraint failed: appointments.lawyer_id, '
+                                      'appointments.appointment_date, appointments.appointment_time'))
+    assert not is_slot_conflict(Exception('UNIQUE constraint failed: lawyers.email'))
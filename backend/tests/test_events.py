@@ -0,0 +1,51 @@
+import json
+from datetime import date, timedelta
+
+from models import Appointment
+from events import broker
+
+
+def received(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        message = subscriber.queue.get_nowait()[2]
+        events.append(json.loads(message.split('data: ', 1)[1]))
+    return events
+
+
+def test_appointment_insert_carries_display_names(client, db, seed):
+    seed(lawyers=2, cases=2, appointments=0)
+    subscriber, _ = broker.subscribe({'appointments'})
+    try:
+        response = client.post('/appointments', json={
+            'client_id': 1, 'lawyer_id': 1, 'case_id': 1,
+            'date': (date.today() + timedelta(days=3)).isoformat(), 'time': '10:00:00',
+            'appointment_status': 'Scheduled'
+        })
+        assert response.status_code == 201
+        (event,) = received(subscriber)
+    finally:
+        broker.unsubscribe(subscriber)
+
+    assert event['op'] == 'insert'
+    assert event['fields']['client_name'] == 'Client 0'
+    assert event['fields']['lawyer_name'] == 'Lawyer 0'
+    assert event['fields']['case_title'] == 'Case 0'
+    assert 'row_version' not in event['fields']
+
+
+def test_reassigned_appointment_carries_new_names(client, db, seed):
+    seed(lawyers=2, cases=2, appointments=1)
+    subscriber, _ = broker.subscribe({'appointments'})
+    try:
+        appointment = db.session.get(Appointment, 1)
+        appointment.lawyer_id = 2
+        db.session.commit()
+        appointment.appointment_status = 'Completed'
+        db.session.commit()
+        moved, completed = received(subscriber)
+    finally:
+        broker.unsubscribe(subscriber)
+
+    assert moved['fields'] == {'lawyer_id': 2, 'case_title': 'Case 0', 'client_name': 'Client 0', 'lawyer_name': 'Lawyer 1'}
+    assert completed['fields'] == {'appointment_status': 'Completed'}
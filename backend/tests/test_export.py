@@ -0,0 +1,84 @@
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+
+import export
+
+
+def read_csv(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_cases_csv_has_every_row_with_names(client, auth_headers, seed):
+    seed(lawyers=2, cases=4, appointments=0)
+    response = client.get('/export/cases', headers=auth_headers)
+    assert response.headers['Content-Disposition'] == f'attachment; filename=cases-{date.today().isoformat()}.csv'
+    rows = read_csv(response)
+    assert [row['title'] for row in rows] == ['Case 0', 'Case 1', 'Case 2', 'Case 3']
+    assert rows[0]['client_name'] == 'Client 0' and rows[1]['lawyer_name'] == 'Lawyer 1'
+
+
+def test_csv_filters(client, auth_headers, seed):
+    lawyers, _, _ = seed(lawyers=2, cases=4, appointments=0)
+    rows = read_csv(client.get('/export/cases?status=Open', headers=auth_headers))
+    assert [row['title'] for row in rows] == ['Case 0']
+
+    rows = read_csv(client.get(f'/export/cases?lawyer_id={lawyers[1].lawyer_id}', headers=auth_headers))
+    assert [row['title'] for row in rows] == ['Case 1', 'Case 3']
+
+
+def test_appointments_csv_date_range(client, auth_headers, seed):
+    # Nine slots a day: the tenth appointment is on the second day
+    seed(lawyers=1, cases=1, appointments=10)
+    second_day = (date.today() + timedelta(days=31)).isoformat()
+    rows = read_csv(client.get(f'/export/appointments?from={second_day}', headers=auth_headers))
+    assert len(rows) == 1
+    assert rows[0]['appointment_date'] == second_day and rows[0]['appointment_time'] == '09:00:00'
+
+
+# Small batches: the rows arrive over several chunks and still add up
+def test_csv_is_streamed_in_batches(client, auth_headers, seed, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 2)
+    seed(lawyers=1, cases=5, appointments=0)
+    response = client.get('/export/cases', headers=auth_headers)
+    assert response.is_streamed
+    assert len(read_csv(response)) == 5
+
+
+@pytest.mark.parametrize('url, message', [
+    ('/export/lawyers', 'Unknown export: lawyers'),
+    ('/export/cases?format=xlsx', 'format must be one of'),
+    ('/export/clients?status=Open', 'Unsupported filter for this export: status'),
+    ('/export/cases?from=2030-01-01', 'Unsupported filter for this export: from'),
+])
+def test_invalid_exports(client, auth_headers, url, message):
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith(message)
+
+
+def test_parquet_without_pyarrow_is_a_bad_request(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(export, 'pyarrow', None)
+    response = client.get('/export/cases?format=parquet', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Parquet export is not available: install pyarrow'
+
+
+def test_parquet_export(client, auth_headers, seed):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+
+    seed(lawyers=1, cases=1, appointments=2)
+    response = client.get('/export/appointments?format=parquet', headers=auth_headers)
+    assert response.status_code == 200
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.get_data()))
+    assert table.num_rows == 2
+    assert table.schema.field('appointment_date').type == pyarrow.date32()
+
+
+def test_export_requires_a_token(client):
+    assert client.get('/export/cases').status_code == 401
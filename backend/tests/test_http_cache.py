@@ -0,0 +1,87 @@
+import pytest
+
+from models import Appointment, Case, Client, Lawyer
+from streaming import NDJSON_MIMETYPE
+
+
+def revalidate(client, path, etag, **headers):
+    response = client.get(path, headers={'If-None-Match': etag, **headers})
+    response.get_data()
+    return response
+
+
+@pytest.mark.parametrize('path', ['/lawyers', '/clients', '/cases', '/appointments', '/all-appointments', '/debug/cases'])
+def test_matching_etag_is_answered_with_304(client, seed, path):
+    seed(lawyers=2, cases=2, appointments=2)
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    response = revalidate(client, path, etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_304_skips_the_view(client, db, seed):
+    from sqlalchemy import event
+
+    seed(lawyers=2, cases=2, appointments=2)
+    etag = client.get('/cases').headers['ETag']
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert revalidate(client, '/cases', etag).status_code == 304
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert len(statements) == 1 and 'counters' in statements[0]
+
+
+# /appointments lists names from every table, so a write to any of them
+# must change its tag; a write elsewhere leaves /cases alone
+@pytest.mark.parametrize('model, change', [
+    (Lawyer, {'phone': '555-0199'}),
+    (Client, {'name': 'Renamed client'}),
+    (Case, {'title': 'Renamed case'}),
+    (Appointment, {'appointment_status': 'Completed'}),
+])
+def test_write_to_each_listed_table_changes_the_etag(client, db, seed, model, change):
+    seed(lawyers=2, cases=2, appointments=2)
+    etags = {path: client.get(path).headers['ETag'] for path in ('/appointments', '/cases')}
+
+    row = model.query.first()
+    for key, value in change.items():
+        setattr(row, key, value)
+    db.session.commit()
+
+    response = revalidate(client, '/appointments', etags['/appointments'])
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etags['/appointments']
+    expected = 200 if model is Case else 304
+    assert revalidate(client, '/cases', etags['/cases']).status_code == expected
+
+
+def test_json_and_ndjson_get_separate_etags(client, seed):
+    seed(lawyers=2, cases=2, appointments=0)
+    json_response = client.get('/cases', headers={'Accept': 'application/json'})
+    ndjson_response = client.get('/cases', headers={'Accept': NDJSON_MIMETYPE})
+    ndjson_response.get_data()
+    assert ndjson_response.mimetype == NDJSON_MIMETYPE
+    assert json_response.headers['ETag'] != ndjson_response.headers['ETag']
+    assert 'Accept' in json_response.headers['Vary'] and 'Accept' in ndjson_response.headers['Vary']
+
+    # A tag only revalidates the representation it was issued for
+    assert revalidate(client, '/cases', ndjson_response.headers['ETag'], Accept=NDJSON_MIMETYPE).status_code == 304
+    assert revalidate(client, '/cases', json_response.headers['ETag'], Accept=NDJSON_MIMETYPE).status_code == 200
+
+
+def test_query_string_is_part_of_the_etag(client, seed):
+    seed(lawyers=2, cases=4, appointments=0)
+    etag = client.get('/cases?status=Open').headers['ETag']
+    assert client.get('/cases?status=Closed').headers['ETag'] != etag
+    assert revalidate(client, '/cases?status=Open', etag).status_code == 304
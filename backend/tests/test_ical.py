@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+import ical
+from ical import _escape, _fold
+
+
+def unfold(text):
+    return text.replace('\r\n ', '')
+
+
+def test_short_lines_are_not_folded():
+    assert _fold('SUMMARY:Short') == 'SUMMARY:Short\r\n'
+    assert _fold('X' * 75) == 'X' * 75 + '\r\n'
+
+
+def test_long_lines_fold_at_75_octets():
+    line = 'DESCRIPTION:' + 'a' * 200
+    folded = _fold(line)
+    assert folded.endswith('\r\n')
+    parts = folded[:-2].split('\r\n')
+    assert len(parts[0].encode()) == 75
+    assert all(part.startswith(' ') and len(part.encode()) <= 75 for part in parts[1:])
+    assert unfold(folded[:-2]) == line
+
+
+def test_folding_never_splits_a_character():
+    line = 'SUMMARY:' + 'é' * 60 + '日本' * 20
+    folded = _fold(line)
+    for part in folded[:-2].split('\r\n'):
+        assert len(part.encode()) <= 75
+        part.encode().decode()
+    assert unfold(folded[:-2]) == line
+
+
+def test_text_values_are_escaped():
+    assert _escape('Smith, Jones; Partners\\Co\nLine two\r') == 'Smith\\, Jones\\; Partners\\\\Co\\nLine two'
+    assert _escape(None) == ''
+
+
+def test_feed_lists_the_lawyers_appointments(client, seed):
+    seed(lawyers=2, cases=2, appointments=4)
+    response = client.get('/lawyers/1/calendar.ics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/calendar'
+    body = unfold(response.get_data(as_text=True))
+    assert body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n')
+    assert body.count('BEGIN:VEVENT') == 2
+    assert 'SUMMARY:Appointment with Client 0' in body
+    assert client.get('/lawyers/99/calendar.ics').status_code == 404
+    assert client.get('/lawyers/1/calendar.ics?from=2030-02-01&to=2030-01-01').status_code == 400
+
+
+# The default range follows the date, so yesterday's ETag must not match
+def test_default_range_is_part_of_the_etag(client, seed, monkeypatch):
+    seed(lawyers=1, cases=1, appointments=1)
+    first = client.get('/lawyers/1/calendar.ics')
+    first.get_data()
+    etag = first.headers['ETag']
+    assert client.get('/lawyers/1/calendar.ics', headers={'If-None-Match': etag}).status_code == 304
+
+    tomorrow = date.today() + timedelta(days=1)
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return tomorrow
+
+    monkeypatch.setattr(ical, 'date', Tomorrow)
+    response = client.get('/lawyers/1/calendar.ics', headers={'If-None-Match': etag})
+    response.get_data()
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
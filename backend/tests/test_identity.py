@@ -0,0 +1,107 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+import identity
+from identity import AdminIdentity, IdentityCache, identity_cache
+from models import Admin
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    identity_cache._entries.clear()
+    yield
+    identity_cache._entries.clear()
+
+
+def fixture_admin_id():
+    return Admin.query.filter_by(email='admin@example.com').one().admin_id
+
+
+def count_admin_selects(db, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'FROM admin' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return len(statements)
+
+
+def test_identity_is_loaded_once_per_admin(client, db, auth_headers):
+    def requests():
+        for _ in range(3):
+            assert client.get('/admin/protected', headers=auth_headers).status_code == 200
+
+    assert count_admin_selects(db, requests) == 1
+    assert count_admin_selects(db, requests) == 0
+
+
+def test_profile_update_evicts_the_cache_entry(client, db, auth_headers):
+    current = fixture_admin_id()
+    assert client.get('/admin/protected', headers=auth_headers).get_json()['admin_name'] == 'Admin'
+    assert identity_cache.get(current) == AdminIdentity(current, 'Admin', 'admin@example.com')
+
+    response = client.put(f'/profile/{current}', json={'name': 'Renamed'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['name'] == 'Renamed'
+    assert identity_cache.get(current) is None
+
+    # The next request reloads the new name
+    assert client.get('/admin/protected', headers=auth_headers).get_json()['admin_name'] == 'Renamed'
+    assert client.get(f'/profile/{current}', headers=auth_headers).get_json()['name'] == 'Renamed'
+
+
+def test_profile_of_another_admin_cannot_be_updated(client, db, auth_headers):
+    other = Admin(name='Other', email='other@example.com', password='x')
+    db.session.add(other)
+    db.session.commit()
+    other_id = other.admin_id
+
+    assert client.get('/admin/protected', headers=auth_headers).status_code == 200
+    response = client.put(f'/profile/{other_id}', json={'name': 'Hijacked'}, headers=auth_headers)
+    assert response.status_code == 403
+    assert db.session.get(Admin, other_id).name == 'Other'
+
+
+def test_deleted_admin_token_is_rejected(client, db, app):
+    admin = Admin(name='Gone', email='gone@example.com', password='x')
+    db.session.add(admin)
+    db.session.commit()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.admin_id))}'}
+    db.session.delete(admin)
+    db.session.commit()
+
+    assert client.get('/admin/protected', headers=headers).status_code == 401
+    assert identity_cache.get(admin.admin_id) is None
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now[0])
+    cache = IdentityCache(ttl=60)
+    cache.put(AdminIdentity(1, 'A', 'a@example.com'))
+    now[0] += 59
+    assert cache.get(1).name == 'A'
+    now[0] += 2
+    assert cache.get(1) is None
+
+
+def test_full_cache_drops_expired_entries_first(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(identity, 'MAX_ENTRIES', 3)
+    cache = IdentityCache(ttl=10)
+    cache.put(AdminIdentity(1, 'A', 'a@example.com'))
+    now[0] = 8
+    cache.put(AdminIdentity(2, 'B', 'b@example.com'))
+    cache.put(AdminIdentity(3, 'C', 'c@example.com'))
+    now[0] = 12
+    cache.put(AdminIdentity(4, 'D', 'd@example.com'))
+    assert sorted(cache._entries) == [2, 3, 4]
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+from models import Admin, Counter
+
+
+# Registers handlers for the length of a test
+@pytest.fixture
+def handlers(monkeypatch):
+    return lambda name, handler: monkeypatch.setitem(jobs.JOB_HANDLERS, name, handler)
+
+
+def wait_for(client, headers, job_id, *statuses, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+        if job['status'] in statuses:
+            return job
+        assert time.monotonic() < deadline, f'job stuck in {job["status"]}'
+        time.sleep(0.01)
+
+
+def start(client, headers, name, params=None):
+    response = client.post('/jobs', json={'name': name, 'params': params or {}}, headers=headers)
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert response.headers['Location'] == f'/jobs/{job["job_id"]}'
+    return job
+
+
+# The handler waits at each checkpoint, so every state can be observed
+def test_status_and_progress_transitions(client, auth_headers, handlers):
+    started = threading.Event()
+    step_done = threading.Semaphore(0)
+    proceed = threading.Semaphore(0)
+
+    def stepped(context, steps):
+        started.wait(5)
+        context.checkpoint(0, total=steps)
+        for step in range(1, steps + 1):
+            step_done.release()
+            proceed.acquire(timeout=5)
+            context.checkpoint(step)
+        return {'steps': steps}
+
+    handlers('stepped', stepped)
+    job = start(client, auth_headers, 'stepped', {'steps': 2})
+    assert job['status'] == 'queued' and job['progress'] == 0 and job['started_at'] is None
+
+    started.set()
+    step_done.acquire(timeout=5)
+    running = wait_for(client, auth_headers, job['job_id'], 'running')
+    assert running['progress'] == 0 and running['total'] == 2 and running['started_at']
+
+    proceed.release()
+    step_done.acquire(timeout=5)
+    deadline = time.monotonic() + 5
+    while client.get(f'/jobs/{job["job_id"]}', headers=auth_headers).get_json()['progress'] != 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    proceed.release()
+    done = wait_for(client, auth_headers, job['job_id'], 'succeeded', 'failed')
+    assert done['status'] == 'succeeded'
+    assert done['progress'] == 2 and done['result'] == {'steps': 2}
+    assert done['finished_at'] and done['error'] is None
+
+
+def test_failing_handler_ends_in_failed(client, auth_headers, handlers):
+    def failing(context):
+        context.checkpoint(1, total=3)
+        raise RuntimeError('disk full')
+
+    handlers('failing', failing)
+    job = start(client, auth_headers, 'failing')
+    done = wait_for(client, auth_headers, job['job_id'], 'succeeded', 'failed')
+    assert done['status'] == 'failed'
+    assert done['error'] == 'disk full'
+    assert done['progress'] == 1 and done['result'] is None and done['finished_at']
+
+
+# Work committed by checkpoints stays; work after the last one rolls back
+def test_failure_keeps_checkpointed_work_only(client, db, auth_headers, handlers):
+    def partial(context):
+        db.session.add(Counter(name='job:first', value=1))
+        context.checkpoint(1)
+        db.session.add(Counter(name='job:second', value=2))
+        raise RuntimeError('interrupted')
+
+    handlers('partial', partial)
+    job = start(client, auth_headers, 'partial')
+    assert wait_for(client, auth_headers, job['job_id'], 'succeeded', 'failed')['status'] == 'failed'
+    names = {name for (name,) in db.session.query(Counter.name).filter(Counter.name.like('job:%'))}
+    assert names == {'job:first'}
+
+
+def test_reconcile_counters_job(client, db, auth_headers, seed):
+    seed(lawyers=2, cases=3, appointments=0)
+    db.session.query(Counter).filter(Counter.name == 'cases').update({'value': 99})
+    db.session.commit()
+
+    job = start(client, auth_headers, 'reconcile_counters')
+    done = wait_for(client, auth_headers, job['job_id'], 'succeeded', 'failed')
+    assert done['status'] == 'succeeded'
+    assert done['result']['dashboard']['cases'] == 3
+
+
+def test_rehash_passwords_job(client, db, auth_headers, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Hashing in threads keeps the test from spawning processes
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(jobs, 'process_pool', lambda: pool)
+    db.session.add_all([Admin(name=f'Plain {n}', email=f'plain{n}@example.com', password='secret') for n in range(3)])
+    db.session.commit()
+
+    job = start(client, auth_headers, 'rehash_passwords', {'chunk_size': 2})
+    done = wait_for(client, auth_headers, job['job_id'], 'succeeded', 'failed')
+    pool.shutdown()
+    assert done['status'] == 'succeeded'
+    # The fixture admin's password is plain text too
+    assert done['result'] == {'rehashed': 4} and done['progress'] == done['total'] == 4
+    db.session.expire_all()
+    assert all(jobs.is_password_hash(password) for (password,) in db.session.query(Admin.password))
+
+
+@pytest.mark.parametrize('body, message', [
+    ({}, 'Missing required field: name'),
+    ({'name': 'no_such_job'}, 'Unknown job: no_such_job'),
+    ({'name': 'reconcile_counters', 'params': [1]}, 'params must be an object'),
+])
+def test_invalid_job_requests(client, auth_headers, body, message):
+    response = client.post('/jobs', json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith(message)
+
+
+def test_jobs_require_a_token(client):
+    assert client.post('/jobs', json={'name': 'reconcile_counters'}).status_code == 401
+    assert client.get('/jobs/1').status_code == 401
+
+
+def test_unknown_job_id(client, auth_headers):
+    assert client.get('/jobs/12345', headers=auth_headers).status_code == 404
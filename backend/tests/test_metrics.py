@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from metrics import registry
+
+
+def statement_count():
+    return registry._statement_latency.count
+
+
+def test_statements_are_timed(app, db):
+    before = statement_count()
+    db.session.execute(text('SELECT 1'))
+    assert statement_count() == before + 1
+
+
+# A failing statement leaves nothing behind on the pooled connection
+def test_failed_statement_leaves_no_state(app, db):
+    connection = db.session.connection()
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM missing_table'))
+    assert not any(key.startswith('query') for key in connection.connection.info)
+
+    before = statement_count()
+    db.session.rollback()
+    db.session.execute(text('SELECT 1'))
+    assert statement_count() == before + 1
+
+
+def test_requests_are_counted(client):
+    client.get('/healthz')
+    assert 'endpoint="/healthz"' in client.get('/metrics').get_data(as_text=True)
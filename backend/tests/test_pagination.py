@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+import pytest
+
+from pagination import MAX_PAGE_SIZE
+
+
+def walk(client, path, limit):
+    rows, pages, after = [], 0, None
+    while True:
+        query = f'limit={limit}' + (f'&after={after}' if after else '')
+        response = client.get(f'{path}{"&" if "?" in path else "?"}{query}')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['data']) <= limit
+        rows += body['data']
+        pages += 1
+        after = body['next_cursor']
+        if after is None:
+            return rows, pages
+
+
+@pytest.mark.parametrize('path, key', [
+    ('/lawyers', 'lawyer_id'),
+    ('/clients', 'client_id'),
+    ('/cases', 'case_id'),
+    ('/appointments', 'appointment_id'),
+    ('/all-appointments', 'appointment_id'),
+])
+def test_pages_round_trip_to_the_full_list(client, seed, path, key):
+    seed(lawyers=5, cases=7, appointments=7)
+    full = client.get(path).get_json()
+    rows, pages = walk(client, path, 2)
+    assert rows == sorted(full, key=lambda row: row[key])
+    assert pages == (len(full) + 1) // 2
+
+
+def test_unpaged_list_stays_a_plain_list(client, seed):
+    seed(lawyers=2, cases=2, appointments=2)
+    assert isinstance(client.get('/cases').get_json(), list)
+
+
+def test_last_page_has_no_cursor(client, seed):
+    seed(lawyers=2, cases=3, appointments=0)
+    body = client.get('/cases?limit=3').get_json()
+    assert len(body['data']) == 3 and body['next_cursor'] is None
+
+
+def test_limit_is_capped(client, seed):
+    seed(lawyers=1, cases=0, appointments=0)
+    body = client.get(f'/lawyers?limit={MAX_PAGE_SIZE * 10}').get_json()
+    assert len(body['data']) == 1
+
+
+@pytest.mark.parametrize('query', ['after=not-a-cursor', 'after=e30', 'limit=0', 'limit=ten'])
+def test_invalid_paging_arguments_are_rejected(client, seed, query):
+    seed(lawyers=1, cases=1, appointments=1)
+    for path in ('/lawyers', '/clients', '/cases', '/appointments'):
+        response = client.get(f'{path}?{query}')
+        assert response.status_code == 400, path
+
+
+def test_cases_filter_by_status(client, seed):
+    seed(lawyers=2, cases=8, appointments=0)
+    rows, _ = walk(client, '/cases?status=Closed', 1)
+    assert len(rows) == 2 and {row['status'] for row in rows} == {'Closed'}
+
+
+def test_cases_filter_by_lawyer_and_client(client, seed):
+    lawyers, clients, _ = seed(lawyers=2, cases=6, appointments=0)
+    by_lawyer = client.get(f'/cases?lawyer_id={lawyers[1].lawyer_id}&limit=10').get_json()['data']
+    assert len(by_lawyer) == 3 and {row['lawyer_id'] for row in by_lawyer} == {lawyers[1].lawyer_id}
+    by_client = client.get(f'/cases?client_id={clients[0].client_id}&limit=10').get_json()['data']
+    assert len(by_client) == 3 and {row['client_id'] for row in by_client} == {clients[0].client_id}
+
+
+def test_appointments_filter_by_lawyer_client_and_status(client, seed):
+    lawyers, clients, _ = seed(lawyers=2, cases=2, appointments=6)
+    rows = client.get(f'/appointments?lawyer_id={lawyers[0].lawyer_id}&limit=10').get_json()['data']
+    assert len(rows) == 3 and {row['lawyer_id'] for row in rows} == {lawyers[0].lawyer_id}
+    rows = client.get(f'/appointments?client_id={clients[1].client_id}&limit=10').get_json()['data']
+    assert len(rows) == 3 and {row['client_id'] for row in rows} == {clients[1].client_id}
+    assert client.get('/appointments?status=Cancelled&limit=10').get_json()['data'] == []
+
+
+def test_clients_filter_by_lawyer(client, seed):
+    lawyers, _, _ = seed(lawyers=3, cases=0, appointments=0)
+    rows = client.get(f'/clients?lawyer_id={lawyers[2].lawyer_id}').get_json()
+    assert [row['lawyer_id'] for row in rows] == [lawyers[2].lawyer_id]
+
+
+def test_appointments_filter_by_date_range(client, seed):
+    # Nine slots a day: appointments 0-8 fall on the first day, 9-17 on the next
+    seed(lawyers=2, cases=2, appointments=18)
+    second_day = (date.today() + timedelta(days=31)).isoformat()
+    rows, _ = walk(client, f'/appointments?from={second_day}&to={second_day}', 4)
+    assert len(rows) == 9 and {row['appointment_date'] for row in rows} == {second_day}
+    rows = client.get(f'/appointments?to={second_day}&limit=100').get_json()['data']
+    assert len(rows) == 18
+
+
+def test_filters_and_paging_combine(client, seed):
+    lawyers, _, _ = seed(lawyers=2, cases=2, appointments=10)
+    rows, pages = walk(client, f'/appointments?lawyer_id={lawyers[0].lawyer_id}', 2)
+    assert len(rows) == 5 and pages == 3
+    assert {row['lawyer_id'] for row in rows} == {lawyers[0].lawyer_id}
+
+
+@pytest.mark.parametrize('query', ['lawyer_id=abc', 'from=2024-13-01', 'to=tomorrow'])
+def test_invalid_filters_are_rejected(client, seed, query):
+    seed(lawyers=1, cases=1, appointments=1)
+    response = client.get(f'/appointments?{query}')
+    assert response.status_code == 400
+    assert 'message' in response.get_json()
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+
+def selects(db, client, path):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'counters' not in statement:
+            statements.append(' '.join(statement.split()))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path)
+        response.get_data()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return response, statements
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/lawyers?fields=name', {'lawyer_id', 'name'}),
+    ('/profile?fields=email,name', {'lawyer_id', 'email', 'name'}),
+    ('/clients?fields=email', {'client_id', 'email'}),
+    ('/cases?fields=title,status', {'case_id', 'title', 'status'}),
+    ('/appointments?fields=appointment_date,appointment_time', {'appointment_id', 'appointment_date', 'appointment_time'}),
+    ('/all-appointments?fields=lawyer_name', {'appointment_id', 'lawyer_name'}),
+])
+def test_only_requested_fields_are_returned(client, seed, path, expected):
+    seed(lawyers=2, cases=2, appointments=2)
+    response = client.get(path)
+    assert response.status_code == 200
+    rows = response.get_json()
+    assert rows and all(set(row) == expected for row in rows)
+
+
+def test_values_match_the_full_rows(client, seed):
+    seed(lawyers=2, cases=2, appointments=3)
+    full = {row['appointment_id']: row for row in client.get('/appointments').get_json()}
+    sparse = client.get('/appointments?fields=appointment_time,client_name,case_title').get_json()
+    for row in sparse:
+        assert row == {key: full[row['appointment_id']][key] for key in row}
+
+
+def test_columns_are_selected_in_sql(client, db, seed):
+    seed(lawyers=2, cases=2, appointments=2)
+    response, statements = selects(db, client, '/cases?fields=title')
+    assert response.status_code == 200
+    (statement,) = statements
+    assert 'cases.title' in statement and 'cases.description' not in statement
+
+
+def test_joins_only_for_requested_names(client, db, seed):
+    seed(lawyers=2, cases=2, appointments=2)
+    _, statements = selects(db, client, '/appointments?fields=appointment_date')
+    assert 'JOIN' not in statements[0]
+    _, statements = selects(db, client, '/appointments?fields=lawyer_name')
+    assert 'JOIN lawyers' in statements[0] and 'JOIN clients' not in statements[0]
+
+
+def test_fields_with_paging_and_streaming(client, seed):
+    seed(lawyers=2, cases=5, appointments=0)
+    page = client.get('/cases?fields=title&limit=2').get_json()
+    assert [set(row) for row in page['data']] == [{'case_id', 'title'}] * 2
+    assert client.get(f"/cases?fields=title&limit=2&after={page['next_cursor']}").get_json()['data'][0]['case_id'] == 3
+
+    streamed = client.get('/cases?fields=status&stream=1').get_data(as_text=True)
+    rows = [json.loads(line) for line in streamed.splitlines()]
+    assert len(rows) == 5 and set(rows[0]) == {'case_id', 'status'}
+
+
+@pytest.mark.parametrize('path', ['/cases?fields=title,secret', '/appointments?fields=row_version', '/lawyers?fields=password'])
+def test_unknown_fields_are_rejected(client, seed, path):
+    seed(lawyers=1, cases=1, appointments=1)
+    response = client.get(path)
+    assert response.status_code == 400
+    assert 'Unknown fields' in response.get_json()['message']
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import event
+
+
+# Counts the statements sent to the database while fn runs
+def count_statements(db, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def statements_for(client, db, path):
+    def fetch():
+        response = client.get(path)
+        assert response.status_code == 200
+        response.get_data()
+    return count_statements(db, fetch)
+
+
+# The related names come from joins, so the statement count must not grow
+# with the number of rows (or of distinct related rows) returned
+@pytest.mark.parametrize('path', ['/appointments', '/all-appointments', '/debug/cases'])
+def test_statement_count_does_not_grow_with_rows(client, db, seed, path):
+    seed(lawyers=2, cases=2, appointments=2)
+    small = statements_for(client, db, path)
+
+    seed(lawyers=20, cases=60, appointments=60)
+    large = statements_for(client, db, path)
+
+    assert len(large) == len(small), '\n'.join(large)
+
+
+def test_appointments_load_names_with_the_rows(client, db, seed):
+    seed(lawyers=3, cases=3, appointments=6)
+    response = client.get('/appointments')
+    appointments = response.get_json()
+    assert len(appointments) == 6
+    assert all(row['client_name'] and row['lawyer_name'] and row['case_title'] for row in appointments)
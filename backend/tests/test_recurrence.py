@@ -0,0 +1,113 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import Appointment
+from recurrence import MAX_OCCURRENCES, RecurrenceError, expand_dates
+
+# A Monday well in the future
+START = date.today() + timedelta(days=63 - date.today().weekday())
+
+
+def test_daily_interval_and_count():
+    assert expand_dates(START, 'daily', interval=2, count=3) == [START, START + timedelta(days=2), START + timedelta(days=4)]
+
+
+def test_weekly_on_weekdays_until():
+    dates = expand_dates(START, 'weekly', weekdays={0, 3}, until=START + timedelta(days=14))
+    assert dates == [START, START + timedelta(days=3), START + timedelta(days=7),
+                     START + timedelta(days=10), START + timedelta(days=14)]
+
+
+def test_monthly_skips_months_without_the_day():
+    assert expand_dates(date(2031, 1, 31), 'monthly', count=3) == [date(2031, 1, 31), date(2031, 3, 31), date(2031, 5, 31)]
+
+
+def test_series_length_is_capped():
+    assert len(expand_dates(START, 'daily', count=MAX_OCCURRENCES)) == MAX_OCCURRENCES
+    with pytest.raises(RecurrenceError):
+        expand_dates(START, 'daily', count=MAX_OCCURRENCES + 1)
+    with pytest.raises(RecurrenceError):
+        expand_dates(START, 'daily')
+
+
+def series(**overrides):
+    body = {'client_id': 1, 'lawyer_id': 1, 'case_id': 1, 'time': '10:00:00',
+            'start_date': START.isoformat(), 'frequency': 'weekly', 'count': 4}
+    body.update(overrides)
+    return body
+
+
+def book(db, day, at=time(10, 30)):
+    db.session.add(Appointment(client_id=1, lawyer_id=1, case_id=1, appointment_date=day, appointment_time=at))
+    db.session.commit()
+
+
+def test_conflicting_occurrences_are_skipped(client, db, seed):
+    seed(lawyers=1, cases=1, appointments=0)
+    # Starts within the hour of the series' 10:00 slot
+    book(db, START + timedelta(weeks=1))
+
+    response = client.post('/appointments/recurring', json=series())
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [row['appointment_date'] for row in body['data']] == [
+        (START + timedelta(weeks=week)).isoformat() for week in (0, 2, 3)
+    ]
+    assert all(row['client_name'] == 'Client 0' and row['case_title'] == 'Case 0' for row in body['data'])
+    assert [conflict['date'] for conflict in body['conflicts']] == [(START + timedelta(weeks=1)).isoformat()]
+
+
+def test_conflicts_without_skipping_book_nothing(client, db, seed):
+    seed(lawyers=1, cases=1, appointments=0)
+    book(db, START + timedelta(weeks=2))
+
+    response = client.post('/appointments/recurring', json=series(skip_conflicts=False))
+    assert response.status_code == 409
+    assert Appointment.query.count() == 1
+
+
+def test_fully_conflicting_series_is_rejected(client, db, seed):
+    seed(lawyers=1, cases=1, appointments=0)
+    book(db, START)
+
+    response = client.post('/appointments/recurring', json=series(count=1))
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('overrides', [
+    {'start_date': (date.today() - timedelta(days=1)).isoformat()},
+    {'frequency': 'yearly'},
+    {'time': '20:00:00'},
+    {'weekdays': ['XX']},
+    {'count': None},
+])
+def test_invalid_series_is_rejected(client, db, seed, overrides):
+    seed(lawyers=1, cases=1, appointments=0)
+    response = client.post('/appointments/recurring', json=series(**overrides))
+    assert response.status_code == 400
+    assert Appointment.query.count() == 0
+
+
+# The response is built from one query, however long the series. Only reads
+# are counted: the ORM inserts the occurrences one by one to learn their keys.
+def test_reads_do_not_grow_with_the_series(client, db, seed):
+    seed(lawyers=2, cases=2, appointments=0)
+    counts = []
+    for lawyer_id, count in ((1, 2), (2, 20)):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('SELECT'):
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = client.post('/appointments/recurring', json=series(lawyer_id=lawyer_id, client_id=lawyer_id, count=count))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert response.status_code == 201
+        assert len(response.get_json()['data']) == count
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
@@ -0,0 +1,173 @@
+import sqlite3
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Column, Integer, String, Table, event, insert, select, text
+
+import routing
+from routing import STICKY_COOKIE, RoutingSession, init_read_routing, replica_binds
+
+
+# A primary and a replica file holding different rows, so every response
+# shows which database served it
+@pytest.fixture
+def routed(tmp_path, monkeypatch):
+    monkeypatch.setattr(routing, '_recent_writers', {})
+    paths = {'primary': tmp_path / 'primary.db', 'replica': tmp_path / 'replica.db'}
+    for source, path in paths.items():
+        with sqlite3.connect(path) as connection:
+            connection.execute('CREATE TABLE notes (id INTEGER PRIMARY KEY, source TEXT)')
+            connection.execute('INSERT INTO notes (source) VALUES (?)', (source,))
+
+    app = Flask('routing_test')
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{paths["primary"]}',
+        SQLALCHEMY_BINDS=replica_binds(f' sqlite:///{paths["replica"]} ,'),
+        REPLICA_STICKY_SECONDS=5,
+    )
+    database = SQLAlchemy(session_options={'class_': RoutingSession})
+    notes = Table('notes', database.metadata, Column('id', Integer, primary_key=True), Column('source', String))
+    database.init_app(app)
+    init_read_routing(app)
+
+    def sources():
+        return sorted(set(database.session.execute(select(notes.c.source)).scalars()))
+
+    @app.route('/notes', methods=['GET'])
+    def read_notes():
+        return jsonify(sources())
+
+    @app.route('/notes', methods=['POST'])
+    def write_note():
+        database.session.execute(insert(notes).values(source='written'))
+        database.session.commit()
+        return jsonify(sources()), 201
+
+    # A GET that writes: reads after the write must see it
+    @app.route('/notes/touch', methods=['GET'])
+    def touch_notes():
+        before = sources()
+        database.session.execute(insert(notes).values(source='touched'))
+        return jsonify({'before': before, 'after': sources()})
+
+    @app.route('/notes/locked', methods=['GET'])
+    def locked_notes():
+        return jsonify(sorted(database.session.execute(select(notes.c.source).with_for_update()).scalars()))
+
+    @app.route('/notes/raw', methods=['GET'])
+    def raw_notes():
+        return jsonify(sorted(database.session.execute(text('SELECT source FROM notes')).scalars()))
+
+    # No app context is held here: each request must get its own session
+    return app, database
+
+
+def test_binds_come_from_the_comma_separated_urls():
+    assert replica_binds('sqlite:///a.db, sqlite:///b.db,') == {'replica_0': 'sqlite:///a.db', 'replica_1': 'sqlite:///b.db'}
+    assert replica_binds('') == {}
+
+
+def test_get_reads_hit_the_replica(routed):
+    app, _ = routed
+    client = app.test_client()
+    assert client.get('/notes').get_json() == ['replica']
+    assert client.get('/notes/raw').get_json() == ['replica']
+
+
+def test_locking_reads_go_to_the_primary(routed):
+    app, _ = routed
+    assert app.test_client().get('/notes/locked').get_json() == ['primary']
+
+
+def test_a_write_pins_the_session_to_the_primary(routed):
+    app, _ = routed
+    client = app.test_client()
+    assert client.post('/notes').get_json() == ['primary', 'written']
+
+    body = app.test_client().get('/notes/touch', environ_base={'REMOTE_ADDR': '10.0.0.2'}).get_json()
+    assert body == {'before': ['replica'], 'after': ['primary', 'touched', 'written']}
+
+
+def test_sticky_cookie_sends_the_next_get_to_the_primary(routed, monkeypatch):
+    app, _ = routed
+    client = app.test_client()
+    response = client.post('/notes')
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+
+    # Only the cookie: forget the in-process window
+    monkeypatch.setattr(routing, '_recent_writers', {})
+    assert client.get('/notes').get_json() == ['primary', 'written']
+
+
+def test_sticky_map_sends_the_next_get_to_the_primary(routed):
+    app, _ = routed
+    headers = {'Authorization': 'Bearer writer'}
+    app.test_client().post('/notes', headers=headers)
+
+    # A new client without the cookie, known by its Authorization header
+    assert app.test_client().get('/notes', headers=headers).get_json() == ['primary', 'written']
+    assert app.test_client().get('/notes', headers={'Authorization': 'Bearer other'}).get_json() == ['replica']
+
+
+def test_sticky_window_expires(routed, monkeypatch):
+    app, _ = routed
+    client = app.test_client()
+    now = [1000.0]
+    monkeypatch.setattr(routing.time, 'time', lambda: now[0])
+    client.post('/notes')
+    now[0] += 4
+    assert client.get('/notes').get_json() == ['primary', 'written']
+    now[0] += 2
+    assert client.get('/notes').get_json() == ['replica']
+
+
+def test_failed_writes_are_not_sticky(routed):
+    app, _ = routed
+    client = app.test_client()
+    assert client.post('/missing').status_code == 404
+    assert client.get('/notes').get_json() == ['replica']
+
+
+def test_work_outside_requests_uses_the_primary(routed):
+    app, database = routed
+    with app.app_context():
+        assert database.session.execute(text('SELECT source FROM notes')).scalar() == 'primary'
+
+
+# The real app: /healthz must probe the primary even when a replica serves the
+# request, and /healthz/pool reports every replica's pool
+@pytest.fixture
+def replica_engine(app, db, tmp_path, monkeypatch):
+    from flask import g
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f'sqlite:///{tmp_path / "replica.db"}')
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_BINDS', {'replica_0': str(engine.url)})
+    monkeypatch.setitem(db._app_engines[app], 'replica_0', engine)
+    yield engine
+    g.pop('db_replica', None)
+    engine.dispose()
+
+
+def test_healthz_probes_the_primary(app, db, replica_engine):
+    from flask import g
+    import app as backend
+
+    replica_statements = []
+    event.listen(replica_engine, 'before_cursor_execute', lambda *args: replica_statements.append(args[2]))
+    with app.test_request_context('/healthz'):
+        # A fresh session: the fixture's has written and is pinned already
+        db.session.remove()
+        g.db_replica = 'replica_0'
+        response, status = backend.healthz()
+        db.session.remove()
+    assert status == 200 and response.get_json() == {'status': 'ok'}
+    assert replica_statements == []
+
+
+def test_pool_stats_include_the_replicas(client, replica_engine):
+    stats = client.get('/healthz/pool').get_json()
+    assert 'pool' in stats
+    assert set(stats['replicas']) == {'replica_0'}
+    assert stats['replicas']['replica_0']['pool'] == type(replica_engine.pool).__name__
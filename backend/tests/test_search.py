@@ -0,0 +1,106 @@
+import pytest
+
+import search
+from models import Case
+
+
+@pytest.fixture
+def add_cases(db, seed):
+    lawyers, clients, _ = seed(lawyers=1, cases=0, appointments=0)
+
+    def add(*documents):
+        cases = [Case(title=title, description=description, status='Open',
+                      client_id=clients[0].client_id, lawyer_id=lawyers[0].lawyer_id)
+                 for title, description in documents]
+        db.session.add_all(cases)
+        db.session.commit()
+        return [case.case_id for case in cases]
+    return add
+
+
+def ids(response):
+    return [row['case_id'] for row in response.get_json()['data']]
+
+
+def test_title_matches_rank_above_description_matches(client, add_cases):
+    in_description, in_title, unrelated = add_cases(
+        ('Tenancy', 'Landlord withheld the deposit'),
+        ('Deposit dispute', 'Tenant wants the money back'),
+        ('Custody', 'Shared custody arrangement'),
+    )
+    response = client.get('/cases/search?q=deposit')
+    assert response.status_code == 200
+    assert ids(response) == [in_title, in_description]
+    scores = [row['score'] for row in response.get_json()['data']]
+    assert scores[0] > scores[1] > 0
+
+
+def test_rare_terms_weigh_more_than_common_ones(client, add_cases):
+    common = add_cases(*[(f'Contract {n}', 'Breach of contract') for n in range(4)])
+    rare = add_cases(('Arbitration', 'Breach of contract and arbitration clause'))[0]
+    assert ids(client.get('/cases/search?q=contract arbitration'))[0] == rare
+    assert set(ids(client.get('/cases/search?q=contract&limit=10'))) == set(common) | {rare}
+
+
+def test_equal_scores_are_ordered_by_id(client, add_cases):
+    case_ids = add_cases(*[('Probate', 'Estate of the late owner')] * 3)
+    assert ids(client.get('/cases/search?q=probate')) == case_ids
+
+
+def test_pages_follow_the_ranking(client, add_cases):
+    add_cases(*[(f'Lease {n}', 'lease ' * n + 'renewal') for n in range(1, 8)])
+    full = ids(client.get('/cases/search?q=lease&limit=100'))
+
+    paged, after = [], None
+    while True:
+        path = '/cases/search?q=lease&limit=3' + (f'&after={after}' if after else '')
+        body = client.get(path).get_json()
+        assert len(body['data']) <= 3
+        paged += [row['case_id'] for row in body['data']]
+        after = body['next_cursor']
+        if after is None:
+            break
+    assert paged == full and len(full) == 7
+
+
+def test_matches_are_highlighted_and_escaped(client, add_cases):
+    add_cases(('Fraud <urgent>', 'Alleged fraud & forgery at the bank'))
+    (row,) = client.get('/cases/search?q=fraud').get_json()['data']
+    assert row['highlighted_title'] == '<mark>Fraud</mark> &lt;urgent&gt;'
+    assert row['snippet'] == 'Alleged <mark>fraud</mark> &amp; forgery at the bank'
+
+
+def test_index_follows_writes(client, db, add_cases):
+    first, second = add_cases(('Zoning appeal', 'Permit refused'), ('Noise complaint', 'Neighbour dispute'))
+    assert ids(client.get('/cases/search?q=zoning')) == [first]
+
+    db.session.get(Case, second).title = 'Zoning objection'
+    db.session.delete(db.session.get(Case, first))
+    db.session.commit()
+    assert ids(client.get('/cases/search?q=zoning')) == [second]
+
+    rows = [{'title': 'Zoning variance', 'description': 'x', 'status': 'Open', 'client_id': 1, 'lawyer_id': 1}]
+    assert client.post('/cases/bulk', json=rows).status_code == 201
+    assert len(ids(client.get('/cases/search?q=zoning'))) == 2
+
+
+def test_scores_match_a_fresh_index(client, db, add_cases):
+    add_cases(*[(f'Injury {n}', 'personal injury claim ' * (n % 3 + 1)) for n in range(6)])
+    client.get('/cases/search?q=injury')
+    db.session.get(Case, 2).description = 'settled out of court'
+    db.session.commit()
+    incremental = client.get('/cases/search?q=injury claim&limit=10').get_json()['data']
+
+    search._inverted_index = search.InvertedIndex()
+    rebuilt = client.get('/cases/search?q=injury claim&limit=10').get_json()['data']
+    assert [(row['case_id'], row['score']) for row in incremental] == [(row['case_id'], row['score']) for row in rebuilt]
+
+
+@pytest.mark.parametrize('query', ['', 'q=', 'q=lease&after=bogus', 'q=lease&limit=0'])
+def test_invalid_requests(client, db, query):
+    assert client.get(f'/cases/search?{query}').status_code == 400
+
+
+def test_no_match_returns_an_empty_page(client, add_cases):
+    add_cases(('Divorce', 'Asset split'))
+    assert client.get('/cases/search?q=maritime').get_json() == {'data': [], 'next_cursor': None}
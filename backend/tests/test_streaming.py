@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from streaming import NDJSON_MIMETYPE, STREAM_BATCH_SIZE, ndjson_response
+
+
+def lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('path', ['/lawyers', '/clients', '/cases', '/appointments', '/all-appointments'])
+def test_stream_matches_the_json_list(client, seed, path):
+    seed(lawyers=3, cases=5, appointments=5)
+    full = client.get(path).get_json()
+    for kwargs in ({'path': f'{path}?stream=1'}, {'path': path, 'headers': {'Accept': NDJSON_MIMETYPE}}):
+        response = client.get(**kwargs)
+        assert response.status_code == 200
+        assert response.mimetype == NDJSON_MIMETYPE
+        assert response.is_streamed
+        assert lines(response) == full
+
+
+def test_one_object_per_line(client, seed):
+    seed(lawyers=2, cases=3, appointments=0)
+    body = client.get('/cases?stream=1').get_data(as_text=True)
+    assert body.endswith('\n')
+    assert all(isinstance(json.loads(line), dict) for line in body.splitlines())
+    assert len(body.splitlines()) == 3
+
+
+def test_json_stays_the_default(client, seed):
+    seed(lawyers=1, cases=1, appointments=0)
+    response = client.get('/cases', headers={'Accept': f'application/json, {NDJSON_MIMETYPE};q=0.5'})
+    assert response.mimetype == 'application/json'
+
+
+def test_stream_filters_apply(client, seed):
+    seed(lawyers=2, cases=8, appointments=0)
+    rows = lines(client.get('/cases?stream=1&status=Open'))
+    assert len(rows) == 2 and {row['status'] for row in rows} == {'Open'}
+
+
+def test_rows_are_fetched_with_yield_per(client, db, seed):
+    seed(lawyers=2, cases=3, appointments=0)
+    options = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'FROM cases' in statement:
+            options.append(context.execution_options)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        client.get('/cases?stream=1').get_data()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    (execution_options,) = options
+    assert execution_options.get('yield_per') == STREAM_BATCH_SIZE
+    assert execution_options.get('stream_results')
+
+
+# Each batch is serialized and sent before the next one is fetched, so at most
+# one batch of rows is held at a time
+def test_batches_are_sent_as_they_are_fetched(app, db, seed):
+    from models import Case
+
+    seed(lawyers=2, cases=5, appointments=0)
+    fetched = []
+
+    def serialize(case):
+        fetched.append(case.case_id)
+        return {'case_id': case.case_id}
+
+    with app.test_request_context():
+        response = ndjson_response(Case.query.order_by(Case.case_id), serialize, batch_size=2)
+        sizes = [(len(chunk.splitlines()), len(fetched)) for chunk in response.response]
+    assert sizes == [(2, 2), (2, 4), (1, 5)]
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models import Case, Counter, Tombstone
+from sync import SYNC_TOKEN_HEADER, prune_tombstones
+
+
+def sync_token(client, path='/cases'):
+    return client.get(path).headers[SYNC_TOKEN_HEADER]
+
+
+def delta(client, token, path='/cases'):
+    return client.get(f'{path}?since={token}')
+
+
+def add_case(db, title):
+    case = Case(title=title, description='Delta sync', status='Open', client_id=1, lawyer_id=1)
+    db.session.add(case)
+    db.session.commit()
+    return case
+
+
+def test_delta_returns_changed_rows_and_deletes(client, db, seed):
+    seed(lawyers=1, cases=3, appointments=0)
+    token = sync_token(client)
+
+    added = add_case(db, 'New case')
+    changed = db.session.get(Case, 1)
+    changed.status = 'Closed'
+    db.session.delete(db.session.get(Case, 2))
+    db.session.commit()
+
+    body = delta(client, token).get_json()
+    assert sorted(row['case_id'] for row in body['data']) == [1, added.case_id]
+    assert body['deleted'] == [2]
+    assert all('row_version' not in row for row in body['data'])
+
+    # Nothing changed since the returned token
+    assert delta(client, body['since']).get_json() == {'data': [], 'deleted': [], 'since': body['since']}
+
+
+# On a database without counter rows, the first writes must still be
+# versioned so a token taken before them finds them
+def test_first_writes_are_versioned(client, db, seed):
+    Counter.query.delete()
+    db.session.commit()
+    seed(lawyers=1, cases=0, appointments=0)
+    token = sync_token(client)
+
+    for number in range(5):
+        add_case(db, f'Case {number}')
+    assert all(case.row_version for case in Case.query)
+
+    body = delta(client, token).get_json()
+    assert len(body['data']) == 5
+
+
+# Rows are stamped by primary key at commit, once per table however many
+# flushes wrote them; rows the transaction did not write keep their version
+def test_rows_are_stamped_once_per_transaction(client, db, seed):
+    seed(lawyers=1, cases=3, appointments=0)
+    untouched = db.session.get(Case, 3).row_version
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE cases SET row_version'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        db.session.get(Case, 1).title = 'Renamed'
+        db.session.flush()
+        db.session.get(Case, 2).title = 'Renamed too'
+        db.session.flush()
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert len(statements) == 1
+    first, second, third = (db.session.get(Case, case_id).row_version for case_id in (1, 2, 3))
+    assert first == second > untouched == third
+    assert first == db.session.query(Counter.value).filter(Counter.name == 'version:cases').scalar()
+
+
+def test_bulk_inserted_rows_are_versioned(client, db, seed):
+    seed(lawyers=1, cases=0, appointments=0)
+    token = sync_token(client)
+    rows = [{'title': f'Bulk {n}', 'description': 'x', 'status': 'Open', 'client_id': 1, 'lawyer_id': 1} for n in range(3)]
+    assert client.post('/cases/bulk', json=rows).status_code in (200, 201)
+
+    assert len(delta(client, token).get_json()['data']) == 3
+
+
+# Rows from before versioning keep their NULL version: a bulk import must not
+# claim them, or every delta after it would resend the whole legacy table
+def test_bulk_insert_leaves_legacy_rows_alone(client, db, seed):
+    seed(lawyers=1, cases=2, appointments=0)
+    Case.query.update({'row_version': None})
+    db.session.commit()
+    token = sync_token(client)
+    rows = [{'title': f'Bulk {n}', 'description': 'x', 'status': 'Open', 'client_id': 1, 'lawyer_id': 1} for n in range(2)]
+    assert client.post('/cases/bulk', json=rows).status_code == 201
+
+    assert [case['title'] for case in delta(client, token).get_json()['data']] == ['Bulk 0', 'Bulk 1']
+    db.session.expire_all()
+    assert Case.query.filter(Case.row_version.is_(None)).count() == 2
+
+
+def test_pruned_tombstones_expire_older_tokens(client, db, seed):
+    seed(lawyers=1, cases=2, appointments=0)
+    token = sync_token(client)
+    db.session.delete(db.session.get(Case, 1))
+    db.session.commit()
+    Tombstone.query.update({'deleted_at': datetime.utcnow() - timedelta(days=60)})
+    db.session.commit()
+
+    assert prune_tombstones() == {'cases': 1}
+    response = delta(client, token)
+    assert response.status_code == 410
+    assert response.get_json()['reset'] is True
+    # A full reload hands out a token that works again
+    assert delta(client, sync_token(client)).status_code == 200
+
+
+def test_invalid_delta_requests(client, db, seed):
+    seed(lawyers=1, cases=1, appointments=0)
+    token = sync_token(client)
+    assert client.get('/cases?since=garbage').status_code == 400
+    assert client.get(f'/cases?since={token}&status=Open').status_code == 400
+    assert delta(client, sync_token(client, '/clients')).status_code == 400
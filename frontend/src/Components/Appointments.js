@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './styles.css';
-import { getAppointments, addAppointment, updateAppointment, deleteAppointment, getClients, getLawyers, getCases } from '../api';
+import { getAppointments, addAppointment, updateAppointment, deleteAppointment, getClients, getLawyers, getCases, subscribeToChanges, applyChange, getAllPages, PAGE_SIZE } from '../api';
 
 const Appointments = () => {
   const [appointments, setAppointments] = useState([]);
@@ -16,36 +16,34 @@ const Appointments = () => {
     appointment_status: 'Scheduled'
   });
   const [editingAppointment, setEditingAppointment] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
   useEffect(() => {
     fetchData();
+    // Keep the list current with changes made by other staff
+    return subscribeToChanges(
+      ['appointments'],
+      (change) => setAppointments(prevAppointments => applyChange(prevAppointments, 'appointment_id', change)),
+      () => fetchData()
+    );
   }, []);
 
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [appointmentsResponse, clientsResponse, lawyersResponse, casesResponse] = await Promise.all([
-        getAppointments(),
-        getClients(),
-        getLawyers(),
-        getCases()
+      // Only the first page of appointments; the lookups behind the dropdowns
+      // are fetched in full but limited to the columns they show
+      const [appointmentsResponse, clientsData, lawyersData, casesData] = await Promise.all([
+        getAppointments({ limit: PAGE_SIZE }),
+        getAllPages(getClients, { fields: 'client_id,name,lawyer_id' }),
+        getAllPages(getLawyers, { fields: 'lawyer_id,name' }),
+        getAllPages(getCases, { fields: 'case_id,title,client_id' })
       ]);
 
-      const appointmentsData = Array.isArray(appointmentsResponse.data) ? appointmentsResponse.data : [];
-      const clientsData = Array.isArray(clientsResponse.data) ? clientsResponse.data : [];
-      const lawyersData = Array.isArray(lawyersResponse.data) ? lawyersResponse.data : [];
-      const casesData = Array.isArray(casesResponse.data) ? casesResponse.data : [];
-
-      console.log('Fetched Data:', {
-        appointments: appointmentsData,
-        clients: clientsData,
-        lawyers: lawyersData,
-        cases: casesData
-      });
-
-      setAppointments(appointmentsData);
+      setAppointments(appointmentsResponse.data.data);
+      setNextCursor(appointmentsResponse.data.next_cursor);
       setClients(clientsData);
       setLawyers(lawyersData);
       setCases(casesData);
@@ -58,6 +56,17 @@ const Appointments = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await getAppointments({ limit: PAGE_SIZE, after: nextCursor });
+      setAppointments(prevAppointments => [...prevAppointments, ...response.data.data]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to fetch data');
+      console.error('Error fetching data:', err);
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setNewAppointment(prev => ({ ...prev, [name]: value }));
@@ -146,7 +155,11 @@ const Appointments = () => {
         const response = await addAppointment(formattedData);
         console.log('Add response:', response);
         if (response.data && response.data.data) {
-          setAppointments(prevAppointments => [...prevAppointments, response.data.data]);
+          // The change feed may have added the row already
+          const createdAppointment = response.data.data;
+          setAppointments(prevAppointments => applyChange(prevAppointments, 'appointment_id', {
+            op: 'insert', id: createdAppointment.appointment_id, fields: createdAppointment
+          }));
         }
       }
 
@@ -159,9 +172,6 @@ const Appointments = () => {
         time: '',
         appointment_status: 'Scheduled'
       });
-
-      // Refresh the appointments list
-      fetchData();
     } catch (err) {
       console.error('Error processing appointment:', err);
       setError(err.response?.data?.message || err.message || 'Failed to process appointment');
@@ -379,6 +389,9 @@ const Appointments = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button onClick={loadMore}>Load more</button>
+            )}
           </>
         )}
       </div>
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './styles.css';
-import { getCases, addCase, updateCase, deleteCase, getClients, getLawyers } from '../api';
+import { getCases, addCase, updateCase, deleteCase, getClients, getLawyers, subscribeToChanges, applyChange, getAllPages, PAGE_SIZE } from '../api';
 
 const Cases = () => {
   const [cases, setCases] = useState([]);
@@ -14,6 +14,7 @@ const Cases = () => {
     lawyer_id: ''
   });
   const [editingCase, setEditingCase] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -28,20 +29,26 @@ const Cases = () => {
 
   useEffect(() => {
     fetchData();
+    // Keep the list current with changes made by other staff
+    return subscribeToChanges(
+      ['cases'],
+      (change) => setCases(prevCases => applyChange(prevCases, 'case_id', change)),
+      () => fetchData()
+    );
   }, []);
 
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [casesResponse, clientsResponse, lawyersResponse] = await Promise.all([
-        getCases(),
-        getClients(),
-        getLawyers()
+      const [casesResponse, clientsData, lawyersData] = await Promise.all([
+        getCases({ limit: PAGE_SIZE }),
+        getAllPages(getClients, { fields: 'client_id,name,lawyer_id' }),
+        getAllPages(getLawyers, { fields: 'lawyer_id,name' })
       ]);
-      console.log('Cases data:', casesResponse.data); // Debug log
-      setCases(Array.isArray(casesResponse.data) ? casesResponse.data : []);
-      setClients(Array.isArray(clientsResponse.data) ? clientsResponse.data : []);
-      setLawyers(Array.isArray(lawyersResponse.data) ? lawyersResponse.data : []);
+      setCases(casesResponse.data.data);
+      setNextCursor(casesResponse.data.next_cursor);
+      setClients(clientsData);
+      setLawyers(lawyersData);
       setError(null);
     } catch (err) {
       setError('Failed to fetch data');
@@ -51,6 +58,17 @@ const Cases = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await getCases({ limit: PAGE_SIZE, after: nextCursor });
+      setCases(prevCases => [...prevCases, ...response.data.data]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to fetch data');
+      console.error('Error fetching data:', err);
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setNewCase({ ...newCase, [name]: value });
@@ -95,7 +113,9 @@ const Cases = () => {
             });
             console.log('Add case response:', response);
             if (response.data && response.data.data) {
-                setCases(prevCases => [...prevCases, response.data.data]);
+                // The change feed may have added the row already
+                const createdCase = response.data.data;
+                setCases(prevCases => applyChange(prevCases, 'case_id', { op: 'insert', id: createdCase.case_id, fields: createdCase }));
             }
         }
 
@@ -266,6 +286,9 @@ const Cases = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button onClick={loadMore}>Load more</button>
+            )}
           </>
         )}
       </div>
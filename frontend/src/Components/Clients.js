@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './styles.css';
-import { getClients, addClient, updateClient, deleteClient, getLawyers } from '../api';
+import { getClients, addClient, updateClient, deleteClient, getLawyers, getAllPages, PAGE_SIZE } from '../api';
 
 const Clients = () => {
   const [clients, setClients] = useState([]);
@@ -13,6 +13,7 @@ const Clients = () => {
     lawyer_id: ''
   });
   const [editingClient, setEditingClient] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -24,12 +25,13 @@ const Clients = () => {
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [clientsResponse, lawyersResponse] = await Promise.all([
-        getClients(),
-        getLawyers()
+      const [clientsResponse, lawyersData] = await Promise.all([
+        getClients({ limit: PAGE_SIZE }),
+        getAllPages(getLawyers, { fields: 'lawyer_id,name' })
       ]);
-      setClients(clientsResponse.data);
-      setLawyers(lawyersResponse.data);
+      setClients(clientsResponse.data.data);
+      setNextCursor(clientsResponse.data.next_cursor);
+      setLawyers(lawyersData);
       setError(null);
     } catch (err) {
       setError('Failed to fetch data');
@@ -39,6 +41,17 @@ const Clients = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await getClients({ limit: PAGE_SIZE, after: nextCursor });
+      setClients(prevClients => [...prevClients, ...response.data.data]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to fetch data');
+      console.error('Error fetching data:', err);
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setNewClient({ ...newClient, [name]: value });
@@ -214,6 +227,9 @@ const Clients = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button onClick={loadMore}>Load more</button>
+            )}
           </>
         )}
       </div>
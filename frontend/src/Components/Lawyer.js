@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getLawyers, addLawyer, updateLawyer, deleteLawyer } from '../api';
+import { getLawyers, addLawyer, updateLawyer, deleteLawyer, PAGE_SIZE } from '../api';
 import './styles.css';
 
 const Lawyer = () => {
@@ -16,6 +16,7 @@ const Lawyer = () => {
     specialization: ''
   });
   const [editingLawyer, setEditingLawyer] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -26,8 +27,9 @@ const Lawyer = () => {
 
   const fetchLawyers = async () => {
     try {
-      const response = await getLawyers();
-      setLawyers(response.data);
+      const response = await getLawyers({ limit: PAGE_SIZE });
+      setLawyers(response.data.data);
+      setNextCursor(response.data.next_cursor);
       setLoading(false);
     } catch (error) {
       setError('Failed to fetch lawyers');
@@ -35,6 +37,16 @@ const Lawyer = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await getLawyers({ limit: PAGE_SIZE, after: nextCursor });
+      setLawyers(prevLawyers => [...prevLawyers, ...response.data.data]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      setError('Failed to fetch lawyers');
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setNewLawyer({ ...newLawyer, [name]: value });
@@ -259,6 +271,9 @@ const Lawyer = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button onClick={loadMore}>Load more</button>
+            )}
           </>
         )}
       </div>
@@ -62,10 +62,12 @@ export const getDetails = async (type) => {
 
 // ------------------- Clients API -------------------
 
-export const getClients = async () => {
+// Optional params: { limit, after, ...filters }; when limit/after are set the
+// response is { data, next_cursor } instead of a plain list
+export const getClients = async (params = {}) => {
   console.log('Fetching clients...');
   try {
-    const response = await axios.get(`${API_URL}/clients`);
+    const response = await axios.get(`${API_URL}/clients`, { params });
     console.log('Clients response:', response.data);
     return response;
   } catch (error) {
@@ -112,10 +114,12 @@ export const deleteClient = async (clientId) => {
 
 // ------------------- Cases API -------------------
 
-export const getCases = async () => {
+// Optional params: { limit, after, ...filters }; when limit/after are set the
+// response is { data, next_cursor } instead of a plain list
+export const getCases = async (params = {}) => {
   console.log('Fetching cases...');
   try {
-    const response = await axios.get(`${API_URL}/cases`);
+    const response = await axios.get(`${API_URL}/cases`, { params });
     console.log('Cases response:', response.data);
     return response;
   } catch (error) {
@@ -162,10 +166,12 @@ export const deleteCase = async (caseId) => {
 
 // ------------------- Appointments API -------------------
 
-export const getAppointments = async () => {
+// Optional params: { limit, after, ...filters }; when limit/after are set the
+// response is { data, next_cursor } instead of a plain list
+export const getAppointments = async (params = {}) => {
   console.log('Fetching appointments...');
   try {
-    const response = await axios.get(`${API_URL}/appointments`);
+    const response = await axios.get(`${API_URL}/appointments`, { params });
     console.log('Appointments response:', response.data);
     return response;
   } catch (error) {
@@ -210,6 +216,48 @@ export const deleteAppointment = async (appointmentId) => {
   }
 };
 
+// ------------------- Change Feed API -------------------
+
+// Subscribe to committed changes of the given tables over Server-Sent Events.
+// onChange receives { table, id, op, fields }; onReset(table) means the table
+// ('*' for all) must be reloaded. Returns a function that closes the stream.
+export const subscribeToChanges = (tables, onChange, onReset) => {
+  const source = new EventSource(`${API_URL}/events?tables=${tables.join(',')}`);
+  source.addEventListener('change', (event) => onChange(JSON.parse(event.data)));
+  source.addEventListener('reset', (event) => onReset(JSON.parse(event.data).table));
+  return () => source.close();
+};
+
+// Apply a change event to a list of rows identified by `key`
+export const applyChange = (rows, key, change) => {
+  if (change.op === 'delete') {
+    return rows.filter(row => row[key] !== change.id);
+  }
+  if (change.op === 'insert' && !rows.some(row => row[key] === change.id)) {
+    return [...rows, { ...change.fields, [key]: change.id }];
+  }
+  return rows.map(row => (row[key] === change.id ? { ...row, ...change.fields } : row));
+};
+
+// ------------------- Paging -------------------
+
+// Rows per page on the list screens; the backend caps limit at 500
+export const PAGE_SIZE = 50;
+const LOOKUP_PAGE_SIZE = 500;
+
+// Follow next_cursor until the last page. Used for the small lookup lists
+// behind the dropdowns, which should ask for only the fields they show.
+export const getAllPages = async (getPage, params = {}) => {
+  let rows = [];
+  let after;
+  do {
+    const response = await getPage({ ...params, limit: LOOKUP_PAGE_SIZE, ...(after ? { after } : {}) });
+    rows = rows.concat(response.data.data);
+    after = response.data.next_cursor;
+  } while (after);
+  return rows;
+};
+
 // ------------------- Dashboard API -------------------
 
 export const getDashboardData = async () => {
@@ -296,7 +344,7 @@ export const updateProfile = async (adminId, data) => {
 
 // ------------------- Lawyers API -------------------
 
-export const getLawyers = () => axios.get(`${API_URL}/lawyers`); // Get all lawyers
+export const getLawyers = (params = {}) => axios.get(`${API_URL}/lawyers`, { params }); // Get all lawyers
 export const addLawyer = async (data) => {
   console.log('Sending lawyer data:', data);
   try {